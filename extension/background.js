@@ -1,5 +1,8 @@
-const API_URL = "http://localhost:8000/api/conversation/save+analyze";
+const API_BASE = "http://localhost:8000";
+const JOB_URL = `${API_BASE}/api/jobs/save+analyze`;
 const PROJECT = "AI Conversation Archiver";
+const POLL_INTERVAL_MS = 3000;
+const POLL_TIMEOUT_MS = 10 * 60 * 1000;
 
 // 툴바 아이콘 클릭 시 현재 탭에 content script 주입 → 수집 → 서버 POST
 chrome.action.onClicked.addListener(async (tab) => {
@@ -22,25 +25,47 @@ chrome.action.onClicked.addListener(async (tab) => {
       conversation: result
     };
 
-    const resp = await fetch(API_URL, {
+    // 작업 큐에 넣고(202) 바로 반환 → 서비스 워커가 LLM 완료까지 붙잡혀 있지 않음
+    const resp = await fetch(JOB_URL, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", "X-Server-Timing": "1" },
       body: JSON.stringify(payload)
     });
+    console.log("enqueue Server-Timing:", resp.headers.get("Server-Timing"));
 
     if (!resp.ok) {
       const t = await resp.text();
       throw new Error(`HTTP ${resp.status}: ${t}`);
     }
 
+    const { job_id, status_url } = await resp.json();
+    await notify("분석 대기", `작업이 등록되었습니다 (${job_id.slice(0, 8)})`);
+
+    const job = await pollJob(`${API_BASE}${status_url}`);
+    if (job.status !== "done") throw new Error(`job ${job.status}: ${job.error || ""}`);
     await notify("저장 완료", "Obsidian Vault에 노트가 생성되었습니다.");
-    console.log("Saved:", await resp.json());
+    console.log("Saved:", job.result);
+    // 구간별 소요 시간(ms): prompt_build / llm / llm_openai / llm_ollama / parse / frontmatter / write ...
+    if (job.result && job.result.timings) console.table(job.result.timings);
   } catch (e) {
     console.error(e);
     await notify("에러", String(e).slice(0, 180));
   }
 });
 
+// 작업 상태 폴링 (짧은 GET 반복이라 워커가 중간에 죽어도 다음 클릭 때 다시 조회 가능)
+async function pollJob(url) {
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    const r = await fetch(url);
+    if (!r.ok) throw new Error(`HTTP ${r.status}: ${await r.text()}`);
+    const job = await r.json();
+    if (job.status === "done" || job.status === "failed") return job;
+    await new Promise(res => setTimeout(res, POLL_INTERVAL_MS));
+  }
+  throw new Error("작업 대기 시간 초과");
+}
+
 // 간단 알림(개발 중엔 console도 같이 확인)
 async function notify(title, message) {
   // MV3에선 notifications 권한 없이도 기본 브라우저 알림은 제한됨 → console 병행
@@ -0,0 +1,126 @@
+"""
+입장 제어 벤치마크: 가짜 LLM(고정 지연) 앞에서 클라이언트가 한꺼번에 몰릴 때 제시간에 끝나는 요청 비율.
+- legacy   : 입장 제어 없음 (백엔드 세마포어 앞에서 전부 기다림 → 뒤쪽은 클라이언트 타임아웃, LLM 은 계속 돌며 낭비)
+- admission: 동시 상한 + 대기열 + 예상 대기가 타임아웃을 넘으면 즉시 503 + Retry-After
+- degraded : admission + X-Allow-Degraded (거절 대신 LLM 없는 기본 노트)
+각 모드는 새 uvicorn 프로세스 (설정이 import 시점에 읽히므로), 버스트 전에 --warmup 건을 순서대로 보내 처리 시간 추정을 익힌다.
+
+    python -m scripts.bench_admission --clients 64 --latency 1.0 --client-timeout 5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from scripts.stub_llm import serve_in_thread
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--clients", type=int, default=64, help="동시에 몰리는 요청 수")
+ap.add_argument("--latency", type=float, default=1.0, help="가짜 LLM 응답 지연 (초)")
+ap.add_argument("--client-timeout", type=float, default=5.0, help="클라이언트 타임아웃 (초)")
+ap.add_argument("--concurrency", type=int, default=4, help="ADMISSION_MAX_CONCURRENT = LLM_MAX_CONCURRENCY")
+ap.add_argument("--queue", type=int, default=16, help="ADMISSION_MAX_QUEUE")
+ap.add_argument("--warmup", type=int, default=4)
+ap.add_argument("--modes", default="legacy,admission,degraded")
+args = ap.parse_args()
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _env(tmp: str, stub_port: int, mode: str) -> dict:
+    env = dict(os.environ)
+    env.update(OBSIDIAN_VAULT_DIR=f"{tmp}/vault", INCREMENTAL_STATE_DIR=f"{tmp}/state",
+               ANALYSIS_CACHE_DIR=f"{tmp}/cache", JOBS_DB_PATH=f"{tmp}/jobs.sqlite3",
+               NOTE_INDEX_DB=f"{tmp}/notes.sqlite3", SEARCH_INDEX_DB=f"{tmp}/search.sqlite3",
+               IMPORT_CHECKPOINT_DIR=f"{tmp}/imports", ANALYSIS_CACHE_ENABLED="false",
+               USE_LOCAL_LLM="true", LOCAL_LLM_BASE_URL=f"http://127.0.0.1:{stub_port}/v1",
+               LLM_MAX_CONCURRENCY=str(args.concurrency), RATE_LIMIT_PER_MIN="0")
+    if mode == "legacy":
+        env.update(ADMISSION_MAX_CONCURRENT="100000", ADMISSION_MAX_QUEUE="100000", ADMISSION_CLIENT_TIMEOUT="1e9")
+    else:
+        env.update(ADMISSION_MAX_CONCURRENT=str(args.concurrency), ADMISSION_MAX_QUEUE=str(args.queue))
+    return env
+
+
+def _body(i: int) -> dict:
+    return {"project": "Bench", "source": "bench",
+            "conversation": [{"role": "user", "content": f"질문 {i}: 고유값 분해를 설명해 줘"},
+                             {"role": "assistant", "content": f"답변 {i}: A = PDP^-1 꼴로 ..."}]}
+
+
+async def run_mode(mode: str, stub_port: int) -> dict:
+    tmp = tempfile.mkdtemp(prefix="gpt2note-bench-admission-")
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "server.app:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=ROOT, env=_env(tmp, stub_port, mode),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    headers = {} if mode == "legacy" else {"X-Client-Timeout": str(args.client_timeout)}
+    if mode == "degraded":
+        headers["X-Allow-Degraded"] = "1"
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.client_timeout,
+                                     limits=httpx.Limits(max_connections=args.clients * 2)) as c:
+            for _ in range(200):
+                try:
+                    if (await c.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+            for i in range(args.warmup):
+                await c.post("/api/conversation/analyze", json=_body(-1 - i), headers=headers)
+
+            async def one(i: int) -> tuple:
+                t0 = time.perf_counter()
+                try:
+                    r = await c.post("/api/conversation/analyze", json=_body(i), headers=headers)
+                except httpx.TimeoutException:
+                    return "timeout", time.perf_counter() - t0
+                if r.status_code == 200:
+                    return ("degraded" if r.json()["meta"].get("degraded") else "ok"), time.perf_counter() - t0
+                return str(r.status_code), time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            results = await asyncio.gather(*(one(i) for i in range(args.clients)))
+            wall = time.perf_counter() - t0
+    finally:
+        # legacy 는 타임아웃난 요청을 아직 처리 중이라 정상 종료를 기다리지 않음
+        proc.kill()
+        proc.wait()
+
+    by = {}
+    for kind, dt in results:
+        by.setdefault(kind, []).append(dt)
+    ok = sorted(by.get("ok", []))
+    rejected = sorted(by.get("503", []) + by.get("429", []))
+    pct = lambda xs, q: round(xs[min(len(xs) - 1, int(q * len(xs)))], 3) if xs else None
+    return {"mode": mode, "wall_s": round(wall, 2), **{k: len(v) for k, v in sorted(by.items())},
+            "analyzed_in_time": f"{len(ok) / args.clients:.0%}",
+            "ok_p50_s": pct(ok, 0.5), "ok_p95_s": pct(ok, 0.95),
+            "reject_p95_s": pct(rejected, 0.95),
+            "answered_in_time": f"{(len(ok) + len(by.get('degraded', []))) / args.clients:.0%}"}
+
+
+def main() -> None:
+    stub_port = _free_port()
+    serve_in_thread(stub_port, args.latency)
+    print(f"[bench] {args.clients} clients, LLM {args.latency}s, client timeout {args.client_timeout}s, "
+          f"concurrency {args.concurrency}, queue {args.queue}")
+    for mode in args.modes.split(","):
+        print(asyncio.run(run_mode(mode.strip(), stub_port)))
+
+
+if __name__ == "__main__":
+    main()
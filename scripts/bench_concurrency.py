@@ -0,0 +1,132 @@
+"""
+analyze 라우트 동시성 벤치마크: 예전 동기(def) 경로 vs 비동기(async def) 경로.
+가짜 LLM(scripts/stub_llm.py)을 띄우고 같은 앱 안에서 N개 요청을 동시에 보낸다.
+동기 경로는 Starlette 스레드풀(기본 40)에 묶여 ceil(N/40) * latency 근처가 나와야 하고,
+비동기 경로는 latency 근처에서 끝나야 한다.
+
+    python -m scripts.bench_concurrency --requests 200 --latency 1.0
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--requests", type=int, default=200)
+ap.add_argument("--latency", type=float, default=1.0)
+ap.add_argument("--port", type=int, default=11500)
+args = ap.parse_args()
+
+# 서버 모듈 import 전에 환경 설정 (캐시/레이트 리밋 끄고, 풀/동시성/입장 상한은 벤치 요청 수 이상으로)
+_tmp = tempfile.mkdtemp(prefix="gpt2note-bench-")
+os.environ.update({
+    "USE_LOCAL_LLM": "true",
+    "LOCAL_LLM_BASE_URL": f"http://127.0.0.1:{args.port}/v1",
+    "ANALYSIS_CACHE_ENABLED": "false",
+    "ANALYSIS_CACHE_DIR": os.path.join(_tmp, "cache"),
+    "INCREMENTAL_STATE_DIR": os.path.join(_tmp, "incremental"),
+    "OBSIDIAN_VAULT_DIR": os.path.join(_tmp, "vault"),
+    "LLM_MAX_CONNECTIONS": str(args.requests),
+    "LLM_MAX_KEEPALIVE": str(args.requests),
+    "LLM_MAX_CONCURRENCY": str(args.requests),
+    "ADMISSION_MAX_CONCURRENT": str(args.requests),
+    "RATE_LIMIT_PER_MIN": "0",
+})
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from server import client_factory  # noqa: E402
+from server.client_factory import backend_key, resolve_params  # noqa: E402
+from server.routers.analyze import router as analyze_router, AnalyzeReq, AnalyzeRes  # noqa: E402
+from server.services.formatters import parse_output  # noqa: E402
+from scripts.stub_llm import serve_in_thread  # noqa: E402
+
+app = FastAPI()
+app.include_router(analyze_router)
+
+# --- 변경 전 형태: 프로세스 공유 동기 OpenAI 클라이언트 + 백엔드별 BoundedSemaphore ---
+_lock = threading.Lock()
+_sync_http: httpx.Client | None = None
+_client = None
+_sync_limits: Dict[str, threading.BoundedSemaphore] = {}
+
+
+def get_client():
+    global _client, _sync_http
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from openai import OpenAI
+                _sync_http = httpx.Client(timeout=client_factory._timeout(), limits=client_factory._limits())
+                _client = OpenAI(http_client=_sync_http, **client_factory._openai_kwargs())
+    return _client
+
+
+@contextmanager
+def backend_slot_sync(url: str | None = None):
+    key = backend_key(url)
+    with _lock:
+        sem = _sync_limits.get(key)
+        if sem is None:
+            sem = _sync_limits[key] = threading.BoundedSemaphore(int(os.environ["LLM_MAX_CONCURRENCY"]))
+    with sem:
+        yield
+
+
+def chat_completion(messages: List[Dict]):
+    use_model, use_temp, use_max = resolve_params()
+    with backend_slot_sync():
+        return get_client().chat.completions.create(model=use_model, messages=messages, temperature=use_temp,
+                                                    max_tokens=use_max)
+
+
+def parse_dual_output(text: str) -> tuple[dict, str]:
+    meta, md, _ = parse_output(text)
+    return meta, md
+
+
+@app.post("/bench/analyze-sync", response_model=AnalyzeRes)
+def analyze_sync(req: AnalyzeReq):
+    # 변경 전 형태: def 핸들러 + 블로킹 OpenAI 호출 (스레드풀 워커를 응답 내내 점유)
+    resp = chat_completion([{"role": "system", "content": "\n".join(m.content for m in req.conversation)}])
+    meta, md = parse_dual_output(resp.choices[0].message.content)
+    return AnalyzeRes(meta=meta, markdown=md)
+
+
+async def _run(path: str, n: int) -> float:
+    payload = {"project": "bench", "conversation": [{"role": "user", "content": "무슨 뜻인지 다시 설명해줘"},
+                                                    {"role": "assistant", "content": "설명입니다."}]}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as c:
+        t0 = time.perf_counter()
+        rs = await asyncio.gather(*(c.post(path, json=payload) for _ in range(n)))
+        dt = time.perf_counter() - t0
+    bad = [r.status_code for r in rs if r.status_code != 200]
+    if bad:
+        raise SystemExit(f"{path}: {len(bad)} failed requests ({bad[:5]})")
+    return dt
+
+
+async def main():
+    await client_factory.startup()
+    try:
+        for name, path in (("sync (threadpool)", "/bench/analyze-sync"), ("async", "/api/conversation/analyze")):
+            dt = await _run(path, args.requests)
+            print(f"{name:18s} {args.requests} req  {dt:6.2f}s  {args.requests / dt:7.1f} req/s")
+    finally:
+        await client_factory.shutdown()
+        if _sync_http is not None:
+            _sync_http.close()
+
+
+if __name__ == "__main__":
+    stub = serve_in_thread(args.port, args.latency)
+    try:
+        asyncio.run(main())
+    finally:
+        stub.should_exit = True
@@ -0,0 +1,109 @@
+"""
+벤치마크용 대화 코퍼스. 확장(scrapeConversation)이 보내는 모양 그대로 [{"role", "content"}] 리스트.
+- short : 4턴, 메시지 수백 자 (일상 질문)
+- long  : 200턴, 코드 블록/목록 섞인 기술 대화
+- maxlen: 40턴, 모든 메시지가 확장의 MAX_LEN(4000자)에 딱 맞게 잘린 것
+같은 seed 면 항상 같은 코퍼스. 실제 기록이 있으면 ChatGPT 내보내기(conversations.json)에서 뽑아 JSONL 로 저장해 재사용.
+
+    python -m scripts.bench_corpus --out corpus.jsonl                              # 합성 코퍼스 저장
+    python -m scripts.bench_corpus --export conversations.json --out corpus.jsonl  # 실제 대화를 종류별로 분류해 저장
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+MAX_LEN = 4000   # extension/background.js scrapeConversation 의 MAX_LEN
+KINDS = ("short", "long", "maxlen")
+
+_TOPICS = ["고유값 분해", "FastAPI 의존성 주입", "SQLite WAL 모드", "asyncio 세마포어", "Obsidian 플러그인",
+           "LoRA 파인튜닝", "Docker 멀티 스테이지 빌드", "정규표현식 역참조", "B-트리 인덱스", "벡터 검색"]
+_WORDS = ("그러면 이 경우에는 먼저 입력을 확인하고 다음 단계에서 결과를 비교합니다 왜냐하면 캐시가 "
+          "비어 있을 때 성능이 달라지기 때문입니다 the function returns early when the queue is empty "
+          "and the worker retries with exponential backoff 예를 들어 행렬 A 의 고유값이 모두 양수라면 "
+          "양의 정부호이고 따라서 촐레스키 분해가 가능합니다").split()
+_CODE = "```python\nasync def handler(req):\n    data = await req.json()\n    return {\"ok\": True, \"n\": len(data)}\n```"
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n)) + "."
+
+
+def _message(rng: random.Random, role: str, topic: str, chars: int) -> str:
+    if role == "user":
+        parts = [f"{topic} 관련해서 질문이 있어요.", _sentence(rng, rng.randint(6, 18))]
+    else:
+        parts = [f"## {topic}", _sentence(rng, 20), "- " + _sentence(rng, 8), "- " + _sentence(rng, 8)]
+        if rng.random() < 0.4:
+            parts.append(_CODE)
+    text = "\n".join(parts)
+    while len(text) < chars:
+        text += "\n" + _sentence(rng, rng.randint(8, 24))
+    return text[:chars]
+
+
+def synth(kind: str, i: int, seed: int = 0) -> List[Dict[str, str]]:
+    """
+    kind 종류의 i 번째 대화. (kind, i, seed) 가 같으면 같은 대화.
+    """
+    rng = random.Random(f"{seed}:{kind}:{i}")
+    topic = rng.choice(_TOPICS)
+    turns, chars = {"short": (4, (150, 500)), "long": (200, (200, 1200)), "maxlen": (40, (MAX_LEN, MAX_LEN))}[kind]
+    return [{"role": role, "content": _message(rng, role, topic, rng.randint(*chars))}
+            for role in ("user", "assistant") * (turns // 2)]
+
+
+def classify(conv: List[Dict[str, str]]) -> str:
+    if any(len(m["content"]) >= MAX_LEN for m in conv):
+        return "maxlen"
+    return "long" if len(conv) >= 50 else "short"
+
+
+def from_export(path: str) -> Iterator[Dict]:
+    # 확장과 같이 메시지를 MAX_LEN 에서 자름
+    from server.services.bulk_import import export_to_conversation, iter_json_array
+    for item in iter_json_array(path):
+        conv = [{"role": m["role"], "content": m["content"][:MAX_LEN]}
+                for m in export_to_conversation(item)["conversation"]]
+        if conv:
+            yield {"kind": classify(conv), "conversation": conv}
+
+
+def load(path: str | None, kinds=KINDS, per_kind: int = 8, seed: int = 0) -> Dict[str, List[List[Dict[str, str]]]]:
+    """
+    {kind: [대화, ...]}. path(JSONL) 가 있으면 그 기록을, 없으면 합성 코퍼스를 쓴다.
+    """
+    if not path:
+        return {k: [synth(k, i, seed) for i in range(per_kind)] for k in kinds}
+    out: Dict[str, List] = {k: [] for k in kinds}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            if row["kind"] in out and len(out[row["kind"]]) < per_kind:
+                out[row["kind"]].append(row["conversation"])
+    return {k: v for k, v in out.items() if v}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--export", default=None, help="ChatGPT conversations.json (없으면 합성)")
+    ap.add_argument("--per-kind", type=int, default=8)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    counts = dict.fromkeys(KINDS, 0)
+    with open(args.out, "w", encoding="utf-8") as f:
+        rows = from_export(args.export) if args.export else (
+            {"kind": k, "conversation": c} for k, convs in load(None, per_kind=args.per_kind, seed=args.seed).items()
+            for c in convs)
+        for row in rows:
+            if counts[row["kind"]] >= args.per_kind:
+                continue
+            counts[row["kind"]] += 1
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    print(f"{args.out}: {counts} ({Path(args.out).stat().st_size / 2 ** 20:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+관련 노트 벤치마크: 노트 N 개(무작위 dim 차원 벡터)를 인덱스에 넣고 related() top-k 지연 시간을 잰다.
+- build  : put_many 로 BATCH 개씩 넣는 시간 (임베딩 호출 제외, 파일 append + sqlite)
+- cold   : 새 프로세스처럼 인덱스를 다시 열고 첫 조회 (sqlite 읽기 + memmap)
+- related: 무작위 질의 --queries 번, p50/p95
+- cache  : 이미 넣은 벡터 키로 cached_many → 같은 내용 재저장 시 임베딩 호출을 건너뛰는 비율
+
+    python -m scripts.bench_embeddings --notes 100000 --dim 768
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from server.services.embeddings import EmbeddingIndex
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--notes", type=int, default=100_000)
+ap.add_argument("--dim", type=int, default=768)
+ap.add_argument("--k", type=int, default=5)
+ap.add_argument("--queries", type=int, default=200)
+ap.add_argument("--batch", type=int, default=5000, help="put_many 한 번에 넣는 노트 수")
+args = ap.parse_args()
+
+
+def pct(xs, q):
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(q * len(xs)))] * 1000, 2)
+
+
+def main() -> None:
+    root = tempfile.mkdtemp(prefix="gpt2note-bench-emb-")
+    rng = np.random.default_rng(0)
+    ix = EmbeddingIndex(root, "bench", "http://127.0.0.1:1")
+
+    t0 = time.perf_counter()
+    for start in range(0, args.notes, args.batch):
+        n = min(args.batch, args.notes - start)
+        vecs = rng.standard_normal((n, args.dim), dtype=np.float32)
+        ix.put_many([(f"/vault/P{i % 50}/note {i}.md", f"k{i}", vecs[j], f"P{i % 50}", f"note {i}", 0.0)
+                     for j, i in enumerate(range(start, start + n))])
+    build = time.perf_counter() - t0
+    ix.close()
+
+    ix = EmbeddingIndex(root, "bench", "http://127.0.0.1:1")
+    q = rng.standard_normal(args.dim, dtype=np.float32)
+    t0 = time.perf_counter()
+    ix.related(q, args.k)
+    cold = time.perf_counter() - t0
+
+    lat = []
+    for _ in range(args.queries):
+        q = rng.standard_normal(args.dim, dtype=np.float32)
+        t0 = time.perf_counter()
+        ix.related(q, args.k, exclude=["/vault/P0/note 0.md"])
+        lat.append(time.perf_counter() - t0)
+
+    keys = [f"k{i}" for i in rng.integers(0, args.notes, 1000)] + [f"new{i}" for i in range(1000)]
+    t0 = time.perf_counter()
+    hits = ix.cached_many(keys)
+    cache_ms = (time.perf_counter() - t0) * 1000
+
+    print({"notes": args.notes, "dim": args.dim, "build_s": round(build, 2),
+           "index_mb": round(args.notes * args.dim * 4 / 2 ** 20, 1),
+           "cold_first_query_ms": round(cold * 1000, 1),
+           "related_p50_ms": pct(lat, 0.5), "related_p95_ms": pct(lat, 0.95),
+           "related_mean_ms": round(statistics.mean(lat) * 1000, 2),
+           "cache_hit_rate": f"{len(hits) / len(keys):.0%} (half the keys are new)",
+           "cache_lookup_ms_per_2000": round(cache_ms, 1)})
+    ix.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+약점 힌트 사전 패스 마이크로 벤치마크: 10k 턴 대화 1개 / 짧은 대화 여러 개를 배치로.
+예전 구현(호출마다 정규식 컴파일 + 턴별 search, 이진 신호 2종)과 턴당 비용을 비교한다.
+
+    python -m scripts.bench_hints --turns 10000 --repeat 5
+"""
+import argparse
+import random
+import re
+import time
+
+from server.services.weakness_hints import build_weakness_hints, build_weakness_hints_batch
+
+QUESTIONS = [
+    "고유값이 무슨 뜻이야? 행렬에서 어떻게 구해?", "역전파에서 체인룰이 왜 필요한지 잘 모르겠어",
+    "asyncio 이벤트 루프가 스레드랑 뭐가 달라?", "그게 아니라 내 말은 공분산 행렬 얘기야",
+    "알겠어 이해했어 고마워", "다시 한 번 설명해 줄래? 아직도 헷갈려", "can you explain the proof again?",
+    "SQLite WAL 모드에서 읽기와 쓰기가 동시에 되는 이유", "예제 코드 하나만 보여줘", "오케이 다음으로 넘어가자",
+]
+
+
+def fake_conversation(turns: int, rng: random.Random):
+    conv = []
+    for i in range(turns):
+        if i % 2 == 0:
+            q = rng.choice(QUESTIONS)
+            if rng.random() < 0.3:
+                q += " " + " ".join(rng.choice(["그리고", "근데", "혹시", "정말", "음"]) for _ in range(rng.randint(1, 6)))
+            conv.append({"role": "user", "content": q})
+        else:
+            conv.append({"role": "assistant", "content": "설명: " + "행렬과 벡터 " * rng.randint(10, 60)})
+    return conv
+
+
+def legacy(conversation):
+    patt_confuse = re.compile(r"(다시|무슨 뜻|헷갈|모르겠|why|explain|proof|example)", re.I)
+    patt_ok = re.compile(r"(알겠|이해|오케이|clear|맞네)", re.I)
+    confuse_turns, ok_turns = [], []
+    for i, m in enumerate(conversation, start=1):
+        if m["role"] == "user":
+            t = m.get("content", "")
+            if patt_confuse.search(t): confuse_turns.append(i)
+            if patt_ok.search(t): ok_turns.append(i)
+    return {"confuse_turns": confuse_turns, "ok_turns": ok_turns}
+
+
+def bench(name, fn, turns, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{name:<28} {best * 1000:8.1f} ms  {best / turns * 1e6:6.2f} µs/turn")
+    return out
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    conv = fake_conversation(args.turns, rng)
+    bench("legacy (2 signals)", lambda: legacy(conv), args.turns, args.repeat)
+    out = bench("single conversation", lambda: build_weakness_hints(conv), args.turns, args.repeat)
+    print("  " + ", ".join(f"{k}={len(v)}" for k, v in out.items()))
+    convs = [fake_conversation(max(2, args.turns // args.batch), rng) for _ in range(args.batch)]
+    total = sum(len(c) for c in convs)
+    bench(f"batch ({args.batch} convs)", lambda: build_weakness_hints_batch(convs), total, args.repeat)
+    bench("per-conversation loop", lambda: [build_weakness_hints(c) for c in convs], total, args.repeat)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=10_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--batch", type=int, default=500, help="배치 경로: 대화 수 (각 --turns/--batch 턴)")
+    ap.add_argument("--seed", type=int, default=3)
+    main(ap.parse_args())
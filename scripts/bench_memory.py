@@ -0,0 +1,169 @@
+"""
+큰 대화 본문(기본 10MB, 4000자 메시지) 한 건을 처리할 때의 파이썬 할당 피크 (tracemalloc).
+변경 전 형태(legacy)와 지금 경로를 같은 단계 순서로 돌려 비교한다. 두 경로 모두 실제 파일을 쓴다.
+- ingest  : await request.json() → dict → 모델  vs  본문 바이트 → model_validate_json
+- save    : /api/conversation/save — 기본 노트 문자열 + frontmatter 이어 붙이기 + encode  vs  조각째로 파일에
+- fallback: save+analyze 에서 LLM 이 실패한 경우 — model_dump 두 번, 정규화 사본으로 해시/캐시 키,
+            원문 폴백 문자열, frontmatter 붙인 사본, encode, 응답 JSON 에 전체 본문  vs  같은 단계의 지금 구현
+(요청 본문 바이트 자체는 양쪽 모두 tracemalloc 시작 전에 만들어 두므로 피크에 들어가지 않음)
+
+    python -m scripts.bench_memory --mb 10
+"""
+import argparse
+import hashlib
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from scripts.bench_corpus import MAX_LEN, synth
+from server.routers.analyze import AnalyzeReq
+from server.routers.save_only import SaveReq
+from server.services.cache import make_cache_key
+from server.services.formatters import (inject_frontmatter, iter_basic_markdown, iter_raw_conversation, note_parts,
+                                        parts_head)
+from server.services.incremental import conversation_fingerprint
+from server.services.note_index import content_hash_of
+from server.services.weakness_hints import build_weakness_hints
+from server.utils.fs import write_tmp
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--mb", type=float, default=10.0, help="요청 본문 크기 (MB)")
+ap.add_argument("--preview", type=int, default=20000, help="RAW_NOTE_PREVIEW_CHARS")
+args = ap.parse_args()
+
+KEY_ARGS = dict(model="llama3.1:8b-instruct-q4_K_M", temperature=0.2, prompt_version="bench")
+
+
+def make_body(mb: float) -> bytes:
+    conv, i = [], 0
+    size = 0
+    while size < mb * 2 ** 20:
+        for m in synth("maxlen", i):
+            conv.append(m)
+            size += len(m["content"].encode("utf-8")) + 40
+        i += 1
+    return json.dumps({"project": "Bench", "source": "bench", "conversation": conv}, ensure_ascii=False).encode("utf-8")
+
+
+# --- 변경 전 형태 ---
+def _legacy_normalize(conversation):
+    return [[(m.get("role") or "user").strip().lower(), " ".join((m.get("content") or "").split())] for m in conversation]
+
+
+def _legacy_prefix_hash(conversation):
+    h = hashlib.sha256()
+    for role, content in _legacy_normalize(conversation):
+        h.update(role.encode("utf-8") + b"\x00" + content.encode("utf-8") + b"\x01")
+    return h.hexdigest()
+
+
+def _legacy_cache_key(conversation):
+    payload = {"conversation": _legacy_normalize(conversation), "model": KEY_ARGS["model"],
+               "temperature": KEY_ARGS["temperature"], "prompt_version": KEY_ARGS["prompt_version"], "extra": None}
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _legacy_basic_markdown(project, conversation):
+    md_conv = []
+    for msg in conversation:
+        role = msg.get("role", "")
+        content = (msg.get("content") or "").strip()
+        role_md = "👤 User" if role == "user" else ("🤖 Assistant" if role == "assistant" else "🛠 System")
+        md_conv.append(f"### {role_md}\n{content}\n")
+    conv_md = "\n---\n".join(md_conv)
+    return f"# 📝 Chat Conversation Report\n**프로젝트**: {project}\n\n## 💬 원본 대화 기록\n{conv_md}\n".strip()
+
+
+def _legacy_fallback_from_conv(conv):
+    parts = []
+    for m in conv:
+        who = "👤 User" if m.role == "user" else ("🤖 Assistant" if m.role == "assistant" else "🛠 System")
+        parts.append(f"### {who}\n{m.content}\n")
+    return "\n---\n".join(parts)
+
+
+def legacy_ingest(body, folder):
+    return AnalyzeReq(**json.loads(body))
+
+
+def legacy_save(body, folder):
+    req = SaveReq(**json.loads(body))
+    conv = [m.model_dump() for m in req.conversation]
+    md = _legacy_basic_markdown(req.project, conv)
+    fm = f"---\ntitle: Raw_Conversation\nproject: {req.project}\nturns: {len(conv)}\n---\n\n"
+    return write_tmp(folder, "legacy-save", (fm + md).encode("utf-8"), False)
+
+
+def legacy_fallback(body, folder):
+    req = AnalyzeReq(**json.loads(body))
+    conv = [m.model_dump() for m in req.conversation]          # save_and_analyze
+    fingerprint, content_hash = conversation_fingerprint(conv), _legacy_prefix_hash(conv)
+    conv2 = [m.model_dump() for m in req.conversation]         # analyze()
+    _legacy_cache_key(conv2)
+    build_weakness_hints(conv2)
+    md = _legacy_fallback_from_conv(req.conversation)          # LLM 실패 → 원문
+    md_ready = inject_frontmatter(md, "Conversation_Note", req.project, req.source, len(conv),
+                                  extra={"fingerprint": fingerprint, "content_hash": content_hash})
+    write_tmp(folder, "legacy-fallback", md_ready.encode("utf-8"), False)
+    return json.dumps({"meta": {"saved": True}, "markdown": md}, ensure_ascii=False).encode("utf-8")
+
+
+# --- 지금 경로 ---
+def current_ingest(body, folder):
+    return AnalyzeReq.model_validate_json(body)
+
+
+def current_save(body, folder):
+    req = SaveReq.model_validate_json(body)
+    conv = [m.model_dump() for m in req.conversation]
+    fm = f"---\ntitle: Raw_Conversation\nproject: {req.project}\nturns: {len(conv)}\n---\n\n"
+    return write_tmp(folder, "current-save", [fm, *iter_basic_markdown(req.project, conv)], False)
+
+
+def current_fallback(body, folder):
+    req = AnalyzeReq.model_validate_json(body)
+    conv = req.messages()
+    fingerprint, content_hash = conversation_fingerprint(conv), content_hash_of(conv)
+    make_cache_key(conv, **KEY_ARGS)
+    build_weakness_hints(conv)
+    parts = list(iter_raw_conversation(conv))
+    note = note_parts(parts, title="Conversation_Note", project=req.project, source=req.source, turns=len(conv),
+                      extra={"fingerprint": fingerprint, "content_hash": content_hash})
+    write_tmp(folder, "current-fallback", note, False)
+    return json.dumps({"meta": {"saved": True, "markdown_truncated": True},
+                       "markdown": parts_head(parts, args.preview)}, ensure_ascii=False).encode("utf-8")
+
+
+def measure(fn, body, folder):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn(body, folder)
+    dt = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del out
+    return peak / 2 ** 20, dt * 1000
+
+
+def main() -> None:
+    body = make_body(args.mb)
+    folder = Path(tempfile.mkdtemp(prefix="gpt2note-bench-memory-"))
+    n = len(json.loads(body)["conversation"])
+    print(f"[bench] body {len(body) / 2 ** 20:.1f} MB, {n} messages x {MAX_LEN} chars, {datetime.now():%H:%M:%S}")
+    for name, legacy, current in (("ingest", legacy_ingest, current_ingest), ("save", legacy_save, current_save),
+                                  ("fallback", legacy_fallback, current_fallback)):
+        lp, lt = measure(legacy, body, folder)
+        cp, ct = measure(current, body, folder)
+        print({"path": name, "legacy_peak_mb": round(lp, 1), "current_peak_mb": round(cp, 1),
+               "peak_x_body": f"{lp / (len(body) / 2 ** 20):.1f} -> {cp / (len(body) / 2 ** 20):.1f}",
+               "legacy_ms": round(lt), "current_ms": round(ct)})
+    same = [p for p in folder.iterdir() if p.name.startswith((".legacy-save", ".current-save"))]
+    print("save output identical:", len({p.read_bytes().split(b"\n## ", 1)[1] for p in same}) == 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+응답 파서 벤치마크: 이중 출력/구조화 출력 응답 코퍼스로 파싱 성공률과 속도를 잰다.
+- legacy : 예전 parse_dual_output (re.S 정규식 한 번, 실패하면 응답 전체를 코드 블록으로)
+- parse  : formatters.parse_output (괄호 짝 단일 패스 + 잘린 JSON 복구)
+- stream : formatters.DualStreamParser (무작위 크기 델타로 쪼개서 feed → finish)
+합성 코퍼스의 각 응답은 기대값(title, 마크다운 앞부분)을 갖고 있어 parse/stream 이 어긋나면 종료 코드 1.
+--corpus 폴더의 *.txt (실제 모델 응답 원문)는 기대값 없이 성공률만 센다.
+
+    python -m scripts.bench_parse --per-kind 200 --repeat 5
+    python -m scripts.bench_parse --corpus ~/.gpt2note/responses
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from server.services.formatters import DualStreamParser, parse_output
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--per-kind", type=int, default=200, help="종류별 합성 응답 수")
+ap.add_argument("--repeat", type=int, default=5, help="속도 측정 반복")
+ap.add_argument("--corpus", default="", help="실제 응답 원문 *.txt 폴더 (선택)")
+ap.add_argument("--seed", type=int, default=11)
+args = ap.parse_args()
+rng = random.Random(args.seed)
+
+MIN_MD = 80   # save_and_analyze 의 _too_short 기준
+
+
+def legacy_parse(text: str) -> tuple[dict, str]:
+    j, md = {}, ""
+    m = re.search(r"====JSON====\s*(\{.*?\})\s*====MARKDOWN====\s*(.*)\Z", text, flags=re.S)
+    if m:
+        try:
+            j = json.loads(m.group(1))
+        except Exception:
+            j = {}
+        md = m.group(2).strip()
+    else:
+        md = f"# 자동 노트(임시)\n\n```\n{text.strip()}\n```"
+    return j, md
+
+
+def stream_parse(text: str) -> tuple[dict, str]:
+    p = DualStreamParser()
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 12)
+        p.feed(text[i:i + n])
+        i += n
+    return p.finish()
+
+
+def fake_meta(i: int) -> dict:
+    return {
+        "title": f"고유값 분해 정리 {i}",
+        "tags": ["math", "linear-algebra"],
+        "takeaways": ["A = PDP^{-1} 꼴로 대각화", "대칭행렬은 직교 대각화 {Q^T A Q}"],
+        "weak_points": [{"concept": "중복 고유값", "evidence_turns": [3, 5], "why": "기하적 중복도 } 대수적 중복도",
+                         "remedy": "예제 {2x2, 3x3} 직접 계산"} for _ in range(rng.randint(1, 3))],
+        "open_questions": ["조르당 형식은?"], "actions": ["연습문제 5개"],
+        "glossary": [{"term": "고유공간", "explain": "E_λ = {v : Av = λv}"}],
+    }
+
+
+def fake_markdown(i: int) -> str:
+    return (f"# 고유값 분해 정리 {i}\n## 요약\n- 행렬 A 의 고유벡터로 기저를 바꾸면 대각행렬이 된다.\n"
+            "```python\nd = {k: v for k, v in pairs}\n```\n$$ A = P D P^{-1} $$\n"
+            "## 약점\n- 중복 고유값에서 대각화 가능 조건을 헷갈림 }\n")
+
+
+def dual(meta: dict, md: str, indent=None) -> str:
+    return f"====JSON====\n{json.dumps(meta, ensure_ascii=False, indent=indent)}\n====MARKDOWN====\n{md}"
+
+
+def cut_json(meta: dict) -> str:
+    # title 뒤 아무 데서나 잘린 JSON
+    s = json.dumps(meta, ensure_ascii=False)
+    lo = s.index('"tags"')
+    return s[:rng.randint(lo, len(s) - 2)]
+
+
+KINDS = {
+    "clean": lambda m, md: dual(m, md),
+    "pretty": lambda m, md: dual(m, md, indent=2),
+    "preamble": lambda m, md: "물론입니다! 아래는 노트입니다.\n\n" + dual(m, md),
+    "fenced_json": lambda m, md: f"====JSON====\n```json\n{json.dumps(m, ensure_ascii=False)}\n```\n====MARKDOWN====\n{md}",
+    "trailing_comma": lambda m, md: dual(m, md).replace("]}", "],}", 1),
+    "no_md_marker": lambda m, md: f"====JSON====\n{json.dumps(m, ensure_ascii=False)}\n\n{md}",
+    "truncated_md": lambda m, md: dual(m, md)[:-10],
+    "truncated_json": lambda m, md: f"====JSON====\n{cut_json(m)}",
+    "markdown_only": lambda m, md: md,
+    "structured": lambda m, md: json.dumps({"meta": m, "markdown": md}, ensure_ascii=False),
+    "structured_truncated": lambda m, md: json.dumps({"meta": m, "markdown": md}, ensure_ascii=False)[:-20],
+}
+# 잘린 JSON 은 마크다운이 없으니 meta 만 기대
+EXPECT_MD = {k: k != "truncated_json" for k in KINDS}
+EXPECT_META = {k: k != "markdown_only" for k in KINDS}
+
+
+def build_corpus() -> list:
+    out = []
+    for kind, make in KINDS.items():
+        for i in range(args.per_kind):
+            meta, md = fake_meta(i), fake_markdown(i)
+            out.append((kind, make(meta, md), meta["title"], md[:30]))
+    for p in sorted(Path(args.corpus).glob("*.txt")) if args.corpus else []:
+        out.append(("file", p.read_text(encoding="utf-8"), None, None))
+    return out
+
+
+def judge(kind, title, md_head, meta, md) -> bool:
+    if title is None:
+        # 실제 응답: meta 를 얻었고 저장 기준 길이를 넘는 마크다운이 있으면 성공
+        return bool(meta.get("title")) and len(md) >= MIN_MD
+    if EXPECT_META[kind] and meta.get("title") != title:
+        return False
+    if EXPECT_MD[kind] and not md.startswith(md_head):
+        return False
+    return True
+
+
+def main() -> None:
+    corpus = build_corpus()
+    parsers = {"legacy": legacy_parse, "parse": lambda t: parse_output(t)[:2], "stream": stream_parse}
+    kinds = list(dict.fromkeys(k for k, *_ in corpus))
+    table = {name: {k: [0, 0] for k in kinds} for name in parsers}
+    timing = {}
+    for name, fn in parsers.items():
+        for kind, text, title, md_head in corpus:
+            meta, md = fn(text)
+            cell = table[name][kind]
+            cell[0] += judge(kind, title, md_head, meta, md)
+            cell[1] += 1
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for _, text, _, _ in corpus:
+                fn(text)
+        timing[name] = (time.perf_counter() - t0) / (args.repeat * len(corpus)) * 1e6
+
+    print(f"{'kind':<22}" + "".join(f"{n:>10}" for n in parsers))
+    for k in kinds:
+        print(f"{k:<22}" + "".join(f"{table[n][k][0] / table[n][k][1]:>10.0%}" for n in parsers))
+    total = {n: sum(c[0] for c in table[n].values()) / len(corpus) for n in parsers}
+    print(f"{'ALL':<22}" + "".join(f"{total[n]:>10.1%}" for n in parsers))
+    print(f"{'us/response':<22}" + "".join(f"{timing[n]:>10.1f}" for n in parsers))
+
+    bad = [(n, k) for n in ("parse", "stream") for k in kinds if k != "file" and table[n][k][0] != table[n][k][1]]
+    if bad:
+        print("[bench_parse] mismatches:", bad)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+노트 검색 벤치마크: 합성 볼트(기본 10만 노트)를 역색인에 넣고 질의 지연을 잰다.
+파일을 실제로 만들지 않고 note_fields 와 같은 모양의 필드를 직접 색인한다 (--files 로 실제 파일 + scan 경로).
+
+    python -m scripts.bench_search --notes 100000 --queries 300
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--notes", type=int, default=100_000)
+ap.add_argument("--queries", type=int, default=300)
+ap.add_argument("--body-words", type=int, default=120)
+ap.add_argument("--files", action="store_true", help="실제 .md 파일을 쓰고 scan() 으로 색인")
+ap.add_argument("--seed", type=int, default=7)
+args = ap.parse_args()
+
+_tmp = tempfile.mkdtemp(prefix="gpt2note-bench-search-")
+os.environ["SEARCH_INDEX_DB"] = os.path.join(_tmp, "search.sqlite3")
+
+from server.services.search import SearchIndex  # noqa: E402
+
+rng = random.Random(args.seed)
+KO = ("선형대수 고유값 행렬 벡터 미분 적분 확률 통계 알고리즘 자료구조 그래프 트리 정렬 탐색 동적계획법 재귀 "
+      "네트워크 운영체제 프로세스 스레드 메모리 캐시 데이터베이스 인덱스 트랜잭션 컴파일러 파서 문법 의미 "
+      "신경망 역전파 경사하강법 정규화 과적합 손실함수 임베딩 어텐션 토큰 요약 질문 개념 예제 증명 정리").split()
+EN = ("python asyncio fastapi sqlite numpy pandas torch docker kubernetes http tcp rust golang java "
+      "react typescript regex unicode json yaml bm25 tfidf hash lru btree heap queue").split()
+FILLER = "그리고 그래서 하지만 이것은 다음과 같이 예를 들어 정말 아마 다시 설명해 주세요".split()
+VOCAB = KO + EN
+PROJECTS = [f"proj{i}" for i in range(20)]
+
+
+def fake_note(i: int) -> dict:
+    # 주제 단어는 Zipf 비슷하게 (앞쪽 단어가 흔함), 나머지는 흔한 잡어
+    topic = [VOCAB[min(int(rng.paretovariate(1.2)) - 1, len(VOCAB) - 1)] for _ in range(args.body_words // 4)]
+    body = topic + rng.choices(FILLER, k=args.body_words - len(topic))
+    rng.shuffle(body)
+    return {
+        "title": " ".join(rng.sample(VOCAB, 3)) + f" {i}",
+        "project": rng.choice(PROJECTS),
+        "tags": rng.sample(EN, 2),
+        "weak_points": rng.sample(KO, 2),
+        "glossary": rng.sample(VOCAB, 3),
+        "body": " ".join(body),
+    }
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p))]
+
+
+def main():
+    idx = SearchIndex(os.environ["SEARCH_INDEX_DB"])
+    t0 = time.perf_counter()
+    if args.files:
+        root = os.path.join(_tmp, "vault")
+        for i in range(args.notes):
+            n = fake_note(i)
+            folder = os.path.join(root, n["project"])
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f"note_{i}.md"), "w", encoding="utf-8") as f:
+                f.write(f"---\ntitle: {n['title']}\nproject: {n['project']}\ntags: [{', '.join(n['tags'])}]\n---\n{n['body']}\n")
+        t_write = time.perf_counter() - t0
+        print(f"wrote {args.notes} files in {t_write:.1f}s")
+        t0 = time.perf_counter()
+        print(idx.scan(root))
+    else:
+        batch = []
+        for i in range(args.notes):
+            batch.append((f"/vault/note_{i}.md", fake_note(i), 0.0, 0))
+            if len(batch) >= 1000:
+                idx.index_many(batch)
+                batch = []
+        if batch:
+            idx.index_many(batch)
+    t_index = time.perf_counter() - t0
+    db_mb = os.path.getsize(os.environ["SEARCH_INDEX_DB"]) / 1e6
+    print(f"indexed {args.notes} notes in {t_index:.1f}s ({args.notes / t_index:.0f} notes/s), db={db_mb:.0f} MB, {idx.stats()['terms']} terms")
+
+    # 재색인 1건 (저장 직후 갱신 경로)
+    t0 = time.perf_counter()
+    for i in range(100):
+        idx.index_document(f"/vault/note_{i}.md", fake_note(i))
+    print(f"incremental re-index: {(time.perf_counter() - t0) * 10:.2f} ms/note")
+
+    queries = []
+    for _ in range(args.queries):
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append((rng.choice(KO), None))
+        elif kind < 0.7:
+            queries.append((" ".join(rng.sample(VOCAB, 2)), None))
+        elif kind < 0.9:
+            queries.append((rng.choice(KO)[:2], None))  # 부분 단어
+        else:
+            queries.append((rng.choice(VOCAB), rng.choice(PROJECTS)))
+    lat = []
+    for q, project in queries:
+        t0 = time.perf_counter()
+        idx.search(q, project=project, limit=20)
+        lat.append((time.perf_counter() - t0) * 1000)
+    print(f"{len(lat)} queries: p50={pct(lat, 0.5):.1f} ms p95={pct(lat, 0.95):.1f} ms "
+          f"p99={pct(lat, 0.99):.1f} ms mean={statistics.mean(lat):.1f} ms")
+    idx.close()
+
+
+if __name__ == "__main__":
+    main()
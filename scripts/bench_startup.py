@@ -0,0 +1,128 @@
+"""
+기동 시간 벤치마크: 새 프로세스로 서버를 띄워 첫 /health 응답까지 걸린 시간을 재고 JSONL 로 누적 기록한다.
+- import   : python -c "import server.app" 만 (모듈 로드)
+- health   : uvicorn 프로세스 시작 → /health 200 까지 (실제로 개발자가 기다리는 시간)
+- startup  : 서버가 /health 로 보고한 구간 (import / create_app / lifespan)
+기록마다 git 커밋을 남기고 직전 기록과 비교해 출력 → 커밋별 추세 확인.
+볼트/DB 는 기본적으로 빈 임시 폴더 (실제 볼트 스캔 시간이 섞이지 않게, --real-vault 로 끔).
+
+    python -m scripts.bench_startup --runs 5
+    python -m scripts.bench_startup --out bench/startup.jsonl
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--runs", type=int, default=5)
+ap.add_argument("--out", default=str(Path.home() / ".gpt2note" / "bench" / "startup.jsonl"))
+ap.add_argument("--timeout", type=float, default=30.0)
+ap.add_argument("--real-vault", action="store_true", help="임시 폴더 대신 현재 환경 설정(.env) 그대로")
+ap.add_argument("--note", default="", help="기록에 남길 메모")
+args = ap.parse_args()
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _env(tmp: str) -> dict:
+    env = dict(os.environ)
+    if not args.real_vault:
+        env.update(OBSIDIAN_VAULT_DIR=f"{tmp}/vault", INCREMENTAL_STATE_DIR=f"{tmp}/state",
+                   ANALYSIS_CACHE_DIR=f"{tmp}/cache", JOBS_DB_PATH=f"{tmp}/jobs.sqlite3",
+                   NOTE_INDEX_DB=f"{tmp}/notes.sqlite3", SEARCH_INDEX_DB=f"{tmp}/search.sqlite3",
+                   IMPORT_CHECKPOINT_DIR=f"{tmp}/imports")
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import server.app; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_health(env: dict) -> tuple:
+    port = _free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "server.app:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if time.perf_counter() - t0 > args.timeout:
+                raise TimeoutError(f"/health not ready in {args.timeout}s")
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as r:
+                    body = json.loads(r.read())
+                return time.perf_counter() - t0, body.get("startup") or {}
+            except OSError:
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main() -> None:
+    tmp = tempfile.mkdtemp(prefix="gpt2note-bench-startup-")
+    env = _env(tmp)
+    measure_import(env)  # 첫 실행은 .pyc 생성 분이 섞이므로 버림
+    imports = [measure_import(env) for _ in range(args.runs)]
+    health, phases = [], []
+    for _ in range(args.runs):
+        dt, startup = measure_health(env)
+        health.append(dt)
+        phases.append(startup)
+
+    rec = {
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "git": _git_rev(),
+        "python": platform.python_version(), "platform": platform.platform(terse=True), "runs": args.runs,
+        "import_s": round(statistics.median(imports), 4),
+        "first_health_s": round(statistics.median(health), 4), "first_health_min_s": round(min(health), 4),
+        "server_phases_s": {k: round(statistics.median(p.get(k, 0.0) for p in phases), 4)
+                            for k in (phases[0] if phases else {})},
+        "note": args.note,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    prev = None
+    if out.exists():
+        lines = [ln for ln in out.read_text(encoding="utf-8").splitlines() if ln.strip()]
+        prev = json.loads(lines[-1]) if lines else None
+    with out.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    print(json.dumps(rec, ensure_ascii=False, indent=2))
+    if prev:
+        for k in ("import_s", "first_health_s"):
+            print(f"{k}: {prev[k]:.3f}s ({prev.get('git')}) → {rec[k]:.3f}s ({rec['git']})  "
+                  f"{(rec[k] - prev[k]) / prev[k] * 100:+.1f}%")
+    print(f"[bench] appended to {out}")
+
+
+if __name__ == "__main__":
+    main()
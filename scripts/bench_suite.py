@@ -0,0 +1,188 @@
+"""
+오프라인 벤치마크 스위트: 가짜 LLM(scripts/stub_llm.py) + 대화 코퍼스(scripts/bench_corpus.py)로
+실제 서버 프로세스(uvicorn)의 주요 경로를 고정 동시성(closed loop)으로 두드린다. Ollama 불필요.
+- 시나리오: analyze (/api/conversation/analyze), save+analyze, save (/api/conversation/save)
+- 코퍼스 종류: short / long(200턴) / maxlen(4000자 메시지)
+- 보고: 시나리오 x 종류마다 p50/p95/p99 지연, 처리량(req/s), 상태별 건수, 서버 RSS(측정 중 최대 / 끝)
+- 가짜 LLM: --latency(첫 토큰) --tokens-per-s(생성 속도) --fail-rate/--hang-rate/--malformed-rate(실패 주입)
+요청마다 첫 메시지에 번호를 붙여 캐시/중복 감지/증분 분석을 타지 않게 한다. 결과 비교는 --json 으로 저장해서.
+
+    python -m scripts.bench_suite --concurrency 8 --requests 32
+    python -m scripts.bench_suite --scenarios analyze --kinds maxlen --fail-rate 0.1 --json before.json
+    python -m scripts.bench_suite --corpus corpus.jsonl --env LLM_STRUCTURED_OUTPUT=false
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from scripts.bench_corpus import KINDS, load
+from scripts.stub_llm import serve_in_thread
+
+SCENARIOS = {"analyze": "/api/conversation/analyze", "save+analyze": "/api/conversation/save+analyze",
+             "save": "/api/conversation/save"}
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+ap.add_argument("--kinds", default=",".join(KINDS))
+ap.add_argument("--concurrency", type=int, default=8, help="동시에 진행 중인 요청 수 (고정)")
+ap.add_argument("--requests", type=int, default=32, help="시나리오 x 종류마다 보낼 요청 수")
+ap.add_argument("--corpus", default=None, help="bench_corpus 로 만든 JSONL (없으면 합성)")
+ap.add_argument("--latency", type=float, default=0.5)
+ap.add_argument("--tokens-per-s", type=float, default=40.0)
+ap.add_argument("--fail-rate", type=float, default=0.0)
+ap.add_argument("--hang-rate", type=float, default=0.0)
+ap.add_argument("--malformed-rate", type=float, default=0.0)
+ap.add_argument("--client-timeout", type=float, default=300.0)
+ap.add_argument("--env", action="append", default=[], help="서버 환경 변수 KEY=VALUE (여러 번)")
+ap.add_argument("--json", default=None, help="결과를 JSON 파일로 저장")
+args = ap.parse_args()
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    # Linux 는 /proc, 그 밖은 psutil 이 있으면
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 2 ** 20
+    except Exception:
+        return None
+
+
+def _env(tmp: str, stub_port: int) -> dict:
+    env = dict(os.environ)
+    env.update(OBSIDIAN_VAULT_DIR=f"{tmp}/vault", INCREMENTAL_STATE_DIR=f"{tmp}/state",
+               ANALYSIS_CACHE_DIR=f"{tmp}/cache", JOBS_DB_PATH=f"{tmp}/jobs.sqlite3",
+               NOTE_INDEX_DB=f"{tmp}/notes.sqlite3", SEARCH_INDEX_DB=f"{tmp}/search.sqlite3",
+               EMBEDDING_DIR=f"{tmp}/embeddings", IMPORT_CHECKPOINT_DIR=f"{tmp}/imports",
+               ANALYSIS_CACHE_ENABLED="false", NOTE_DEDUP="false", RATE_LIMIT_PER_MIN="0",
+               ADMISSION_CLIENT_TIMEOUT=str(args.client_timeout),
+               USE_LOCAL_LLM="true", LOCAL_LLM_BASE_URL=f"http://127.0.0.1:{stub_port}/v1")
+    for kv in args.env:
+        k, _, v = kv.partition("=")
+        env[k] = v
+    return env
+
+
+def _body(kind: str, conv: List[Dict[str, str]], i: int) -> dict:
+    # 첫 메시지만 바꿔서 매번 새 대화로 (나머지 메시지 객체는 공유 → 클라이언트 메모리는 코퍼스 크기 그대로)
+    first = dict(conv[0], content=f"[bench {kind} #{i}] {conv[0]['content']}")
+    return {"project": f"Bench-{kind}", "source": "bench", "conversation": [first] + conv[1:]}
+
+
+def pct(xs: List[float], q: float) -> Optional[float]:
+    if not xs:
+        return None
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(q * len(xs)))] * 1000, 1)
+
+
+async def run_one(c: httpx.AsyncClient, pid: int, scenario: str, kind: str, convs: List) -> dict:
+    bodies = [json.dumps(_body(kind, convs[i % len(convs)], i), ensure_ascii=False).encode("utf-8")
+              for i in range(args.requests)]
+    lat: List[float] = []
+    status: Dict[str, int] = {}
+    peak = [rss_mb(pid) or 0.0]
+    nxt = iter(range(args.requests))
+    done = asyncio.Event()
+
+    async def sample() -> None:
+        while not done.is_set():
+            peak[0] = max(peak[0], rss_mb(pid) or 0.0)
+            await asyncio.sleep(0.05)
+
+    async def worker() -> None:
+        for i in nxt:
+            t0 = time.perf_counter()
+            try:
+                r = await c.post(SCENARIOS[scenario], content=bodies[i], headers={"Content-Type": "application/json"})
+                key = str(r.status_code)
+                if r.status_code == 200 and scenario != "save" and r.json().get("meta", {}).get("degraded"):
+                    key = "200-degraded"
+            except httpx.TimeoutException:
+                key = "timeout"
+            except httpx.TransportError as e:
+                key = type(e).__name__
+            status[key] = status.get(key, 0) + 1
+            if key.startswith("200"):
+                lat.append(time.perf_counter() - t0)
+
+    sampler = asyncio.create_task(sample())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - t0
+    done.set()
+    await sampler
+    end = rss_mb(pid)
+    return {"scenario": scenario, "kind": kind, "requests": args.requests, **dict(sorted(status.items())),
+            "p50_ms": pct(lat, 0.5), "p95_ms": pct(lat, 0.95), "p99_ms": pct(lat, 0.99),
+            "throughput_rps": round(len(lat) / wall, 2), "body_kb": round(sum(map(len, bodies)) / len(bodies) / 1024, 1),
+            "rss_peak_mb": round(peak[0], 1) if peak[0] else None, "rss_end_mb": round(end, 1) if end else None}
+
+
+async def main() -> None:
+    stub_port = _free_port()
+    serve_in_thread(stub_port, args.latency, tokens_per_s=args.tokens_per_s, decode=True, fail_rate=args.fail_rate,
+                    hang_rate=args.hang_rate, malformed_rate=args.malformed_rate)
+    corpus = load(args.corpus, kinds=args.kinds.split(","))
+    tmp = tempfile.mkdtemp(prefix="gpt2note-bench-suite-")
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "server.app:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=ROOT, env=_env(tmp, stub_port),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    rows = []
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.client_timeout,
+                                     limits=httpx.Limits(max_connections=args.concurrency * 2)) as c:
+            for _ in range(400):
+                try:
+                    if (await c.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+            idle = rss_mb(proc.pid)
+            print(f"[bench] server pid {proc.pid}, idle RSS {idle and round(idle, 1)} MB, stub latency {args.latency}s "
+                  f"@ {args.tokens_per_s} tok/s, concurrency {args.concurrency}, {args.requests} req per cell")
+            for scenario in args.scenarios.split(","):
+                for kind, convs in corpus.items():
+                    row = await run_one(c, proc.pid, scenario.strip(), kind, convs)
+                    rows.append(row)
+                    print(row)
+            stub = (await c.get(f"http://127.0.0.1:{stub_port}/stub/stats")).json()
+    finally:
+        proc.kill()
+        proc.wait()
+    print("[stub]", stub)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "python": sys.version.split()[0], "platform": platform.platform(),
+                       "idle_rss_mb": idle, "stub": stub, "results": rows}, f, ensure_ascii=False, indent=1)
+        print("saved", args.json)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+볼트 쓰기 벤치마크: 파일이 많은 프로젝트 폴더에 동시 요청이 노트를 만들 때의 초당 쓰기 수.
+비교 대상
+  legacy  : 예전 방식 (요청마다 to_thread(write_text), 원자성/fsync 없음)
+  always  : vault_writer, 쓰기마다 파일+디렉터리 fsync
+  group   : vault_writer, 배치 단위로 fsync (기본값)
+  none    : vault_writer, fsync 없음 (원자적 rename 만)
+--vaults N 이면 쓰기를 볼트 N 개에 나눠 보냄 (볼트마다 writer 하나 — services/vaults 와 같은 구성)
+
+    python -m scripts.bench_vault_writer --existing 20000 --writes 2000 --concurrency 32
+    python -m scripts.bench_vault_writer --modes always --vaults 4
+    python -m scripts.bench_vault_writer --dir /mnt/c/Vault/bench   # 실제 볼트가 있는 디스크에서
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--dir", default="", help="벤치 폴더 (기본: 임시 폴더, 끝나면 삭제)")
+ap.add_argument("--existing", type=int, default=20_000, help="미리 만들어 둘 노트 수")
+ap.add_argument("--writes", type=int, default=2_000)
+ap.add_argument("--concurrency", type=int, default=32)
+ap.add_argument("--size", type=int, default=6_000, help="노트 하나의 바이트 수")
+ap.add_argument("--modes", default="legacy,always,group,none")
+ap.add_argument("--vaults", type=int, default=1, help="볼트 수 (볼트별 writer 가 병렬로)")
+args = ap.parse_args()
+
+from server.services.vault_writer import VaultWriter  # noqa: E402
+from server.utils.fs import ensure_dir, note_stem, slugify  # noqa: E402
+
+BODY = ("# 노트\n" + "선형대수 고유값 분해 예제와 증명 " * (args.size // 40))[:args.size // 2]
+
+
+def prepopulate(folder: Path, n: int) -> None:
+    ensure_dir(folder)
+    have = sum(1 for _ in os.scandir(folder))
+    for i in range(have, n):
+        (folder / f"20240101_000000_existing-{i}.md").write_text(BODY, encoding="utf-8")
+
+
+def legacy_write(folder: Path, title: str, content: str) -> str:
+    # 예전 utils/fs.write_markdown 과 같은 동작
+    p = folder / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{slugify(title)}.md"
+    p.write_text(content, encoding="utf-8")
+    return str(p)
+
+
+async def run(mode: str, folders: list) -> dict:
+    writers = None if mode == "legacy" else [VaultWriter(mode) for _ in folders]
+    sem = asyncio.Semaphore(args.concurrency)
+    paths = []
+
+    async def one(i: int) -> None:
+        async with sem:
+            title = f"bench {mode} {i % 50}"   # 같은 초에 같은 제목이 겹치게
+            folder = folders[i % len(folders)]
+            if writers is None:
+                paths.append(await asyncio.to_thread(legacy_write, folder, title, BODY))
+            else:
+                paths.append(await writers[i % len(folders)].create(folder, note_stem(title), BODY))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.writes)))
+    if writers is not None:
+        await asyncio.gather(*(w.stop() for w in writers))
+    dt = time.perf_counter() - t0
+    out = {"mode": mode, "vaults": len(folders), "writes_per_s": round(args.writes / dt, 1), "seconds": round(dt, 2),
+           "files_written": len(set(paths))}
+    if writers is not None:
+        out["avg_batch"] = round(sum(w.writes for w in writers) / max(1, sum(w.batches for w in writers)), 1)
+    return out
+
+
+def main() -> None:
+    root = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="gpt2note-bench-vault-"))
+    folders = [root / "Bench"] if args.vaults <= 1 else [root / f"vault{i}" / "Bench" for i in range(args.vaults)]
+    try:
+        t0 = time.perf_counter()
+        for folder in folders:
+            prepopulate(folder, args.existing)
+        print(f"[bench] {root}: {len(folders)} x {args.existing} existing notes ({time.perf_counter() - t0:.1f}s)")
+        for mode in args.modes.split(","):
+            res = asyncio.run(run(mode.strip(), folders))
+            # 덮어쓴 파일은 files_written < writes 로 드러남 (legacy 는 같은 초·같은 제목이면 덮어씀)
+            print(res)
+            for folder in folders:
+                for p in folder.glob("*_bench *.md"):
+                    p.unlink()
+    finally:
+        if not args.dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
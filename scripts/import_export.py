@@ -0,0 +1,53 @@
+"""
+ChatGPT 데이터 내보내기(conversations.json) → Obsidian 노트 일괄 생성.
+서버 없이 같은 분석/저장 경로(save+analyze)를 직접 호출한다.
+
+    python -m scripts.import_export path/to/conversations.json --project "ChatGPT Archive" --concurrency 2
+    python -m scripts.import_export conversations.json --project Work --vault work   # VAULTS 의 볼트 이름
+
+중단 후 같은 명령을 다시 실행하면 체크포인트(--checkpoint, 기본: IMPORT_CHECKPOINT_DIR)에 기록된 대화는 건너뛴다.
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from server import client_factory
+from server.config import settings
+from server.routers.bulk_import import make_saver, checkpoint_path, file_key
+from server.services.bulk_import import Checkpoint, iter_json_array, run_import
+from server.services.vaults import vault_registry
+
+
+async def main(args) -> None:
+    src = Path(args.export)
+    print(f"target: {vault_registry.project_folder(args.project, args.vault)}")   # 잘못된 볼트/프로젝트면 여기서 중단
+    ckpt = Checkpoint(args.checkpoint or checkpoint_path(file_key(src)))
+    if ckpt.done:
+        print(f"resuming: {len(ckpt.done)} conversation(s) already done ({ckpt.path})")
+    await client_factory.startup()
+    try:
+        stats = await run_import(
+            iter_json_array(src), make_saver(args.project, args.source, args.vault),
+            concurrency=args.concurrency, checkpoint=ckpt,
+            report=lambda s: print(json.dumps(s, ensure_ascii=False)),
+            report_every_s=args.report_every,
+        )
+    finally:
+        await vault_registry.stop()
+        await client_factory.shutdown()
+    snap = stats.snapshot()
+    print(f"done={snap['done']} skipped={snap['skipped']} failed={snap['failed']} "
+          f"{snap['conversations_per_min']} conv/min {snap['tokens_in_per_s']} tok/s in")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("export", help="conversations.json")
+    ap.add_argument("--project", default="ChatGPT Archive")
+    ap.add_argument("--source", default="chatgpt-export")
+    ap.add_argument("--vault", default=None, help="볼트 이름 (기본: PROJECT_VAULTS → VAULT_DEFAULT)")
+    ap.add_argument("--concurrency", type=int, default=settings.IMPORT_CONCURRENCY)
+    ap.add_argument("--checkpoint", default=None)
+    ap.add_argument("--report-every", type=float, default=10.0)
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,170 @@
+"""
+로컬 벤치마크용 가짜 LLM 서버 (OpenAI 호환 /v1/chat/completions, /v1/embeddings + Ollama /api/chat, /api/embed).
+실제 Ollama 없이 지연만 흉내 낸다. 임베딩은 단어 해시 bag-of-words (겹치는 단어가 많을수록 코사인이 큼).
+- latency      : 첫 토큰까지 시간 (프롬프트 처리)
+- tokens_per_s : 생성 속도. 스트림은 조각마다, 비스트림은 decode=True 일 때 응답 길이만큼 더 기다림
+- 실패 모드(요청별 확률): fail_rate → 500, hang_rate → 응답 없이 대기(클라이언트 타임아웃), malformed_rate → 구분자 없는 텍스트
+- GET /stub/stats: 받은 요청/주입한 실패 수
+
+    python -m scripts.stub_llm --port 11500 --latency 1.0 --tokens-per-s 30 --decode --fail-rate 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STUB_META = {"title": "Stub Note", "tags": ["stub"], "takeaways": ["stub"], "weak_points": [], "open_questions": [],
+             "actions": [], "glossary": []}
+STUB_MARKDOWN = """# Stub Note
+## 요약
+- 벤치마크용 가짜 응답입니다. 실제 모델 출력과 비슷한 길이를 맞추기 위해 문장을 조금 채워 넣습니다.
+- 두 번째 줄: 저장 경로와 프런트매터 주입까지 그대로 타도록 80자 이상을 유지합니다.
+"""
+STUB_REPLY = f"====JSON====\n{json.dumps(STUB_META, ensure_ascii=False)}\n====MARKDOWN====\n{STUB_MARKDOWN}"
+# 구조화 출력 요청(response_format / format=json)이면 JSON 객체 하나
+STUB_JSON_REPLY = json.dumps({"meta": STUB_META, "markdown": STUB_MARKDOWN}, ensure_ascii=False)
+# malformed 모드: 작은 모델이 형식을 안 지킨 것처럼 (서버는 폴백 파서/기본 노트로 가야 함)
+STUB_MALFORMED_REPLY = "네, 정리해 드릴게요.\n제목: Stub Note\n- 요약 한 줄\n```json\n{\"title\": \"Stub\", \"tags\": [\n"
+HANG_S = 3600.0
+
+
+def _pieces(text: str) -> list[str]:
+    # 대충 토큰 크기로 쪼갬 (단어 + 뒤 공백)
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+EMBED_DIM = 256
+
+
+def stub_embedding(text: str) -> list[float]:
+    v = [0.0] * EMBED_DIM
+    for w in re.findall(r"\w+", text.lower()):
+        h = int.from_bytes(hashlib.blake2b(w.encode("utf-8"), digest_size=4).digest(), "little")
+        v[h % EMBED_DIM] += 1.0 if h & 1 << 31 else -1.0
+    return v
+
+
+def _inputs(body: dict) -> list[str]:
+    x = body.get("input", body.get("prompt", ""))
+    return [x] if isinstance(x, str) else list(x)
+
+
+def make_app(latency: float = 1.0, tokens_per_s: float = 50.0, decode: bool = False, fail_rate: float = 0.0,
+             hang_rate: float = 0.0, malformed_rate: float = 0.0, seed: int | None = 0) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+    counts = {"requests": 0, "failed": 0, "hung": 0, "malformed": 0}
+
+    def _outcome() -> str:
+        counts["requests"] += 1
+        x = rng.random()
+        for mode, rate in (("failed", fail_rate), ("hung", hang_rate), ("malformed", malformed_rate)):
+            if x < rate:
+                counts[mode] += 1
+                return mode
+            x -= rate
+        return "ok"
+
+    def _reply(outcome: str, structured: bool) -> str:
+        if outcome == "malformed":
+            return STUB_MALFORMED_REPLY
+        return STUB_JSON_REPLY if structured else STUB_REPLY
+
+    async def _generate(reply: str) -> None:
+        # 비스트림: 첫 토큰 지연 + (decode 면) 생성 시간
+        await asyncio.sleep(latency + (len(_pieces(reply)) / tokens_per_s if decode and tokens_per_s > 0 else 0.0))
+
+    def _error() -> JSONResponse:
+        return JSONResponse({"error": {"message": "stub: injected failure", "type": "server_error"}}, status_code=500)
+
+    async def _sse(model: str, reply: str):
+        # latency = 첫 토큰까지 시간, 이후 tokens_per_s 속도로 델타 전송
+        await asyncio.sleep(latency)
+        for piece in _pieces(reply):
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                     "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(1.0 / tokens_per_s)
+        yield "data: [DONE]\n\n"
+
+    @app.get("/stub/stats")
+    async def stats():
+        return counts
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: dict):
+        outcome = _outcome()
+        if outcome == "failed":
+            await asyncio.sleep(latency)
+            return _error()
+        if outcome == "hung":
+            await asyncio.sleep(HANG_S)
+        reply = _reply(outcome, bool(body.get("response_format")))
+        if body.get("stream"):
+            return StreamingResponse(_sse(body.get("model", "stub"), reply), media_type="text/event-stream")
+        await _generate(reply)
+        return {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": reply}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(_pieces(reply)), "total_tokens": 0},
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(body: dict):
+        return {"object": "list", "model": body.get("model", "stub"),
+                "data": [{"object": "embedding", "index": i, "embedding": stub_embedding(t)}
+                         for i, t in enumerate(_inputs(body))]}
+
+    @app.post("/api/embed")
+    async def ollama_embed(body: dict):
+        return {"model": body.get("model", "stub"), "embeddings": [stub_embedding(t) for t in _inputs(body)]}
+
+    @app.post("/api/chat")
+    async def ollama_chat(body: dict):
+        outcome = _outcome()
+        if outcome == "failed":
+            await asyncio.sleep(latency)
+            return JSONResponse({"error": "stub: injected failure"}, status_code=500)
+        if outcome == "hung":
+            await asyncio.sleep(HANG_S)
+        reply = _reply(outcome, bool(body.get("format")))
+        await _generate(reply)
+        return {"model": body.get("model", "stub"), "done": True, "message": {"role": "assistant", "content": reply}}
+
+    return app
+
+
+def serve_in_thread(port: int, latency: float = 1.0, **kw) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(make_app(latency, **kw), host="127.0.0.1", port=port,
+                                           log_level="warning", backlog=4096))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=11500)
+    ap.add_argument("--latency", type=float, default=1.0)
+    ap.add_argument("--tokens-per-s", type=float, default=50.0)
+    ap.add_argument("--decode", action="store_true", help="비스트림 응답도 생성 시간만큼 기다림")
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--hang-rate", type=float, default=0.0)
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    uvicorn.run(make_app(args.latency, args.tokens_per_s, args.decode, args.fail_rate, args.hang_rate,
+                         args.malformed_rate, args.seed), host="127.0.0.1", port=args.port, log_level="warning")
@@ -1,30 +1,183 @@
-from typing import List, Dict
-from openai import OpenAI
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Tuple
+from urllib.parse import urlsplit
+
 from .config import settings
+from .services.backends import backend_registry, served_model
+from .services.metrics import LLM_ATTEMPT_SECONDS, record_stage, record_tokens
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+# 앱 수명 동안 공유하는 LLM 클라이언트 풀
+# - httpx 커넥션 풀(keep-alive) 하나를 공유 → 요청마다 TCP/클라이언트 생성 비용 제거
+# - 백엔드(host:port)별 동시 요청 상한 → 저장 버스트가 로컬 모델 서버를 덮치지 않게
+# - httpx/openai 는 첫 LLM 호출 때 import + 생성 (저장만 쓰는 기동에서는 아예 안 올림)
+# startup()/shutdown() 은 FastAPI 수명 이벤트에서 호출.
+
+_http: httpx.AsyncClient | None = None
+_async_client: AsyncOpenAI | None = None
+_async_limits: Dict[str, asyncio.Semaphore] = {}
+
+def _limits() -> httpx.Limits:
+    import httpx
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+    )
+
+def _timeout() -> httpx.Timeout:
+    import httpx
+    return httpx.Timeout(settings.LLM_TIMEOUT, connect=10.0)
+
+def _openai_kwargs() -> Dict:
+    if settings.USE_LOCAL_LLM:
+        return {"base_url": settings.LOCAL_LLM_BASE_URL, "api_key": settings.LOCAL_LLM_API_KEY}  # 더미 키 허용
+    return {"api_key": settings.OPENAI_API_KEY}
 
-def get_client() -> OpenAI:
+def backend_key(url: str | None = None) -> str:
     """
-    USE_LOCAL_LLM=true 면 LOCAL_LLM_BASE_URL 로 연결된 OpenAI 호환 서버를 사용.
-    아니면 공식 OpenAI API 사용.
+    동시성 상한을 묶는 단위. 같은 Ollama(host:port)라면 /v1, /api 경로가 달라도 같은 백엔드.
     """
-    if settings.USE_LOCAL_LLM:
-        return OpenAI(
-            base_url=settings.LOCAL_LLM_BASE_URL,
-            api_key=settings.LOCAL_LLM_API_KEY,  # 더미 허용
-        )
-    else:
-        return OpenAI(api_key=settings.OPENAI_API_KEY)
+    if url is None:
+        url = settings.LOCAL_LLM_BASE_URL if settings.USE_LOCAL_LLM else "https://api.openai.com/v1"
+    return urlsplit(url).netloc or url
+
+async def startup() -> None:
+    # 클라이언트는 만들지 않음 (첫 호출 때 get_http_client). 헬스체크가 필요할 때만 지금 생성
+    _async_limits.clear()
+    backend_registry.start(get_http_client)
+
+async def shutdown() -> None:
+    global _http, _async_client
+    await backend_registry.stop()
+    if _http is not None:
+        await _http.aclose()
+    _http, _async_client = None, None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http
+    if _http is None:
+        import httpx
+        _http = httpx.AsyncClient(timeout=_timeout(), limits=_limits())
+    return _http
 
-def chat_completion(messages: List[Dict], temperature: float | None = None, max_tokens: int | None = None, model: str | None = None):
-    client = get_client()
+def get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        from openai import AsyncOpenAI
+        _async_client = AsyncOpenAI(http_client=get_http_client(), **_openai_kwargs())
+    return _async_client
 
+@asynccontextmanager
+async def backend_slot(url: str | None = None):
+    key = backend_key(url)
+    sem = _async_limits.get(key)
+    if sem is None:
+        sem = _async_limits.setdefault(key, asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY))
+    async with sem:
+        yield
+
+def resolve_params(temperature: float | None = None, max_tokens: int | None = None, model: str | None = None) -> Tuple[str, float, int]:
+    """
+    실제 호출에 쓰일 (model, temperature, max_tokens). 캐시 키 계산에도 사용.
+    """
     use_model = model or (settings.LOCAL_LLM_MODEL if settings.USE_LOCAL_LLM else "gpt-4o-mini")
     use_temp = temperature if temperature is not None else (settings.LOCAL_LLM_TEMPERATURE if settings.USE_LOCAL_LLM else 0.2)
     use_max = max_tokens if max_tokens is not None else (settings.LOCAL_LLM_MAX_TOKENS if settings.USE_LOCAL_LLM else 2000)
+    return use_model, use_temp, use_max
 
-    return client.chat.completions.create(
-        model=use_model,
-        messages=messages,
-        temperature=use_temp,
-        max_tokens=use_max,
-    )
+def serving_models() -> List[str]:
+    """
+    분석 결과를 낼 수 있는 모델들 (캐시 조회용): 로컬이면 백엔드별 모델, 아니면 OpenAI 모델 하나.
+    """
+    if settings.USE_LOCAL_LLM:
+        return backend_registry.models()
+    return [resolve_params()[0]]
+
+def last_served_model() -> str:
+    # 이 요청에서 마지막으로 응답한 모델 (캐시 저장 키)
+    return served_model.get() or resolve_params()[0]
+
+async def achat_completion(messages: List[Dict], temperature: float | None = None, max_tokens: int | None = None, model: str | None = None,
+                           json_mode: bool = False):
+    """
+    OpenAI 호환 chat completion (비동기). 이벤트 루프를 막지 않으므로 스레드풀(기본 40) 상한에 묶이지 않는다.
+    json_mode: response_format=json_object (응답이 JSON 객체 하나)
+    """
+    client = get_async_client()
+    use_model, use_temp, use_max = resolve_params(temperature, max_tokens, model)
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+
+    async with backend_slot():
+        return await client.chat.completions.create(
+            model=use_model,
+            messages=messages,
+            temperature=use_temp,
+            max_tokens=use_max,
+            **extra,
+        )
+
+async def acomplete_text(messages: List[Dict], temperature: float | None = None, max_tokens: int | None = None, model: str | None = None,
+                         json_mode: bool = False) -> str:
+    """
+    응답 본문 텍스트만 반환.
+    USE_LOCAL_LLM 이면 백엔드 레지스트리(여러 서버, 지연 기반 분산, 페일오버, API 종류 기억)를 거친다.
+    model 을 생략하면 백엔드별로 설정된 모델을 사용.
+    json_mode: 구조화 출력 요청 (지원하지 않는 로컬 백엔드는 일반 요청으로 자동 재시도)
+    """
+    if settings.USE_LOCAL_LLM:
+        _, use_temp, use_max = resolve_params(temperature, max_tokens, model)
+        return await backend_registry.complete(get_http_client(), messages, temperature=use_temp,
+                                               max_tokens=use_max, model=model, json_mode=json_mode)
+    t0 = time.perf_counter()
+    try:
+        resp = await achat_completion(messages, temperature, max_tokens, model, json_mode)
+    except Exception:
+        LLM_ATTEMPT_SECONDS.observe(time.perf_counter() - t0, "openai", "openai", "error")
+        raise
+    dt = time.perf_counter() - t0
+    LLM_ATTEMPT_SECONDS.observe(dt, "openai", "openai", "ok")
+    record_stage("llm_openai", dt)
+    text = resp.choices[0].message.content or ""
+    usage = getattr(resp, "usage", None)
+    record_tokens(messages, text, getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
+    return text
+
+async def astream_chat_completion(messages: List[Dict], temperature: float | None = None, max_tokens: int | None = None, model: str | None = None) -> AsyncIterator[str]:
+    """
+    토큰(델타 텍스트)을 생성되는 대로 내보낸다. 백엔드 슬롯은 스트림이 끝날 때까지 점유.
+    """
+    if settings.USE_LOCAL_LLM:
+        _, use_temp, use_max = resolve_params(temperature, max_tokens, model)
+        async for delta in backend_registry.stream(get_http_client(), messages, temperature=use_temp,
+                                                   max_tokens=use_max, model=model):
+            yield delta
+        return
+
+    client = get_async_client()
+    use_model, use_temp, use_max = resolve_params(temperature, max_tokens, model)
+
+    async with backend_slot():
+        stream = await client.chat.completions.create(
+            model=use_model,
+            messages=messages,
+            temperature=use_temp,
+            max_tokens=use_max,
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
@@ -1,4 +1,5 @@
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 from pydantic import BaseModel
 load_dotenv()
@@ -6,6 +7,11 @@ load_dotenv()
 class Settings(BaseModel):
     PROJECT_NAME: str = os.getenv("PROJECT_NAME", "AI Conversation Archiver")
     OBSIDIAN_VAULT_DIR: str = os.getenv("OBSIDIAN_VAULT_DIR", r"C:\KKM\obsidian\Vault")
+    # 여러 볼트: "이름=경로" 목록 (OBSIDIAN_VAULT_DIR 은 "default"). 예: "work=D:\Vaults\Work, personal=~/Obsidian"
+    VAULTS: str = os.getenv("VAULTS", "")
+    VAULT_DEFAULT: str = os.getenv("VAULT_DEFAULT", "default")
+    # 프로젝트 → 볼트 이름. 예: "AI Conversation Archiver=work, 일기=personal" (없는 프로젝트는 VAULT_DEFAULT)
+    PROJECT_VAULTS: str = os.getenv("PROJECT_VAULTS", "")
 
     USE_LOCAL_LLM: bool = os.getenv("USE_LOCAL_LLM", "false").lower() == "true"
     OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY")
@@ -17,4 +23,100 @@ class Settings(BaseModel):
     LOCAL_LLM_TEMPERATURE: float = float(os.getenv("LOCAL_LLM_TEMPERATURE", "0.2"))
     LOCAL_LLM_MAX_TOKENS: int = int(os.getenv("LOCAL_LLM_MAX_TOKENS", "1800"))
 
+    # 요청 본문 상한 (MB, 0 = 없음). 넘으면 413. ChatGPT 내보내기 업로드(/api/import/)는 디스크로 받으므로 제외
+    MAX_BODY_MB: float = float(os.getenv("MAX_BODY_MB", "32"))
+    # 원문 폴백/기본 노트는 응답 markdown 에 앞부분만 (전체는 파일에)
+    RAW_NOTE_PREVIEW_CHARS: int = int(os.getenv("RAW_NOTE_PREVIEW_CHARS", "20000"))
+
+    # 모든 응답에 Server-Timing 헤더 (false 면 요청 헤더 X-Server-Timing: 1 일 때만)
+    SERVER_TIMING: bool = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+    # LLM 클라이언트 풀 (앱 수명 동안 공유, 백엔드별 동시 요청 상한)
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "180"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_MAX_KEEPALIVE: int = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+    LLM_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    # 모델 컨텍스트 창 (프롬프트 예산 계산 + Ollama num_ctx). 요청마다 값이 바뀌면 Ollama 가 모델을 다시 올림
+    LLM_CONTEXT_TOKENS: int = int(os.getenv("LLM_CONTEXT_TOKENS", "8192"))
+
+    # 초안 먼저 저장 (save+analyze, 요청의 "draft" 로 요청별 선택): 작은 모델(DRAFT_MODEL, 비우면 LLM 없이 기본 노트 +
+    # 약점 힌트 요약)로 status: draft 노트를 바로 저장 → 작업 큐가 큰 모델로 분석해 같은 파일을 원자적으로 교체 (status: final)
+    DRAFT_FIRST: bool = os.getenv("DRAFT_FIRST", "false").lower() == "true"
+    DRAFT_MODEL: str = os.getenv("DRAFT_MODEL", "")
+    DRAFT_MAX_TOKENS: int = int(os.getenv("DRAFT_MAX_TOKENS", "700"))
+    DRAFT_TIMEOUT: float = float(os.getenv("DRAFT_TIMEOUT", "15"))
+
+    # 분석 응답을 JSON 객체 하나로 요청 (Ollama format=json / OpenAI response_format). 미지원 백엔드는 자동으로 일반 요청
+    LLM_STRUCTURED_OUTPUT: bool = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+    # 로컬 LLM 백엔드 여러 대 (비우면 LOCAL_LLM_BASE_URL 하나)
+    # 예: "http://box1:11434|llama3.1:8b-instruct-q4_K_M, http://box2:11434"
+    LLM_BACKENDS: str = os.getenv("LLM_BACKENDS", "")
+    LLM_HEALTH_INTERVAL: float = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))
+    LLM_CIRCUIT_FAILURES: int = int(os.getenv("LLM_CIRCUIT_FAILURES", "3"))
+    LLM_CIRCUIT_COOLDOWN: float = float(os.getenv("LLM_CIRCUIT_COOLDOWN", "30"))
+    LLM_EWMA_ALPHA: float = float(os.getenv("LLM_EWMA_ALPHA", "0.3"))
+
+    # 분석 결과 캐시 (같은 대화 재저장 시 LLM 호출 생략)
+    ANALYSIS_CACHE_ENABLED: bool = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+    ANALYSIS_CACHE_DIR: str = os.getenv("ANALYSIS_CACHE_DIR", str(Path.home() / ".gpt2note" / "analysis_cache"))
+    ANALYSIS_CACHE_MAX_ENTRIES: int = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "2000"))
+    ANALYSIS_CACHE_MAX_MB: int = int(os.getenv("ANALYSIS_CACHE_MAX_MB", "256"))
+    ANALYSIS_CACHE_MAX_AGE_DAYS: float = float(os.getenv("ANALYSIS_CACHE_MAX_AGE_DAYS", "30"))
+
+    # 증분 분석 (새로 붙은 턴만 분석해서 기존 노트 파일에 병합)
+    INCREMENTAL_ANALYSIS: bool = os.getenv("INCREMENTAL_ANALYSIS", "true").lower() == "true"
+    INCREMENTAL_STATE_DIR: str = os.getenv("INCREMENTAL_STATE_DIR", str(Path.home() / ".gpt2note" / "incremental"))
+
+    # 긴 대화 map-reduce 요약 (추정 토큰이 TRIGGER 를 넘으면 CHUNK 단위 창으로 나눠 병렬 요약)
+    CHUNK_TRIGGER_TOKENS: int = int(os.getenv("CHUNK_TRIGGER_TOKENS", "6000"))
+    CHUNK_TOKENS: int = int(os.getenv("CHUNK_TOKENS", "3000"))
+    CHUNK_PARALLELISM: int = int(os.getenv("CHUNK_PARALLELISM", "2"))
+    CHUNK_MAP_MAX_TOKENS: int = int(os.getenv("CHUNK_MAP_MAX_TOKENS", "600"))
+
+    # 백그라운드 작업 큐 (save+analyze 를 202 로 즉시 응답하고 워커가 처리)
+    JOBS_DB_PATH: str = os.getenv("JOBS_DB_PATH", str(Path.home() / ".gpt2note" / "jobs.sqlite3"))
+    JOBS_WORKERS: int = int(os.getenv("JOBS_WORKERS", "2"))
+    JOBS_MAX_PENDING: int = int(os.getenv("JOBS_MAX_PENDING", "1000"))
+    JOBS_MAX_ATTEMPTS: int = int(os.getenv("JOBS_MAX_ATTEMPTS", "2"))
+    JOBS_RETENTION_DAYS: float = float(os.getenv("JOBS_RETENTION_DAYS", "7"))
+
+    # 입장 제어: 동시 LLM 작업 상한 + 대기열, 클라이언트 타임아웃(예상 대기가 넘으면 503), 소스별 분당 요청 수(0 = 끔)
+    ADMISSION_MAX_CONCURRENT: int = int(os.getenv("ADMISSION_MAX_CONCURRENT", "4"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+    ADMISSION_CLIENT_TIMEOUT: float = float(os.getenv("ADMISSION_CLIENT_TIMEOUT", os.getenv("LLM_TIMEOUT", "180")))
+    RATE_LIMIT_PER_MIN: float = float(os.getenv("RATE_LIMIT_PER_MIN", "30"))
+    RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "10"))
+    # 포화 시 거절 대신 LLM 없이 기본 노트를 바로 저장 (요청 헤더 X-Allow-Degraded: 1 로 요청별 허용도 가능)
+    ADMISSION_DEGRADED: bool = os.getenv("ADMISSION_DEGRADED", "false").lower() == "true"
+
+    # 볼트 쓰기: fsync 정책 always | group | none, writer 배치 크기, group 모드에서 묶기 위해 기다리는 시간
+    VAULT_FSYNC: str = os.getenv("VAULT_FSYNC", "group").lower()
+    VAULT_WRITE_BATCH: int = int(os.getenv("VAULT_WRITE_BATCH", "64"))
+    VAULT_GROUP_DELAY_MS: float = float(os.getenv("VAULT_GROUP_DELAY_MS", "2"))
+
+    # 노트 인덱스 (목록 조회 / 중복 저장 감지)
+    NOTE_INDEX_DB: str = os.getenv("NOTE_INDEX_DB", str(Path.home() / ".gpt2note" / "notes.sqlite3"))
+    NOTE_DEDUP: bool = os.getenv("NOTE_DEDUP", "true").lower() == "true"
+    SEARCH_INDEX_DB: str = os.getenv("SEARCH_INDEX_DB", str(Path.home() / ".gpt2note" / "search.sqlite3"))
+    NOTE_INDEX_SCAN_ON_STARTUP: bool = os.getenv("NOTE_INDEX_SCAN_ON_STARTUP", "true").lower() == "true"
+
+    # 관련 노트: 노트 임베딩(/embeddings, 배치) → 로컬 벡터 인덱스(memmap float32) top-k 를 [[wikilink]] 로 삽입
+    EMBEDDINGS_ENABLED: bool = os.getenv("EMBEDDINGS_ENABLED", "false").lower() == "true"
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+    EMBEDDING_BASE_URL: str = os.getenv("EMBEDDING_BASE_URL", "")   # 비우면 LLM 과 같은 서버
+    EMBEDDING_DIR: str = os.getenv("EMBEDDING_DIR", str(Path.home() / ".gpt2note" / "embeddings"))
+    EMBEDDING_BATCH: int = int(os.getenv("EMBEDDING_BATCH", "32"))
+    EMBEDDING_BATCH_DELAY_MS: float = float(os.getenv("EMBEDDING_BATCH_DELAY_MS", "5"))
+    EMBEDDING_MAX_CHARS: int = int(os.getenv("EMBEDDING_MAX_CHARS", "8000"))
+    RELATED_NOTES_K: int = int(os.getenv("RELATED_NOTES_K", "5"))
+    RELATED_MIN_SCORE: float = float(os.getenv("RELATED_MIN_SCORE", "0.55"))
+
+    # ChatGPT 내보내기 대량 가져오기
+    IMPORT_CONCURRENCY: int = int(os.getenv("IMPORT_CONCURRENCY", "2"))
+    IMPORT_CHECKPOINT_DIR: str = os.getenv("IMPORT_CHECKPOINT_DIR", str(Path.home() / ".gpt2note" / "imports"))
+    # 끝난 가져오기 작업의 진행 상황(/api/import/{id})을 메모리에 남겨 두는 시간
+    IMPORT_RETENTION_HOURS: float = float(os.getenv("IMPORT_RETENTION_HOURS", "24"))
+
 settings = Settings()
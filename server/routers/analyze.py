@@ -1,13 +1,22 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import Literal, List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, PrivateAttr, field_validator
+from typing import Callable, Literal, List, Dict, Any
 from datetime import datetime, timezone
-import json
+import asyncio
 
-from ..services.prompt import PROMPT_V2
-from ..services.formatters import build_conversation_block, parse_dual_output
+from ..services.prompt import (ANALYZE_SYSTEM, ANALYZE_SYSTEM_JSON, ANALYZE_USER, INCREMENTAL_SYSTEM,
+                               INCREMENTAL_SYSTEM_JSON, INCREMENTAL_USER, PROMPT_VERSION)
+from ..services.prompt_builder import build_messages, conversation_budget
+from ..services.admission import admission, Rejected, client_key, request_timeout
+from ..services.formatters import build_basic_markdown, parse_output
+from ..services.ingest import json_body
+from ..services.metrics import PARSE_RESULTS, stage
 from ..services.weakness_hints import build_weakness_hints
-from ..client_factory import chat_completion
+from ..services.cache import analysis_cache, make_cache_key
+from ..services.chunking import map_reduce_messages
+from ..services.tokens import estimate_conversation_tokens
+from ..client_factory import acomplete_text, last_served_model, resolve_params, serving_models
+from ..config import settings
 
 router = APIRouter()
 
@@ -20,26 +29,228 @@ class AnalyzeReq(BaseModel):
     source: str | None = None
     conversation: List[Msg]
     weakness_hints: Dict[str, Any] | None = None
+    incremental: bool | None = None   # None 이면 settings.INCREMENTAL_ANALYSIS
+    vault: str | None = None          # 저장할 볼트 이름 (None 이면 PROJECT_VAULTS → VAULT_DEFAULT)
+    draft: bool | None = None         # save+analyze: 초안 먼저 저장 후 백그라운드 교체 (None 이면 settings.DRAFT_FIRST)
+    _messages: List[Dict[str, Any]] | None = PrivateAttr(None)
+
+    @field_validator("weakness_hints")
+    @classmethod
+    def _turn_hints(cls, v: Dict[str, Any] | None) -> Dict[str, List[int]] | None:
+        # 클라이언트 힌트 = {종류: [턴 번호]}. 목록이 아닌 값 / 정수가 아닌 항목(문자열, null, bool)은 여기서 버림
+        # → 창 나누기(map-reduce), 초안 요약, 증분 힌트가 턴 번호 비교만 하면 됨
+        if v is None:
+            return None
+        return {k: [t for t in ts if isinstance(t, int) and not isinstance(t, bool)]
+                for k, ts in v.items() if isinstance(ts, list)}
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """
+        conversation 의 dict 목록. 요청당 한 번 만들어 해시/힌트/프롬프트/폴백 렌더링이 같이 씀 (본문 문자열은 모델과 공유)
+        """
+        if self._messages is None:
+            self._messages = [m.model_dump() for m in self.conversation]
+        return self._messages
 
 class AnalyzeRes(BaseModel):
     meta: Dict[str, Any]
     markdown: str
+    _status: str | None = PrivateAttr(None)   # 파싱 상태 (formatters.parse_output), 응답에는 안 나감
 
-@router.post("/api/conversation/analyze", response_model=AnalyzeRes)
-def analyze(req: AnalyzeReq):
+async def _complete_text(messages: List[Dict[str, str]], max_tokens: int | None = None, json_mode: bool = False) -> str:
+    with stage("llm"):
+        return await acomplete_text(messages, max_tokens=max_tokens, json_mode=json_mode)
+
+def parse_result(text: str) -> tuple[Dict[str, Any], str, str]:
+    """
+    (meta, markdown, status). status 는 formatters.parse_output 참고 — 캐시는 "ok" 만.
+    """
+    with stage("parse"):
+        meta, md, status = parse_output(text)
+    PARSE_RESULTS.inc(status)
+    return meta, md, status
+
+def analysis_cache_key(req: AnalyzeReq, conv: List[Dict[str, Any]], model: str) -> str:
+    _, temperature, _ = resolve_params()
+    return make_cache_key(conv, model=model, temperature=temperature,
+                          prompt_version=PROMPT_VERSION, extra=req.weakness_hints)
+
+def cached_analysis(req: AnalyzeReq, conv: List[Dict[str, Any]]) -> tuple[Dict[str, Any], str] | None:
+    """
+    백엔드마다 모델이 다를 수 있어 캐시는 응답한 모델 기준으로 저장 → 조회는 설정된 모델 전부 (스레드에서 호출)
+    """
+    return analysis_cache.get_any(analysis_cache_key(req, conv, model) for model in serving_models())
+
+def cache_analysis(req: AnalyzeReq, conv: List[Dict[str, Any]], meta: Dict[str, Any], md: str) -> None:
+    analysis_cache.put(analysis_cache_key(req, conv, last_served_model()), meta, md)
+
+async def build_analysis_messages(conv: List[Dict[str, Any]], hints: Dict[str, Any], now_iso: str,
+                                  structured: bool = False) -> List[Dict[str, str]]:
+    """
+    최종(이중 출력, structured 면 JSON 객체) 요청 messages.
+    CHUNK_TRIGGER_TOKENS 나 컨텍스트 창 예산을 넘길 만큼 길면 잘라내지 않고 map 단계를 먼저 돌린 뒤 reduce 요청을 만든다.
+    """
+    system = ANALYZE_SYSTEM_JSON if structured else ANALYZE_SYSTEM
+    reserve = resolve_params()[2]
+    values = {"now_iso": now_iso, "turn_count": len(conv), "weakness_hints_json": hints}
+    trigger = min(settings.CHUNK_TRIGGER_TOKENS, conversation_budget(system, ANALYZE_USER, values, reserve))
+    if estimate_conversation_tokens(conv) > trigger:
+        return await map_reduce_messages(
+            conv, hints, _complete_text,
+            chunk_tokens=settings.CHUNK_TOKENS,
+            parallelism=settings.CHUNK_PARALLELISM,
+            map_max_tokens=settings.CHUNK_MAP_MAX_TOKENS,
+            reserve=reserve,
+            structured=structured,
+        )
+    return build_messages("analyze", system, ANALYZE_USER, values,
+                          reserve=reserve, conversation=conv, hints=hints)
+
+Gate = Callable[[], float]
+
+def rate_limit(request: Request, req: AnalyzeReq) -> None:
+    # 소스별 레이트 리밋은 라우트 입구에서 (LLM 호출 여부와 상관없이). 초과면 429 + Retry-After
+    try:
+        admission.check_rate(client_key(request.client.host if request.client else None, req.source))
+    except Rejected as e:
+        raise rejected_http(e)
+
+def llm_gate(request: Request) -> Gate:
+    """
+    포화 심사를 LLM 을 부르기 직전까지 미룸 → 캐시/변경 없음/중복으로 끝나는 요청은 포화여도 503/기본 노트 없이 처리.
+    gate() = 대기 마감 시각, 포화면 Rejected(503)
+    """
+    timeout = request_timeout(request.headers.get("x-client-timeout"))
+    return lambda: admission.reserve(timeout)
+
+def admit(request: Request) -> tuple[float | None, bool]:
+    """
+    지금 포화 심사 → (대기 마감 시각, degraded). 포화인데 degraded 가 허용되면 (None, True): LLM 없이 기본 노트,
+    아니면 Retry-After 를 단 503. 스트림처럼 응답을 시작하기 전에 결정해야 하는 곳에서 (캐시/중복 확인 뒤에)
+    """
+    try:
+        return llm_gate(request)(), False
+    except Rejected as e:
+        if degraded_allowed(request):
+            admission.degraded()
+            return None, True
+        raise rejected_http(e)
+
+def degraded_allowed(request: Request) -> bool:
+    return settings.ADMISSION_DEGRADED or request.headers.get("x-allow-degraded", "").lower() in ("1", "true")
+
+def rejected_http(e: Rejected) -> HTTPException:
+    return HTTPException(status_code=e.status, detail=e.reason, headers=e.headers())
+
+def basic_meta(req: AnalyzeReq) -> Dict[str, Any]:
+    # LLM 없이 만든 노트(기본 노트/초안)의 제목
+    return {"title": f"{req.project} 대화 {datetime.now().strftime('%Y-%m-%d %H:%M')}", "tags": []}
+
+def degraded_meta(req: AnalyzeReq) -> Dict[str, Any]:
+    return {**basic_meta(req), "degraded": True}
+
+def degraded_result(req: AnalyzeReq) -> AnalyzeRes:
+    return AnalyzeRes(meta=degraded_meta(req), markdown=build_basic_markdown(req.project, req.messages()))
+
+async def analyze(req: AnalyzeReq, gate: Gate | None = None):
+    """
+    캐시에 없으면 admission 슬롯을 잡고 LLM 분석. gate(llm_gate) 는 그 직전에 불러서 포화면 Rejected,
+    통과하면 그 마감 시각까지 슬롯을 못 잡아도 Rejected. None 이면 순서가 올 때까지 기다림 (작업 큐/대량 가져오기).
+    """
     now_iso = datetime.now(timezone.utc).isoformat()
-    hints = req.weakness_hints or build_weakness_hints([m.model_dump() for m in req.conversation])
-    convo_block = build_conversation_block([m.model_dump() for m in req.conversation])
+    conv = req.messages()
 
-    prompt = PROMPT_V2\
-        .replace("{{now_iso}}", now_iso)\
-        .replace("{{turn_count}}", str(len(req.conversation)))\
-        .replace("{{weakness_hints_json}}", json.dumps(hints, ensure_ascii=False))\
-        .replace("{{conversation_block}}", convo_block)
+    # 같은 대화/모델/프롬프트 버전이면 캐시에서 바로 반환
+    with stage("cache"):
+        cached = await asyncio.to_thread(cached_analysis, req, conv)
+    if cached is not None:
+        meta, md = cached
+        return AnalyzeRes(meta=meta, markdown=md)
 
-    messages = [{"role":"system","content": prompt}]
+    with stage("hints"):
+        hints = req.weakness_hints or build_weakness_hints(conv)
+    structured = settings.LLM_STRUCTURED_OUTPUT
+    async with admission.slot(gate() if gate else None):
+        messages = await build_analysis_messages(conv, hints, now_iso, structured)
+        text = await _complete_text(messages, json_mode=structured)
+    meta, md, status = parse_result(text)
+    if status == "ok":
+        # 파싱 성공한 결과만 캐시 (임시 노트/실패 응답은 다음 저장 때 다시 시도)
+        with stage("cache"):
+            await asyncio.to_thread(cache_analysis, req, conv, meta, md)
+    return AnalyzeRes(meta=meta, markdown=md)
 
-    resp = chat_completion(messages)
-    text = resp.choices[0].message.content
-    meta, md = parse_dual_output(text)
+async def draft_analysis(req: AnalyzeReq) -> AnalyzeRes:
+    """
+    초안용 빠른 분석: DRAFT_MODEL 로 짧게, DRAFT_TIMEOUT 안에. 모델이 없거나, map-reduce 가 필요할 만큼 길거나,
+    실패하면 빈 결과 → 호출부가 LLM 없는 초안으로. 입장 제어 슬롯은 잡지 않음 (큰 모델 작업 순서를 밀어내지 않게,
+    백엔드별 동시 요청 상한은 그대로). 결과는 캐시하지 않음 (캐시 키는 큰 모델 기준)
+    """
+    if not settings.DRAFT_MODEL:
+        return AnalyzeRes(meta={}, markdown="")
+    conv = req.messages()
+    structured = settings.LLM_STRUCTURED_OUTPUT
+    values = {"now_iso": datetime.now(timezone.utc).isoformat(), "turn_count": len(conv)}
+    system = ANALYZE_SYSTEM_JSON if structured else ANALYZE_SYSTEM
+    budget = conversation_budget(system, ANALYZE_USER, {**values, "weakness_hints_json": {}}, settings.DRAFT_MAX_TOKENS)
+    if estimate_conversation_tokens(conv) > min(settings.CHUNK_TRIGGER_TOKENS, budget):
+        return AnalyzeRes(meta={}, markdown="")
+    try:
+        with stage("draft_llm"):
+            hints = req.weakness_hints or build_weakness_hints(conv)
+            messages = build_messages("analyze", system, ANALYZE_USER, {**values, "weakness_hints_json": hints},
+                                      reserve=settings.DRAFT_MAX_TOKENS, conversation=conv, hints=hints)
+            text = await asyncio.wait_for(
+                acomplete_text(messages, max_tokens=settings.DRAFT_MAX_TOKENS, model=settings.DRAFT_MODEL,
+                               json_mode=structured), settings.DRAFT_TIMEOUT)
+    except Exception as e:
+        print("[draft] small model failed:", repr(e))
+        return AnalyzeRes(meta={}, markdown="")
+    meta, md, _ = parse_result(text)
     return AnalyzeRes(meta=meta, markdown=md)
+
+@router.post("/api/conversation/analyze", response_model=AnalyzeRes)
+async def analyze_only(request: Request, req: AnalyzeReq = Depends(json_body(AnalyzeReq))):
+    """
+    저장 없이 분석 결과만 반환. LLM 호출 실패는 502 (save+analyze 는 analyze() 를 직접 불러 폴백 처리),
+    레이트 리밋이면 429, 캐시에 없는데 포화면 503 + Retry-After 또는 degraded 기본 노트 (meta.degraded=true)
+    """
+    rate_limit(request, req)
+    try:
+        return await analyze(req, llm_gate(request))
+    except Rejected as e:
+        if degraded_allowed(request):
+            admission.degraded()
+            return degraded_result(req)
+        raise rejected_http(e)
+    except Exception as e:
+        print("[analyze] failed:", repr(e))
+        raise HTTPException(status_code=502, detail=f"LLM 호출 실패: {e!r}")
+
+async def analyze_increment(req: AnalyzeReq, prev_meta: Dict[str, Any], prev_markdown: str, start: int,
+                            gate: Gate | None = None) -> AnalyzeRes:
+    """
+    증분 분석: 이전 노트 + conversation[start:] 만 보내서 갱신된 전체 노트를 받는다.
+    start = 이미 분석된 턴 수 (새 턴 번호는 start+1 부터)
+    """
+    now_iso = datetime.now(timezone.utc).isoformat()
+    conv = req.messages()
+    new_turns = conv[start:]
+
+    with stage("hints"):
+        hints = req.weakness_hints or build_weakness_hints(conv)
+    hints = {k: [i for i in v if i > start] for k, v in hints.items()}
+    # 새 턴이 예산을 넘으면 근거 턴 + 최신 턴 위주로 잘라냄 (이전 노트는 그대로)
+    structured = settings.LLM_STRUCTURED_OUTPUT
+    system = INCREMENTAL_SYSTEM_JSON if structured else INCREMENTAL_SYSTEM
+    messages = build_messages("incremental", system, INCREMENTAL_USER, {
+        "now_iso": now_iso, "prev_turns": start, "new_from": start + 1, "turn_count": len(conv),
+        "weakness_hints_json": hints, "previous_json": prev_meta or {}, "previous_markdown": prev_markdown or "",
+    }, reserve=resolve_params()[2], conversation=new_turns, hints=hints, start=start + 1)
+
+    async with admission.slot(gate() if gate else None):
+        text = await _complete_text(messages, json_mode=structured)
+    meta, md, status = parse_result(text)
+    res = AnalyzeRes(meta=meta, markdown=md)
+    res._status = status
+    return res
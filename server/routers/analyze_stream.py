@@ -0,0 +1,211 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
+import asyncio
+import json
+import time
+
+from .analyze import (AnalyzeReq, admit, basic_meta, build_analysis_messages, cache_analysis, cached_analysis,
+                      degraded_allowed, degraded_result, rate_limit)
+from .save_analyze import find_duplicate, index_note, note_folder, related_notes
+from ..client_factory import astream_chat_completion
+from ..services.admission import admission, Rejected
+from ..services.formatters import (DualStreamParser, build_basic_markdown, inject_frontmatter, related_frontmatter,
+                                   related_section)
+from ..services.ingest import json_body
+from ..services.incremental import conversation_fingerprint
+from ..services.note_index import content_hash_of
+from ..services.search import search_frontmatter
+from ..services.metrics import PARSE_RESULTS, stage
+from ..services.weakness_hints import build_weakness_hints
+from ..utils.fs import note_stem
+
+router = APIRouter()
+
+FLUSH_INTERVAL_S = 0.5   # 점진 저장: 이 간격(또는 FLUSH_BYTES)마다 모아서 append
+FLUSH_BYTES = 2048
+
+# 끊긴 스트림의 노트 정리 (요청 태스크가 취소된 뒤에도 끝까지)
+_aborts: set = set()
+
+class AnalyzeStreamReq(AnalyzeReq):
+    save: bool = False   # true 면 노트 파일을 생성 중에 점진적으로 기록
+
+def _line(obj) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+class _ProgressiveNote:
+    """
+    meta 가 도착하면 frontmatter 로 파일을 만들고, 마크다운 델타를 모아서 append.
+    끝나면 최종 내용으로 원자적 교체 (중간 상태는 Obsidian 에서 실시간으로 보임). 저장 후 단계는 save+analyze 와 같음
+    (중복 판정, 관련 노트, 인덱스/임베딩). 도중에 실패하거나 끊기면 잘린 파일을 기본 노트로 교체.
+    """
+
+    def __init__(self, req: AnalyzeStreamReq):
+        self.req = req
+        self.vault, self.folder = note_folder(req)
+        conv = req.messages()
+        self.fingerprint = conversation_fingerprint(conv)
+        self.content_hash = content_hash_of(conv)
+        self.path: str | None = None
+        self.meta: dict = {}
+        self.closed = False
+        self.created = datetime.now(timezone.utc).isoformat()
+        self._pending: list[str] = []
+        self._pending_len = 0
+        self._last_flush = time.monotonic()
+
+    def _render(self, meta: dict, md: str, related: list | None = None) -> str:
+        return inject_frontmatter(
+            markdown=md + related_section(related or []),
+            title=meta.get("title") or "Conversation_Note",
+            project=self.req.project,
+            source=self.req.source,
+            turns=len(self.req.conversation),
+            tags=meta.get("tags", []),
+            created=self.created,
+            extra={"fingerprint": self.fingerprint, "content_hash": self.content_hash, **search_frontmatter(meta),
+                   "related": related_frontmatter(related or [])},
+        )
+
+    async def open(self, meta: dict) -> None:
+        self.meta = meta
+        title = meta.get("title") or "Conversation_Note"
+        self.path = await self.vault.writer.create(self.folder, note_stem(title), self._render(meta, ""))
+
+    async def append(self, delta: str) -> None:
+        if self.path is None:
+            return
+        self._pending.append(delta)
+        self._pending_len += len(delta)
+        if self._pending_len >= FLUSH_BYTES or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_S:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self.path is None or not self._pending:
+            return
+        text, self._pending, self._pending_len = "".join(self._pending), [], 0
+        self._last_flush = time.monotonic()
+        await self.vault.writer.append(self.path, text)
+
+    async def close(self, meta: dict, md: str) -> str:
+        if meta.get("degraded"):
+            # LLM 없이 만든 기본 노트는 중복 판정에서 빼서 다음 저장 때 다시 분석되게
+            self.content_hash = None
+        self._pending = []
+        title, tags = meta.get("title") or "Conversation_Note", meta.get("tags", [])
+        emb_key, emb_vec, related = None, None, []
+        if not meta.get("degraded"):
+            emb_key, emb_vec, related = await related_notes(self.vault, title, tags, [md],
+                                                            [self.path] if self.path else ())
+        content = self._render(meta, md, related)
+        if self.path is None:
+            self.path = await self.vault.writer.create(self.folder, note_stem(title), content)
+        else:
+            await self.vault.writer.replace(self.path, content)
+        self.closed = True
+        await index_note(self.path, self.req, title, tags, self.created, self.fingerprint, self.content_hash,
+                         emb_key, emb_vec)
+        if related:
+            meta["related"] = [n["path"] for n in related]
+        return self.path
+
+    async def abort(self) -> None:
+        # 만들다 만 파일 → 기본 노트 (content_hash 없이: 다음 저장 때 다시 분석)
+        if self.path is None or self.closed:
+            return
+        self._pending, self.content_hash = [], None
+        meta = {**basic_meta(self.req), **{k: v for k, v in self.meta.items() if k in ("title", "tags")}}
+        try:
+            await self.vault.writer.replace(self.path, self._render(meta, build_basic_markdown(
+                self.req.project, self.req.messages())))
+            self.closed = True
+            await index_note(self.path, self.req, meta["title"], meta.get("tags", []), self.created,
+                             self.fingerprint, None)
+            print(f"[analyze/stream] interrupted → basic note: {self.path}")
+        except Exception as e:
+            print(f"[analyze/stream] cleanup of {self.path} failed:", repr(e))
+
+    def abort_later(self) -> None:
+        task = asyncio.get_running_loop().create_task(self.abort())
+        _aborts.add(task)
+        task.add_done_callback(_aborts.discard)
+
+@router.post("/api/conversation/analyze/stream")
+async def analyze_stream(request: Request, req: AnalyzeStreamReq = Depends(json_body(AnalyzeStreamReq))):
+    """
+    분석 결과를 NDJSON 으로 스트리밍.
+      {"type":"meta","meta":{...}}          JSON 섹션이 완성되는 즉시 1회
+      {"type":"markdown","delta":"..."}     마크다운 토큰이 생성되는 대로
+      {"type":"done","meta":{...},"file":...}
+      {"type":"error","detail":"...","retry_after":초}   retry_after 는 포화로 슬롯을 못 잡았을 때만
+    입장 심사는 스트림 시작 전에 해서 429/503 + Retry-After 로 바로 거절. degraded 허용이면 기본 노트를 같은 이벤트로 보냄.
+    포화 심사는 중복/캐시 확인 뒤 LLM 을 불러야 할 때만
+    """
+    note = _ProgressiveNote(req) if req.save else None   # 볼트가 잘못됐으면 스트림 전에 400
+    rate_limit(request, req)
+    conv = req.messages()
+    dup = await find_duplicate(req, note.vault, note.content_hash) if note else None
+    cached = None
+    if dup is None:
+        with stage("cache"):
+            cached = await asyncio.to_thread(cached_analysis, req, conv)
+    deadline, degraded = admit(request) if dup is None and cached is None else (None, False)
+    allow_degraded = degraded_allowed(request)
+
+    async def events():
+        nonlocal degraded
+        try:
+            if dup:
+                yield _line({"type": "meta", "meta": dup.meta})
+                yield _line({"type": "done", "meta": dup.meta, "file": dup.meta["file"]})
+                return
+            if cached is None and not degraded:
+                try:
+                    async with admission.slot(deadline):
+                        hints = req.weakness_hints or build_weakness_hints(conv)
+                        messages = await build_analysis_messages(conv, hints, datetime.now(timezone.utc).isoformat())
+                        parser = DualStreamParser()
+                        async for delta in astream_chat_completion(messages):
+                            for kind, value in parser.feed(delta):
+                                if kind == "meta":
+                                    yield _line({"type": "meta", "meta": value})
+                                    if note:
+                                        await note.open(value)
+                                else:
+                                    yield _line({"type": "markdown", "delta": value})
+                                    if note:
+                                        await note.append(value)
+                except Rejected as e:
+                    # 줄 서 있다가 마감을 넘김 (스트림은 이미 200 으로 시작됨)
+                    if not allow_degraded:
+                        yield _line({"type": "error", "detail": e.reason, "retry_after": e.retry_after})
+                        return
+                    admission.degraded()
+                    degraded = True
+                else:
+                    meta, md = parser.finish()
+                    PARSE_RESULTS.inc(parser.status)
+                    if parser.status == "ok":
+                        await asyncio.to_thread(cache_analysis, req, conv, meta, md)
+            if cached is not None or degraded:
+                if cached is not None:
+                    meta, md = cached
+                else:
+                    res = degraded_result(req)
+                    meta, md = res.meta, res.markdown
+                yield _line({"type": "meta", "meta": meta})
+                yield _line({"type": "markdown", "delta": md})
+            with stage("write"):
+                path = await note.close(meta, md) if note else None
+            yield _line({"type": "done", "meta": meta, "file": path})
+        except Exception as e:
+            print("[analyze/stream] failed:", repr(e))
+            yield _line({"type": "error", "detail": repr(e)})
+        finally:
+            if note and not note.closed:
+                # 실패/클라이언트 끊김(취소)으로 close 까지 못 간 경우
+                note.abort_later()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
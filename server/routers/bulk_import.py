@@ -0,0 +1,94 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict
+from pathlib import Path
+import asyncio
+import hashlib
+import tempfile
+import time
+import uuid
+
+from .analyze import AnalyzeReq
+from .save_analyze import save_and_analyze
+from ..config import settings
+from ..services.bulk_import import Checkpoint, ImportStats, iter_json_array, run_import
+from ..services.vaults import vault_registry, VaultError
+
+router = APIRouter()
+
+# 진행 중/끝난 가져오기 작업 (프로세스 메모리; 재개는 체크포인트 파일로). 끝난 작업은 IMPORT_RETENTION_HOURS 뒤 정리
+_imports: Dict[str, Dict[str, Any]] = {}
+
+def _prune_imports() -> None:
+    cutoff = time.time() - settings.IMPORT_RETENTION_HOURS * 3600
+    for import_id in [k for k, v in _imports.items() if v["stats"].finished is not None and v["stats"].finished < cutoff]:
+        del _imports[import_id]
+
+def make_saver(project: str, source: str = "chatgpt-export", vault: str | None = None):
+    async def _save(conv: Dict[str, Any]) -> Dict[str, Any]:
+        res = await save_and_analyze(AnalyzeReq(project=project, source=source, conversation=conv["conversation"],
+                                                  weakness_hints=conv.get("weakness_hints"), vault=vault))
+        if not (res.meta or {}).get("saved"):
+            raise RuntimeError((res.meta or {}).get("save_error") or "not saved")
+        return res.meta
+    return _save
+
+def checkpoint_path(key: str) -> Path:
+    return Path(settings.IMPORT_CHECKPOINT_DIR) / f"{key}.done"
+
+def file_key(src: Path) -> str:
+    # 같은 파일(경로+크기+수정시각)이면 같은 체크포인트
+    st = src.stat()
+    return hashlib.sha256(f"{src.resolve()}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()[:24]
+
+async def _spool(req: Request) -> tuple[Path, str]:
+    # 업로드 본문을 조각 단위로 임시 파일에 기록 (메모리에 전체를 올리지 않음) + 내용 해시(체크포인트 키)
+    h = hashlib.sha256()
+    fd, name = tempfile.mkstemp(prefix="gpt2note-import-", suffix=".json")
+    with open(fd, "wb") as f:
+        async for chunk in req.stream():
+            h.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    return Path(name), h.hexdigest()[:24]
+
+@router.post("/api/import/chatgpt", status_code=202)
+async def import_chatgpt_export(req: Request, project: str = "ChatGPT Archive",
+                                concurrency: int | None = None, vault: str | None = None):
+    """
+    ChatGPT conversations.json 가져오기.
+    - 본문으로 파일을 올림 (서버 로컬 파일은 scripts/import_export.py 로)
+    - 같은 파일을 다시 보내면 체크포인트로 완료분은 건너뛰고 이어서 처리
+    - ?vault= 로 볼트 이름 (없으면 PROJECT_VAULTS → VAULT_DEFAULT)
+    """
+    try:
+        vault_registry.project_folder(project, vault)
+    except VaultError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _prune_imports()
+    src, key = await _spool(req)
+
+    import_id = uuid.uuid4().hex
+    stats = ImportStats()
+    _imports[import_id] = {"id": import_id, "project": project, "checkpoint": str(checkpoint_path(key)), "stats": stats}
+
+    async def _run():
+        try:
+            await run_import(iter_json_array(src), make_saver(project, vault=vault),
+                             concurrency=concurrency or settings.IMPORT_CONCURRENCY,
+                             checkpoint=Checkpoint(checkpoint_path(key)), stats=stats,
+                             report=lambda s: print(f"[import {import_id[:8]}]", s))
+        except Exception as e:
+            print(f"[import {import_id[:8]}] aborted:", repr(e))
+            stats.errors.append(f"aborted: {e!r}")
+        finally:
+            src.unlink(missing_ok=True)
+
+    _imports[import_id]["task"] = asyncio.create_task(_run())
+    return {"import_id": import_id, "status_url": f"/api/import/{import_id}"}
+
+@router.get("/api/import/{import_id}")
+async def get_import(import_id: str):
+    _prune_imports()
+    job = _imports.get(import_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="import not found")
+    return {"id": import_id, "project": job["project"], "checkpoint": job["checkpoint"], **job["stats"].snapshot()}
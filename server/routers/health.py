@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+
+from ..config import settings
+from ..services.admission import admission
+from ..services.backends import backend_registry
+from ..services.cache import analysis_cache
+from ..services.embeddings import embedding_index
+from ..services.jobs import job_queue
+from ..services.metrics import startup_timings
+from ..services.note_index import note_index
+from ..services.prompt_builder import prompt_stats
+from ..services.search import search_index
+from ..services.vaults import vault_registry
+
+router = APIRouter()
+
+@router.get("/health")
+def health():
+    return {"ok": True, "vault": str(vault_registry.get(vault_registry.default).root), "model": settings.LOCAL_LLM_MODEL,
+            "cache": analysis_cache.stats(), "jobs": job_queue.stats(), "backends": backend_registry.snapshot(),
+            "note_index": note_index.last_scan, "search": search_index.last_scan,
+            "prompt": prompt_stats.snapshot(), "vaults": vault_registry.stats(),
+            "admission": admission.stats(),
+            "embeddings": embedding_index.stats() if settings.EMBEDDINGS_ENABLED else None,
+            "startup": {k: round(v, 4) for k, v in startup_timings.items()}}
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from typing import Any, Dict
+import asyncio
+
+from .analyze import AnalyzeReq
+from .save_analyze import note_folder, save_and_analyze
+from ..services.admission import admission, Rejected, client_key
+from ..services.ingest import json_body
+from ..services.jobs import job_queue, QueueFull
+from ..services.metrics import collect_timings, reset_timings, timings_dict
+
+router = APIRouter()
+
+class SaveAnalyzeJobReq(AnalyzeReq):
+    priority: int = 0   # 클수록 먼저 처리
+
+async def _run_save_and_analyze(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # 백그라운드 작업은 응답 헤더가 없으니 구간별 시간(ms)을 결과에 담아 폴링으로 확인
+    timings, token = collect_timings()
+    try:
+        res = await save_and_analyze(AnalyzeReq(**payload))
+    finally:
+        reset_timings(token)
+    return {**res.model_dump(), "timings": timings_dict(timings)}
+
+async def _run_refine(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # save+analyze draft 모드가 넣는 작업: 큰 모델로 분석해서 초안 파일을 교체 (status: final)
+    timings, token = collect_timings()
+    try:
+        req = {k: v for k, v in payload.items() if k != "refine"}
+        res = await save_and_analyze(AnalyzeReq(**req), refine=payload["refine"])
+    finally:
+        reset_timings(token)
+    return {**res.model_dump(), "timings": timings_dict(timings)}
+
+job_queue.register("save+analyze", _run_save_and_analyze)
+job_queue.register("refine", _run_refine)
+
+@router.post("/api/jobs/save+analyze", status_code=202)
+async def enqueue_save_and_analyze(request: Request, req: SaveAnalyzeJobReq = Depends(json_body(SaveAnalyzeJobReq))):
+    """
+    save+analyze 를 작업 큐에 넣고 즉시 job id 반환 (LLM 완료를 기다리지 않음).
+    같은 내용이 이미 대기/실행 중이면 그 작업 id 를 돌려준다. 소스별 레이트 리밋은 대화형 분석과 같은 버킷.
+    """
+    note_folder(req)   # 볼트/프로젝트 이름은 큐에 넣기 전에 검증 (400)
+    try:
+        admission.check_rate(client_key(request.client.host if request.client else None, req.source))
+    except Rejected as e:
+        return JSONResponse(status_code=e.status, content={"detail": e.reason}, headers=e.headers())
+    payload = req.model_dump(exclude={"priority"})
+    try:
+        job_id, deduped = await asyncio.to_thread(job_queue.enqueue, "save+analyze", payload, req.priority)
+    except QueueFull as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "30"})
+    return {"job_id": job_id, "status_url": f"/api/jobs/{job_id}", "deduplicated": deduped}
+
+@router.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..services.admission import admission
+from ..services.backends import backend_registry
+from ..services.cache import analysis_cache
+from ..services.jobs import job_queue
+from ..services.metrics import Gauge, registry
+
+router = APIRouter()
+
+# 스크레이프 시점에 읽는 값들
+registry.register(Gauge("jobs", "Jobs in the queue by state", ["state"],
+                        fn=lambda: {(k,): v for k, v in job_queue.stats().items()}))
+registry.register(Gauge("llm_outstanding", "In-flight LLM requests per backend", ["backend"],
+                        fn=lambda: {(b["base_url"],): b["outstanding"] for b in backend_registry.snapshot()}))
+registry.register(Gauge("llm_backend_ewma_ms", "Smoothed LLM latency per backend", ["backend"],
+                        fn=lambda: {(b["base_url"],): b["ewma_ms"] for b in backend_registry.snapshot()}))
+registry.register(Gauge("admission", "LLM slots in use, waiting requests and predicted wait", ["field"],
+                        fn=lambda: {(k,): admission.stats()[k] for k in ("active", "queued", "predicted_wait_s")}))
+registry.register(Gauge("analysis_cache_events", "Analysis cache hits/misses/evictions since start", ["event"],
+                        fn=lambda: {(k,): v for k, v in analysis_cache.stats().items()
+                                    if k in ("hits", "misses", "evictions")}))
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus 텍스트 포맷 (text/plain; version=0.0.4)
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
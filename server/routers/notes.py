@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Query
+import asyncio
+
+from ..client_factory import get_http_client
+from ..services.embeddings import embedding_index
+from ..services.note_index import note_index
+
+router = APIRouter()
+
+@router.get("/api/notes")
+async def list_notes(project: str | None = None, tag: str | None = None,
+                     limit: int = Query(50, ge=1, le=1000), offset: int = Query(0, ge=0)):
+    """
+    인덱스된 노트 목록 (최신순). project / tag 로 필터.
+    """
+    return await asyncio.to_thread(note_index.list, project, tag, limit, offset)
+
+@router.get("/api/notes/related")
+async def related_notes(path: str | None = None, q: str | None = Query(None, max_length=2000),
+                        k: int = Query(5, ge=1, le=50), min_score: float = 0.0):
+    """
+    임베딩이 비슷한 노트 top-k. path (이미 색인된 노트) 또는 q (임의 텍스트, 임베딩 서버 호출) 중 하나.
+    """
+    if path:
+        vec = await asyncio.to_thread(embedding_index.vector_of, path)
+        if vec is None:
+            raise HTTPException(status_code=404, detail="note has no embedding (not indexed yet)")
+    elif q:
+        try:
+            _, vec = await embedding_index.vector(get_http_client(), q)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"embedding failed: {e!r}")
+    else:
+        raise HTTPException(status_code=400, detail="path or q is required")
+    results = await asyncio.to_thread(embedding_index.related, vec, k, [path] if path else (), min_score)
+    return {"path": path, "q": q, "results": results}
@@ -1,60 +1,393 @@
-from fastapi import APIRouter
-from .analyze import analyze, AnalyzeReq, AnalyzeRes
+from fastapi import APIRouter, Depends, HTTPException, Request
+from .analyze import (analyze, analyze_increment, AnalyzeReq, AnalyzeRes, Gate, basic_meta, degraded_allowed,
+                      degraded_meta, draft_analysis, llm_gate, rate_limit, rejected_http)
 from ..config import settings
-from ..services.formatters import inject_frontmatter
-from ..utils.fs import write_markdown
-from datetime import datetime
+from ..services.admission import admission, Rejected
+from ..client_factory import get_http_client
+from ..services.embeddings import embedding_index
+from ..services.formatters import (draft_summary, iter_basic_markdown, iter_raw_conversation, note_parts, parts_head,
+                                   related_frontmatter, related_section)
+from ..services.ingest import json_body
+from ..services.incremental import incremental_store, conversation_fingerprint, merge_meta
+from ..services.jobs import job_queue, QueueFull
+from ..services.note_index import note_index, content_hash_of, parse_frontmatter, FRONTMATTER_MAX_BYTES
+from ..services.search import search_index, search_frontmatter
+from ..services.metrics import SAVE_RESULTS, stage
+from ..services.vaults import vault_registry, Vault, VaultError
+from ..services.weakness_hints import build_weakness_hints
+from ..utils.fs import note_stem
+from datetime import datetime, timezone
+from dataclasses import dataclass
+from typing import Any, Dict, List
+import asyncio
+from pathlib import Path
 
 router = APIRouter()
 
-def _fallback_from_conv(conv):
-    parts = []
-    for m in conv:
-        who = "👤 User" if m.role == "user" else ("🤖 Assistant" if m.role == "assistant" else "🛠 System")
-        parts.append(f"### {who}\n{m.content}\n")
-    return "\n---\n".join(parts)
+def note_folder(req: AnalyzeReq) -> tuple[Vault, Path]:
+    """
+    요청의 볼트 + 노트 폴더. 알 수 없는 볼트 / 볼트 밖으로 나가는 프로젝트 이름은 LLM 을 부르기 전에 400.
+    """
+    try:
+        vault = vault_registry.for_project(req.project, req.vault)
+        return vault, vault.folder(req.project)
+    except VaultError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _too_short(md: str) -> bool:
+    return len(md.replace("#", "").replace("-", "").replace("`", "").strip()) < 80
+
+def _note_frontmatter(path: str) -> Dict[str, Any] | None:
+    # 초안 교체 전 확인용: 파일이 없으면 None
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return parse_frontmatter(f.read(FRONTMATTER_MAX_BYTES))
+    except FileNotFoundError:
+        return None
+
+async def find_duplicate(req: AnalyzeReq, vault: Vault, content_hash: str) -> AnalyzeRes | None:
+    """
+    같은 프로젝트/볼트에 완전히 같은 대화가 이미 저장돼 있으면 그 노트 (재분석/재저장 안 함). 스트림 저장도 같이 씀.
+    """
+    if not settings.NOTE_DEDUP:
+        return None
+    with stage("dedup"):
+        dup = await asyncio.to_thread(note_index.find_duplicate, req.project, content_hash)
+    if not (dup and Path(dup["path"]).exists() and vault.owns(dup["path"])):
+        return None
+    print(f"[save+analyze] duplicate of {dup['path']} → skip")
+    SAVE_RESULTS.inc("duplicate")
+    return AnalyzeRes(meta={"title": dup["title"], "tags": dup["tags"], "file": dup["path"], "saved": True,
+                            "duplicate": True}, markdown="")
+
+async def related_notes(vault: Vault, title: str, tags: list, body: list[str],
+                        exclude: tuple | list = ()) -> tuple[str | None, Any, list]:
+    """
+    관련 노트: 본문 임베딩 → 비슷한 노트 top-k (임베딩 서버가 없으면 링크 없이 저장). (키, 벡터, 관련 노트)
+    """
+    if not settings.EMBEDDINGS_ENABLED:
+        return None, None, []
+    with stage("related"):
+        return await embedding_index.related_for(
+            get_http_client(), title, tags, parts_head(body, settings.EMBEDDING_MAX_CHARS),
+            settings.RELATED_NOTES_K, settings.RELATED_MIN_SCORE, exclude=exclude,
+            within=vault.prefix)   # [[링크]] 는 같은 볼트 안에서만 열림
+
+async def index_note(path: str, req: AnalyzeReq, title: str, tags: list, created: str, fingerprint: str,
+                     content_hash: str | None, emb_key: str | None = None, emb_vec: Any = None) -> None:
+    # 저장 후: 노트 인덱스(목록/중복 판정) + 검색 인덱스 + 임베딩 (관련 노트 조회 때 계산한 벡터)
+    with stage("index"):
+        await asyncio.to_thread(note_index.upsert, path, {
+            "title": title, "project": req.project, "tags": tags, "source": req.source or "chat",
+            "turns": len(req.conversation), "created": created, "fingerprint": fingerprint, "content_hash": content_hash,
+        })
+        await asyncio.to_thread(search_index.index_file, path)
+        if emb_key is not None:
+            await asyncio.to_thread(embedding_index.put, path, emb_key, emb_vec, req.project, title)
 
 @router.post("/api/conversation/save+analyze", response_model=AnalyzeRes)
-def save_and_analyze(req: AnalyzeReq):
-    # 1) LLM 분석 시도
+async def save_and_analyze_route(request: Request, req: AnalyzeReq = Depends(json_body(AnalyzeReq))):
+    """
+    레이트 리밋이면 429. LLM 을 불러야 하는데 포화면 503 + Retry-After, degraded 가 허용되면 기본 노트를 바로 저장
+    (meta.degraded=true). 변경 없음/중복/캐시로 끝나는 저장은 포화여도 그대로 처리.
+    draft 면 초안을 바로 저장하고 응답 (meta.status="draft", meta.refine_job) — 큰 모델 분석은 작업 큐에서
+    """
+    note_folder(req)
+    rate_limit(request, req)
+    draft = settings.DRAFT_FIRST if req.draft is None else req.draft
+    if draft:
+        # 초안은 큰 모델 슬롯을 기다리지 않음
+        return await save_and_analyze(req, draft=True)
     try:
-        res: AnalyzeRes = analyze(req)
-    except Exception as e:
-        # 분석 실패 → 빈 결과로 처리하고 폴백
-        print("[save+analyze] analyze() failed:", repr(e))
-        res = AnalyzeRes(meta={}, markdown="")
+        return await save_and_analyze(req, gate=llm_gate(request), allow_degraded=degraded_allowed(request))
+    except Rejected as e:
+        raise rejected_http(e)
 
-    # 2) 결과 검증 + 폴백
-    md = (res.markdown or "").strip()
-    if len(md.replace("#", "").replace("-", "").replace("`", "").strip()) < 80:
-        # 너무 짧거나 비면 원본 대화로 폴백
-        print("[save+analyze] markdown too short → fallback to raw conversation")
-        md = _fallback_from_conv(req.conversation)
-
-    # 3) 프런트매터 주입
-    title = (res.meta or {}).get("title") or "Conversation_Note"
-    md_ready = inject_frontmatter(
-        markdown=md,
-        title=title,
-        project=req.project,
-        source=req.source,
-        turns=len(req.conversation),
-        tags=(res.meta or {}).get("tags", []),
-        created=datetime.utcnow().isoformat()
-    )
-
-    # 4) 저장 (항상 시도) + 검증 로그
-    folder = settings.OBSIDIAN_VAULT_DIR + f"\\{req.project}"
+async def save_and_analyze(req: AnalyzeReq, gate: Gate | None = None, allow_degraded: bool = False,
+                           draft: bool = False, refine: Dict[str, Any] | None = None) -> AnalyzeRes:
+    """
+    작업 큐/대량 가져오기도 이 함수를 직접 부름 (gate=None → 슬롯이 날 때까지 기다림, 거절 없음).
+    gate(llm_gate) 는 LLM 을 부르기 직전에만: 포화면 Rejected, allow_degraded 면 Rejected 대신 LLM 없는 기본 노트.
+    draft 면 작은 모델(또는 LLM 없이)로 status: draft 노트를 저장하고 "refine" 작업을 넣음.
+    refine={"file","created"} 는 그 작업: 큰 모델로 분석해 초안 파일을 교체 (status: final). 분석이 실패하면 예외 → 작업 재시도.
+    볼트가 잘못됐으면 VaultError (라우트는 note_folder 로 먼저 400).
+    단계: plan_save → save_shortcut(변경 없음/초안 재사용/중복) → run_analysis → compose_note → write_note → after_save
+    """
+    plan = await plan_save(req, draft=draft, refine=refine)
+    shortcut = await save_shortcut(plan)
+    if shortcut:
+        return shortcut
+    res, degraded = await run_analysis(plan, gate, allow_degraded)
+    body = compose_note(plan, res, degraded)
+    note, related = await render_note(plan, body)
+    # 분석하는 동안 사용자가 초안을 고쳤을 수도 있으니 교체 직전에 한 번 더
+    skipped = await _refine_skipped(refine, len(plan.conv)) if refine else None
+    if skipped:
+        return skipped
     try:
-        path = write_markdown(folder, title, md_ready)
-        print(f"[save+analyze] saved: {path} (len={len(md_ready)})")
-        # 응답에 파일 경로/길이 첨부해서 확장 콘솔에서 바로 확인 가능
-        res.meta = {**(res.meta or {}), "file": path, "saved": True, "body_len": len(md_ready)}
+        path = await write_note(plan, body, note)
+        meta = await after_save(plan, body, path, sum(map(len, note)), related)
     except Exception as e:
-        print("[save+analyze] write_markdown failed:", repr(e))
+        print("[save+analyze] write failed:", repr(e))
+        SAVE_RESULTS.inc("error")
         # 실패 시에도 클라이언트가 알 수 있게 플래그와 에러 메시지 전달
-        res.meta = {**(res.meta or {}), "saved": False, "save_error": repr(e), "target_folder": folder}
+        meta = {**body.meta, "saved": False, "save_error": repr(e), "target_folder": str(plan.folder)}
+    # 응답 markdown = 노트 본문 (디버깅할 때 편함). 원문 폴백/기본 노트는 앞부분만 — 큰 대화를 응답(작업 큐면 결과 행)에
+    # 한 벌 더 싣지 않음
+    markdown = body.parts[0] if len(body.parts) == 1 else parts_head(body.parts, settings.RAW_NOTE_PREVIEW_CHARS)
+    if len(markdown) < sum(map(len, body.parts)):
+        meta["markdown_truncated"] = True
+    return AnalyzeRes(meta=meta, markdown=markdown)
+
+@dataclass
+class SavePlan:
+    """
+    저장 한 번의 입력: 볼트/폴더, 모드(초안/교체 작업), 증분 기준점 또는 교체할 초안, 지문/해시.
+    """
+    req: AnalyzeReq
+    vault: Vault
+    folder: Path
+    conv: List[Dict[str, Any]]
+    fingerprint: str
+    content_hash: str
+    created: str                                 # 증분 병합/초안 교체면 최초 생성 시각 유지
+    draft: bool = False
+    refine: Dict[str, Any] | None = None
+    incremental: bool = False
+    state: Dict[str, Any] | None = None          # 증분 기준점 (이미 분석한 앞부분)
+    draft_state: Dict[str, Any] | None = None    # 같은 스레드의 초안 파일 (교체 대상, 분석 기준점 아님)
+
+    @property
+    def status(self) -> str | None:
+        return "draft" if self.draft else ("final" if self.refine else None)
+
+    @property
+    def target(self) -> str | None:
+        # 교체할 기존 파일 (None 이면 새 파일)
+        return (self.refine or self.state or self.draft_state or {}).get("file")
+
+@dataclass
+class NoteBody:
+    """
+    분석 결과 + 폴백을 거친 노트 본문. parts = 본문 조각 (원문 폴백은 메시지 본문을 잇지 않고 조각째로 파일에 씀)
+    """
+    meta: Dict[str, Any]
+    md: str                              # 분석 마크다운 (증분 기준점으로 기록)
+    parts: List[str]
+    analyzed: bool = True                # 분석 성공 → 다음 증분의 기준점
+    degraded: bool = False
+    content_hash: str | None = None      # 중복 판정 해시 (초안/기본 노트는 None → 다음 저장 때 다시 분석)
+
+    @property
+    def title(self) -> str:
+        return self.meta.get("title") or "Conversation_Note"
 
-    # 5) res.markdown을 우리가 최종 md로 갱신해 돌려주자 (디버깅할 때 편함)
-    res.markdown = md
-    return res
+    @property
+    def tags(self) -> list:
+        return self.meta.get("tags", [])
+
+async def plan_save(req: AnalyzeReq, draft: bool = False, refine: Dict[str, Any] | None = None) -> SavePlan:
+    vault = vault_registry.for_project(req.project, req.vault)
+    conv = req.messages()
+    incremental = settings.INCREMENTAL_ANALYSIS if req.incremental is None else req.incremental
+    with stage("incremental_lookup"):
+        state = await asyncio.to_thread(incremental_store.lookup, req.project, conv) if incremental else None
+    if state and not (Path(state.get("file") or "").exists() and vault.owns(state["file"])):
+        # 노트 파일이 지워졌거나 다른 볼트에 있으면 처음부터 다시
+        state = None
+    draft_state = None
+    if state and state.get("draft"):
+        # 초안 상태는 분석 기준점이 아니라 교체할 파일만 (같은 스레드를 다시 저장하면 새 파일 대신 그 초안을 교체)
+        draft_state, state = state, None
+    created = (refine or state or draft_state or {}).get("created") or datetime.now(timezone.utc).isoformat()
+    return SavePlan(req=req, vault=vault, folder=vault.folder(req.project), conv=conv,
+                    fingerprint=conversation_fingerprint(conv), content_hash=content_hash_of(conv), created=created,
+                    draft=draft, refine=refine, incremental=incremental, state=state, draft_state=draft_state)
+
+async def save_shortcut(plan: SavePlan) -> AnalyzeRes | None:
+    """
+    LLM 없이 끝나는 저장: 교체할 초안이 바뀜 / 초안 그대로 / 새 턴 없음 / 같은 대화가 이미 저장됨. 아니면 None.
+    """
+    turns = len(plan.conv)
+    if plan.refine:
+        skipped = await _refine_skipped(plan.refine, turns)
+        if skipped:
+            return skipped
+    if plan.draft and plan.draft_state and plan.draft_state["turns"] == turns:
+        print(f"[save+analyze] draft unchanged → reuse {plan.draft_state['file']}")
+        SAVE_RESULTS.inc("unchanged")
+        return AnalyzeRes(meta={**(plan.draft_state.get("meta") or {}), "file": plan.draft_state["file"], "saved": True,
+                                "status": "draft"}, markdown="")
+    if plan.state and plan.state["turns"] == turns:
+        # 증분: 이미 분석한 앞부분 뒤로 새 턴이 없으면 그대로 반환
+        print(f"[save+analyze] no new turns → reuse {plan.state['file']}")
+        SAVE_RESULTS.inc("unchanged")
+        meta = {**(plan.state.get("meta") or {}), "file": plan.state["file"], "saved": True, "incremental": True,
+                "new_turns": 0}
+        return AnalyzeRes(meta=meta, markdown=plan.state.get("markdown") or "")
+    if not plan.state and not plan.draft_state and not plan.refine:
+        return await find_duplicate(plan.req, plan.vault, plan.content_hash)
+    return None
+
+async def run_analysis(plan: SavePlan, gate: Gate | None = None, allow_degraded: bool = False) -> tuple[AnalyzeRes, bool]:
+    """
+    LLM 분석 (증분이면 새 턴만, 초안이면 작은 모델) → (결과, degraded). 실패는 빈 결과 (compose_note 가 폴백).
+    포화(Rejected)는 allow_degraded 일 때만 degraded, 아니면 그대로 올림.
+    """
+    req, state = plan.req, plan.state
+    try:
+        if plan.draft:
+            # 증분 초안은 LLM 없이 (이전 노트 + 새 턴)
+            return (await draft_analysis(req) if not state else AnalyzeRes(meta={}, markdown="")), False
+        if state:
+            return await analyze_increment(req, state.get("meta") or {}, state.get("markdown") or "",
+                                           start=state["turns"], gate=gate), False
+        return await analyze(req, gate), False
+    except Rejected:
+        if not allow_degraded:
+            raise
+        admission.degraded()
+        return AnalyzeRes(meta={}, markdown=""), True
+    except Exception as e:
+        print("[save+analyze] analyze() failed:", repr(e))
+        return AnalyzeRes(meta={}, markdown=""), False
+
+def compose_note(plan: SavePlan, res: AnalyzeRes, degraded: bool = False) -> NoteBody:
+    """
+    결과 검증 + 폴백 → 노트 본문. 교체 작업(refine)인데 분석이 실패/너무 짧으면 RuntimeError
+    (원문 폴백으로 초안을 덮지 않음 → 작업 재시도, JOBS_MAX_ATTEMPTS 뒤엔 초안이 남음)
+    """
+    req, conv, state = plan.req, plan.conv, plan.state
+    md = (res.markdown or "").strip()
+    if plan.refine and _too_short(md):
+        raise RuntimeError("refine: analysis failed or too short")
+    body = NoteBody(meta=dict(res.meta or {}), md=md, parts=[md], degraded=degraded, content_hash=plan.content_hash)
+    if plan.draft:
+        # 초안은 다음 중복 판정/증분 기준에서 빼서 큰 모델 결과만 기준이 되게
+        body.analyzed, body.content_hash = False, None
+        if _too_short(md):
+            # 작은 모델이 없거나 실패 → 약점 힌트 요약 + 기본 노트 (증분이면 이전 노트 + 새 턴 요약/원문)
+            print("[save+analyze] draft without LLM")
+            hints = req.weakness_hints or build_weakness_hints(conv)
+            if state:
+                turns = state["turns"]
+                body.parts = [(state.get("markdown") or "").strip(), "\n\n---\n", draft_summary(conv, hints, start=turns),
+                              "\n", *iter_raw_conversation(conv[turns:])]
+            else:
+                body.meta = basic_meta(req)
+                body.parts = [draft_summary(conv, hints), "\n", *iter_basic_markdown(req.project, conv)]
+    elif degraded and not state:
+        # LLM 포화: 기본 노트를 바로 저장. 중복 해시를 남기지 않아 다음 저장 때 제대로 분석됨
+        print("[save+analyze] LLM saturated → degraded basic note")
+        body.analyzed, body.content_hash = False, None
+        body.meta = degraded_meta(req)
+        body.parts = list(iter_basic_markdown(req.project, conv))
+    elif _too_short(md):
+        body.analyzed = False
+        if state:
+            # 증분 실패(또는 포화) → 이전 노트 뒤에 새 턴 원문만 덧붙임
+            print("[save+analyze] incremental markdown too short → append raw new turns")
+            body.parts = [(state.get("markdown") or "").strip(), "\n\n---\n", *iter_raw_conversation(conv[state["turns"]:])]
+        else:
+            # 너무 짧거나 비면 원본 대화로 폴백
+            print("[save+analyze] markdown too short → fallback to raw conversation")
+            body.parts = list(iter_raw_conversation(conv))
+    if state:
+        # 모델이 전체 JSON 을 냈으면 그대로 (해결된 항목 삭제 반영), 파싱이 깨졌을 때만 이전 항목과 합침
+        body.meta = merge_meta(state.get("meta") or {}, body.meta, complete=res._status == "ok")
+    return body
+
+async def render_note(plan: SavePlan, body: NoteBody) -> tuple[list[str], tuple]:
+    """
+    관련 노트 top-k ([[wikilink]], 초안/기본 노트는 생략) + 프런트매터 → (파일 조각, (임베딩 키, 벡터, 관련 노트))
+    """
+    related = (None, None, [])
+    if not body.degraded and not plan.draft:
+        related = await related_notes(plan.vault, body.title, body.tags, body.parts,
+                                      [plan.state["file"]] if plan.state else ())
+    with stage("frontmatter"):
+        note = note_parts(
+            body.parts + [related_section(related[2])],
+            title=body.title,
+            project=plan.req.project,
+            source=plan.req.source,
+            turns=len(plan.conv),
+            tags=body.tags,
+            created=plan.created,
+            extra={"status": plan.status, "fingerprint": plan.fingerprint, "content_hash": body.content_hash,
+                   **search_frontmatter(body.meta), "related": related_frontmatter(related[2])},
+        )
+    return note, related
+
+async def write_note(plan: SavePlan, body: NoteBody, note: list[str]) -> str:
+    # 초안 교체/증분이면 기존 파일 교체, 아니면 새 파일 (볼트별 writer)
+    with stage("write"):
+        if plan.target:
+            path = await plan.vault.writer.replace(plan.target, note)
+        else:
+            path = await plan.vault.writer.create(plan.folder, note_stem(body.title), note)
+    print(f"[save+analyze] saved: {path} (len={sum(map(len, note))})")
+    return path
+
+async def after_save(plan: SavePlan, body: NoteBody, path: str, note_len: int, related: tuple) -> Dict[str, Any]:
+    """
+    저장 후: 인덱스/임베딩, 초안이면 교체 작업 등록, 증분 기준점 기록, 결과 집계 → 응답 meta
+    """
+    req, conv, state = plan.req, plan.conv, plan.state
+    emb_key, emb_vec, notes = related
+    await index_note(path, req, body.title, body.tags, plan.created, plan.fingerprint, body.content_hash, emb_key, emb_vec)
+    # 응답에 파일 경로/길이 첨부해서 확장 콘솔에서 바로 확인 가능
+    meta = {**body.meta, "file": path, "saved": True, "body_len": note_len, "vault": plan.vault.name}
+    if state:
+        meta.update({"incremental": True, "new_turns": len(conv) - state["turns"]})
+    if plan.status:
+        meta["status"] = plan.status
+    if plan.draft:
+        meta.update(await enqueue_refine(req, plan.vault, path, plan.created))
+    if plan.incremental and body.analyzed:
+        # 분석이 성공했을 때만 다음 증분의 기준점으로
+        with stage("incremental_put"):
+            await asyncio.to_thread(
+                incremental_store.put, req.project, plan.fingerprint, conversation=conv,
+                meta=body.meta, markdown=body.md, file=path, created=plan.created, content_hash=plan.content_hash)
+    elif plan.incremental and plan.draft and not state:
+        # 초안 파일도 기록 (draft 표시 → 다음 저장은 증분이 아니라 이 파일을 교체). 해시는 put 이 전체 대화로 계산
+        with stage("incremental_put"):
+            await asyncio.to_thread(
+                incremental_store.put, req.project, plan.fingerprint, conversation=conv,
+                meta={"title": body.title, "tags": body.tags}, markdown="", file=path, created=plan.created, draft=True)
+    if notes:
+        meta["related"] = [n["path"] for n in notes]
+    if body.degraded:
+        meta["degraded"] = True
+    SAVE_RESULTS.inc("draft" if plan.draft else "refined" if plan.refine else "degraded" if body.degraded
+                     else "analyzed" if body.analyzed else ("incremental_fallback" if state else "fallback"))
+    return meta
+
+async def _refine_skipped(refine: Dict[str, Any], turns: int) -> AnalyzeRes | None:
+    # 초안이 지워졌거나 사용자가 고쳐서 status: draft 가 아니면 건드리지 않음.
+    # 더 긴 대화로 초안이 다시 저장됐으면 그 초안의 작업이 교체함 (이 작업은 옛 대화)
+    fm = await asyncio.to_thread(_note_frontmatter, refine["file"])
+    if fm is None:
+        reason = "draft removed"
+    elif fm.get("status") != "draft":
+        reason = "draft changed"
+    elif fm.get("turns") != turns:
+        reason = "draft superseded"
+    else:
+        return None
+    print(f"[save+analyze] draft {refine['file']}: {reason} → skip refine")
+    SAVE_RESULTS.inc("refine_skipped")
+    return AnalyzeRes(meta={"file": refine["file"], "saved": False, "refined": False, "reason": reason}, markdown="")
+
+async def enqueue_refine(req: AnalyzeReq, vault: Vault, path: str, created: str) -> Dict[str, Any]:
+    """
+    초안 → 큰 모델 분석 작업 (SQLite 작업 큐라 서버를 재시작해도 이어서 처리). 큐가 가득 차면 초안만 남음.
+    """
+    payload = {**req.model_dump(exclude={"draft"}), "vault": vault.name, "refine": {"file": path, "created": created}}
+    try:
+        job_id, _ = await asyncio.to_thread(job_queue.enqueue, "refine", payload)
+    except QueueFull as e:
+        print("[save+analyze] refine not queued:", repr(e))
+        return {"refine_error": str(e)}
+    return {"refine_job": job_id, "refine_status_url": f"/api/jobs/{job_id}"}
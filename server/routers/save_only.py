@@ -1,15 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Literal
-from server.utils.fs import write_markdown
-from pathlib import Path
-import os
-VAULT_PATH = Path(
-    os.environ.get(
-        "OBSIDIAN_VAULT_DIR",
-        str(Path.home() / "ObsidianVaultDev")  # 개발용 기본
-    )
-)
+from datetime import datetime
+
+from ..services.formatters import iter_basic_markdown
+from ..services.ingest import json_body
+from ..services.vaults import vault_registry, VaultError
 
 class Msg(BaseModel):
     role: Literal["user","assistant","system"]="user"
@@ -19,19 +15,16 @@ class SaveReq(BaseModel):
     project: str="General"
     source: str="extension"
     conversation: List[Msg]=[]
+    vault: str | None = None       # 볼트 이름 (None 이면 PROJECT_VAULTS → VAULT_DEFAULT)
+    vault_dir: str | None = None   # 하위호환: 볼트 이름 또는 등록된 볼트 안의 폴더만 (그 밖은 400)
 
 router = APIRouter()
 
-def _md_from_conv(conv: List[Msg]) -> str:
-    lines = []
-    for m in conv:
-        who = "👤 User" if m.role=="user" else ("🤖 Assistant" if m.role=="assistant" else "🛠 System")
-        lines.append(f"### {who}\n{m.content}\n")
-    return "\n---\n".join(lines)
-
+# 하위호환: 분석 없이 저장 (LLM 을 건드리지 않으므로 openai/httpx 도 올라오지 않음)
+# 본문은 조각째로 파일에 씀 (큰 대화도 노트 전체 문자열을 만들지 않음)
 @router.post("/api/conversation/save")
-def save_only(req: SaveReq):
-    md = _md_from_conv(req.conversation) or "_(빈 대화)_"
+async def save_only(req: SaveReq = Depends(json_body(SaveReq))):
+    conv = [m.model_dump() for m in req.conversation]
     fm = (
         f"---\n"
         f"title: Raw_Conversation\n"
@@ -40,5 +33,14 @@ def save_only(req: SaveReq):
         f"turns: {len(req.conversation)}\n"
         f"---\n\n"
     )
-    path = write_markdown(VAULT_PATH / req.project, "Raw_Conversation", fm + md)
-    return {"ok": True, "file": path}
+    try:
+        if req.vault_dir and not req.vault:
+            vault, folder = vault_registry.from_dir(req.vault_dir, req.project)
+        else:
+            vault = vault_registry.for_project(req.project, req.vault)
+            folder = vault.folder(req.project)
+    except VaultError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    path = await vault.writer.create(folder, f"conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                                     [fm, *iter_basic_markdown(req.project, conv)])
+    return {"ok": True, "status": "success", "file": path, "vault": vault.name}
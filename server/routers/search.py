@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Query
+import asyncio
+
+from ..services.search import search_index
+
+router = APIRouter()
+
+@router.get("/api/search")
+async def search_notes(q: str = Query(..., min_length=1, max_length=500), project: str | None = None,
+                       limit: int = Query(20, ge=1, le=200)):
+    """
+    노트 전문/태그 검색 (BM25, 제목·태그·약한 개념·용어 가중). 한글은 2-gram 부분 일치.
+    """
+    return await asyncio.to_thread(search_index.search, q, project, limit)
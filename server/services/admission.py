@@ -0,0 +1,213 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from ..config import settings
+from .metrics import ADMISSION_RESULTS, record_stage
+
+# LLM 분석 라우트 앞단의 입장 제어
+# - 동시 LLM 작업 상한(max_concurrent) + 길이 제한 대기열(max_queue, FIFO)
+# - 예상 대기 = 평균 처리 시간(EWMA) × (앞선 대기 수 + 1) / 상한. 예상 대기 + 처리 시간이 클라이언트 타임아웃을 넘으면
+#   줄 세우지 않고 바로 503 + Retry-After (어차피 타임아웃날 요청이 슬롯을 차지해 전부 실패하는 것을 막음)
+# - 소스(클라이언트 IP + source)별 토큰 버킷 → 초과 시 429 + Retry-After
+# - 백그라운드 경로(작업 큐, 대량 가져오기)는 같은 슬롯을 쓰되 거절/레이트리밋 없이 기다림
+
+INITIAL_SERVICE_S = 20.0   # 측정 전 분석 1건 예상 시간 (첫 측정값으로 바로 교체)
+EWMA_ALPHA = 0.2
+MAX_BUCKETS = 10_000
+
+
+class Rejected(Exception):
+    def __init__(self, status: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(self.retry_after)}
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 16, client_timeout_s: float = 180.0,
+                 rate_per_min: float = 30.0, burst: float = 10.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.client_timeout_s = client_timeout_s
+        self.rate_per_s = rate_per_min / 60.0
+        self.burst = max(1.0, burst)
+        self.active = 0
+        self.service_s = INITIAL_SERVICE_S
+        self.completed = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.counts: Dict[str, int] = {}
+
+    # --- 레이트 리밋 ---
+    def _take_token(self, key: str, now: float) -> float:
+        """
+        토큰 1개 사용. 0 이면 통과, 아니면 다음 토큰까지 남은 초.
+        """
+        if self.rate_per_s <= 0:
+            return 0.0
+        b = self._buckets.get(key)
+        if b is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._evict(now)
+            b = self._buckets[key] = TokenBucket(self.burst, now)
+        b.tokens = min(self.burst, b.tokens + (now - b.updated) * self.rate_per_s)
+        b.updated = now
+        if b.tokens >= 1.0:
+            b.tokens -= 1.0
+            return 0.0
+        return (1.0 - b.tokens) / self.rate_per_s
+
+    def _evict(self, now: float) -> None:
+        # 다 찬(= 한동안 안 쓴) 버킷만 버림 → 다시 오면 새 버킷(가득 참)이라 결과가 같음
+        full_after = self.burst / self.rate_per_s
+        for k in [k for k, b in self._buckets.items() if now - b.updated >= full_after]:
+            del self._buckets[k]
+
+    # --- 대기 예측 ---
+    def predicted_wait(self) -> float:
+        if self.active < self.max_concurrent and not self._waiters:
+            return 0.0
+        return self.service_s * (len(self._waiters) + 1) / self.max_concurrent
+
+    def _count(self, result: str) -> None:
+        self.counts[result] = self.counts.get(result, 0) + 1
+        ADMISSION_RESULTS.inc(result)
+
+    def check_rate(self, key: str, now: Optional[float] = None) -> None:
+        """
+        토큰 버킷만 검사 (작업 큐 등록처럼 LLM 슬롯을 바로 잡지 않는 경로). 초과면 Rejected(429).
+        """
+        wait = self._take_token(key, time.monotonic() if now is None else now)
+        if wait > 0:
+            self._count("rate_limited")
+            raise Rejected(429, f"rate limit: {self.rate_per_s * 60:.0f}/min per client", wait)
+
+    def admit(self, key: str, timeout_s: Optional[float] = None) -> float:
+        """
+        대화형 요청 입장 심사 (레이트 리밋 + 포화). 통과하면 대기 마감 시각(monotonic) 반환, 아니면 Rejected(429/503).
+        """
+        self.check_rate(key)
+        return self.reserve(timeout_s)
+
+    def reserve(self, timeout_s: Optional[float] = None) -> float:
+        """
+        포화 심사만 (LLM 을 부르기 직전에). 통과하면 대기 마감 시각(monotonic), 아니면 Rejected(503).
+        """
+        now = time.monotonic()
+        timeout_s = timeout_s or self.client_timeout_s
+        self._shed(timeout_s - self.service_s)
+        # 줄에서 기다릴 수 있는 마지막 시각: 그 뒤에 시작하면 처리 중에 클라이언트가 끊음
+        return now + max(0.0, timeout_s - self.service_s)
+
+    def _shed(self, wait_budget: float) -> None:
+        if self.active >= self.max_concurrent and len(self._waiters) >= self.max_queue:
+            self._count("shed_queue_full")
+            raise Rejected(503, f"analysis queue is full ({len(self._waiters)} waiting)", self.predicted_wait())
+        predicted = self.predicted_wait()
+        # 빈 슬롯이 있으면 (예상 대기 0) 처리 시간 추정과 상관없이 받음 — 추정치가 틀렸을 수 있으니 시도는 해 봄
+        if predicted > max(0.0, wait_budget):
+            self._count("shed_deadline")
+            raise Rejected(503, f"predicted wait {predicted:.0f}s exceeds the client's budget "
+                                f"{max(0.0, wait_budget):.0f}s", predicted)
+
+    # --- 슬롯 ---
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None):
+        """
+        LLM 작업 슬롯. deadline(monotonic) 까지 못 들어가면 Rejected(503). None 이면 무기한 대기 (백그라운드).
+        """
+        t0 = time.monotonic()
+        if self.active >= self.max_concurrent or self._waiters:
+            if deadline is not None:
+                # admit() 와 슬롯 사이에 다른 요청이 먼저 들어왔을 수 있으니 줄 서기 직전에 한 번 더
+                self._shed(deadline - t0)
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - t0)
+                await asyncio.wait_for(asyncio.shield(fut), timeout)
+            except asyncio.TimeoutError:
+                self._drop(fut)
+                self._count("timeout_in_queue")
+                raise Rejected(503, "timed out waiting for an analysis slot", self.predicted_wait())
+            except BaseException:
+                self._drop(fut)
+                raise
+            # 깨운 쪽(_release)이 이미 active 를 넘겨줬음
+        else:
+            self.active += 1
+        record_stage("admission_wait", time.monotonic() - t0)
+        self._count("admitted")
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            dt = time.monotonic() - started
+            self.service_s = dt if not self.completed else EWMA_ALPHA * dt + (1 - EWMA_ALPHA) * self.service_s
+            self.completed += 1
+            self._release()
+
+    def _drop(self, fut: asyncio.Future) -> None:
+        if fut.done() and not fut.cancelled():
+            # 깨워진 직후 취소됨 → 넘겨받은 슬롯을 다음 사람에게
+            self._release()
+            return
+        fut.cancel()
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def _release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)  # 슬롯을 그대로 넘김 (active 유지)
+                return
+        self.active -= 1
+
+    def degraded(self) -> None:
+        # 거절 대신 LLM 없는 기본 노트로 응답한 횟수
+        self._count("degraded")
+
+    def stats(self) -> Dict[str, object]:
+        return {"active": self.active, "queued": len(self._waiters), "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue, "service_s": round(self.service_s, 2),
+                "predicted_wait_s": round(self.predicted_wait(), 2), **self.counts}
+
+
+def client_key(host: Optional[str], source: Optional[str]) -> str:
+    return f"{host or '-'}|{source or '-'}"
+
+
+def request_timeout(header: Optional[str]) -> Optional[float]:
+    # 확장이 X-Client-Timeout: <초> 로 자신의 타임아웃을 알려 주면 그 기준으로 판단
+    try:
+        return float(header) if header else None
+    except ValueError:
+        return None
+
+
+admission = AdmissionController(
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    client_timeout_s=settings.ADMISSION_CLIENT_TIMEOUT,
+    rate_per_min=settings.RATE_LIMIT_PER_MIN,
+    burst=settings.RATE_LIMIT_BURST,
+)
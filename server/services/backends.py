@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional
+
+from ..config import settings
+from .metrics import LLM_ATTEMPT_SECONDS, LLM_FAILOVERS, record_stage, record_tokens
+
+if TYPE_CHECKING:
+    import httpx  # 실제 import 는 첫 호출 때 (기동 시간)
+
+# 여러 Ollama/OpenAI 호환 서버를 묶는 백엔드 레지스트리
+# - 디스패치: 회로가 닫힌(또는 반개방 시험 중인) 백엔드 중 ewma_latency * (outstanding + 1) 최소
+# - 연속 실패 LLM_CIRCUIT_FAILURES 회 → LLM_CIRCUIT_COOLDOWN 초 동안 제외 (이후 1건 시험 통과 시 복구)
+# - API 종류(openai / ollama)를 백엔드별로 기억 → 안 되는 쪽을 매 호출마다 다시 찔러보지 않음
+# - 구조화 출력(JSON 모드) 지원 여부도 기억: 400/422 로 거절하면 이후 그 백엔드엔 일반 요청만
+# - 주기적 헬스체크로 죽은 백엔드를 요청 전에 미리 걸러냄
+# - 백엔드마다 모델이 다를 수 있음 → 실제로 응답한 모델을 served_model 에 (분석 캐시 키)
+# - 요청 형식 4xx 만 바로 실패. 모델 없음(404)/인증/과부하 4xx 는 그 백엔드 사정이라 다음 백엔드로
+
+OPENAI = "openai"
+OLLAMA = "ollama"
+_UNSUPPORTED = (404, 405, 501)
+_BACKEND_4XX = (401, 403, 408, 409, 429)   # 요청이 아니라 그 백엔드 사정(인증/타임아웃/과부하) → 다른 백엔드로
+
+# 현재 요청(태스크)에서 마지막으로 응답한 백엔드의 모델
+served_model: ContextVar[Optional[str]] = ContextVar("gpt2note_served_model", default=None)
+
+
+class LLMError(Exception):
+    pass
+
+
+class BadRequest(LLMError):
+    """요청 자체 문제(400/413/422 등). 다른 백엔드로 넘겨도 같으므로 페일오버하지 않음."""
+
+
+class ModelNotFound(LLMError):
+    """이 백엔드에 요청한 모델이 없음 (404). 다른 백엔드로 넘기되 회로 차단기 실패로는 세지 않음 (다른 모델은 멀쩡)."""
+
+
+@dataclass
+class Backend:
+    base_url: str
+    model: str
+    flavor: Optional[str] = None          # 확인된 API 종류, None = 아직 모름
+    structured: Optional[bool] = None     # JSON 모드 지원 여부, None = 아직 모름
+    ewma_ms: float = 0.0                   # 0 = 측정 전 (먼저 시도되도록 가장 빠른 것으로 취급)
+    outstanding: int = 0
+    failures: int = 0
+    open_until: float = 0.0
+    healthy: bool = True
+    requests: int = 0
+    errors: int = 0
+    last_error: Optional[str] = None
+    sem: asyncio.Semaphore = field(default_factory=lambda: asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY), repr=False)
+
+    @property
+    def name(self) -> str:
+        return self.base_url
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.open_until
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url, "model": self.model, "flavor": self.flavor, "structured": self.structured,
+            "ewma_ms": round(self.ewma_ms, 1), "outstanding": self.outstanding,
+            "healthy": self.healthy, "circuit_open": time.time() < self.open_until,
+            "requests": self.requests, "errors": self.errors, "last_error": self.last_error,
+        }
+
+
+def _root(url: str) -> str:
+    # ".../v1" 로 적어도 서버 루트로 정규화 (/v1/chat/completions, /api/chat 둘 다 여기서 붙임)
+    url = url.rstrip("/")
+    return url[:-3] if url.endswith("/v1") else url
+
+
+def parse_backends(spec: str, default_url: str, default_model: str) -> List[Backend]:
+    """
+    "http://box1:11434|llama3.1:8b, http://box2:11434" → Backend 목록 (모델 생략 시 기본 모델)
+    """
+    out = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, model = item.partition("|")
+        out.append(Backend(base_url=_root(url.strip()), model=model.strip() or default_model))
+    return out or [Backend(base_url=_root(default_url), model=default_model)]
+
+
+class BackendRegistry:
+    def __init__(self, backends: List[Backend], *, failure_threshold: int = 3, cooldown_s: float = 30.0,
+                 alpha: float = 0.3, health_interval_s: float = 15.0):
+        self.backends = backends
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.alpha = alpha
+        self.health_interval_s = health_interval_s
+        self._health_task: Optional[asyncio.Task] = None
+
+    # --- 선택/기록 ---
+    def pick(self, exclude: set) -> Optional[Backend]:
+        now = time.time()
+        cands = [b for b in self.backends if b.name not in exclude and b.available(now)]
+        if not cands:
+            # 전부 막혔으면 회로가 가장 먼저 풀리는 것이라도 시도 (요청을 그냥 버리지 않음)
+            rest = [b for b in self.backends if b.name not in exclude]
+            if not rest:
+                return None
+            return min(rest, key=lambda b: b.open_until)
+        return min(cands, key=lambda b: (b.ewma_ms * (b.outstanding + 1), b.outstanding))
+
+    def _success(self, b: Backend, elapsed_ms: float) -> None:
+        b.ewma_ms = elapsed_ms if b.ewma_ms == 0 else self.alpha * elapsed_ms + (1 - self.alpha) * b.ewma_ms
+        b.failures = 0
+        b.open_until = 0.0
+        b.healthy = True
+
+    def _failure(self, b: Backend, err: Exception) -> None:
+        b.errors += 1
+        b.last_error = repr(err)
+        if isinstance(err, ModelNotFound):
+            return
+        b.failures += 1
+        if b.failures >= self.failure_threshold:
+            b.open_until = time.time() + self.cooldown_s
+            print(f"[backends] circuit open: {b.name} for {self.cooldown_s:.0f}s ({b.last_error})")
+
+    # --- API 종류별 요청 ---
+    def _payload(self, flavor: str, b: Backend, messages, temperature, max_tokens, model, stream,
+                 json_mode: bool = False) -> tuple[str, Dict]:
+        use_model = model or b.model
+        if flavor == OPENAI:
+            payload = {
+                "model": use_model, "messages": messages, "temperature": temperature,
+                "max_tokens": max_tokens, "stream": stream,
+            }
+            if json_mode:
+                payload["response_format"] = {"type": "json_object"}
+            return f"{b.base_url}/v1/chat/completions", payload
+        payload = {
+            "model": use_model, "messages": messages, "stream": stream,
+            "options": {"temperature": temperature, "num_predict": max_tokens, "num_ctx": settings.LLM_CONTEXT_TOKENS},
+        }
+        if json_mode:
+            payload["format"] = "json"
+        return f"{b.base_url}/api/chat", payload
+
+    def _flavors(self, b: Backend) -> List[str]:
+        return [b.flavor] if b.flavor else [OPENAI, OLLAMA]
+
+    @staticmethod
+    def _error(r: httpx.Response) -> LLMError:
+        # 4xx 중 모델 없음/백엔드 사정은 페일오버, 나머지(요청 형식/크기)만 BadRequest
+        detail = f"HTTP {r.status_code}: {r.text[:300]}"
+        text = r.text.lower()
+        if r.status_code == 404 or (r.status_code < 500 and "model" in text and "not found" in text):
+            return ModelNotFound(detail)
+        if r.status_code in _BACKEND_4XX or r.status_code >= 500:
+            return LLMError(detail)
+        return BadRequest(detail)
+
+    @classmethod
+    def _check(cls, r: httpx.Response) -> None:
+        if r.status_code >= 400:
+            raise cls._error(r)
+
+    @staticmethod
+    def _attempt(b: Backend, flavor: str, t0: float, outcome: str) -> None:
+        # API 종류별 시도 1회 (openai-compat 시도 → ollama 폴백 각각이 따로 보이게)
+        dt = time.perf_counter() - t0
+        LLM_ATTEMPT_SECONDS.observe(dt, b.name, flavor, outcome)
+        record_stage(f"llm_{flavor}", dt)
+
+    @staticmethod
+    def _usage(flavor: str, data: Dict[str, Any]) -> tuple:
+        if flavor == OPENAI:
+            u = data.get("usage") or {}
+            return u.get("prompt_tokens"), u.get("completion_tokens")
+        return data.get("prompt_eval_count"), data.get("eval_count")
+
+    async def _complete_once(self, http: httpx.AsyncClient, b: Backend, messages, temperature, max_tokens, model,
+                             json_mode: bool = False) -> str:
+        rejected: LLMError | None = None
+        for flavor in self._flavors(b):
+            use_json = json_mode and b.structured is not False
+            url, payload = self._payload(flavor, b, messages, temperature, max_tokens, model, False, use_json)
+            t0 = time.perf_counter()
+            try:
+                r = await http.post(url, json=payload)
+                if r.status_code in _UNSUPPORTED and b.flavor is None:
+                    self._attempt(b, flavor, t0, "unsupported")
+                    continue  # 이 종류의 API 없음 → 다음 종류
+                if use_json and b.structured is None and r.status_code in (400, 422):
+                    # JSON 모드 거절 → 기억해 두고 같은 API 로 일반 요청 (프롬프트가 JSON 을 요구하므로 파서가 처리)
+                    self._attempt(b, flavor, t0, "unsupported")
+                    print(f"[backends] {b.name}: structured output rejected (HTTP {r.status_code}), using plain requests")
+                    b.structured, use_json = False, False
+                    url, payload = self._payload(flavor, b, messages, temperature, max_tokens, model, False)
+                    t0 = time.perf_counter()
+                    r = await http.post(url, json=payload)
+                if b.flavor is None and 400 <= r.status_code < 500:
+                    # API 종류를 아직 모름: 이 종류가 요청 형식을 거절한 것일 수 있음 → 다른 종류로 (전부 4xx 면 마지막 응답 기준)
+                    self._attempt(b, flavor, t0, "unsupported")
+                    rejected = self._error(r)
+                    continue
+                self._check(r)
+                data = r.json()
+            except Exception:
+                self._attempt(b, flavor, t0, "error")
+                raise
+            self._attempt(b, flavor, t0, "ok")
+            b.flavor = flavor
+            if use_json:
+                b.structured = True
+            if flavor == OPENAI:
+                text = (data["choices"][0]["message"]["content"] or "").strip()
+            else:
+                text = ((data.get("message") or {}).get("content") or "").strip()
+            record_tokens(messages, text, *self._usage(flavor, data))
+            return text
+        if rejected is not None:
+            raise rejected
+        raise LLMError("no supported chat API (openai-compat / ollama)")
+
+    async def _stream_once(self, http: httpx.AsyncClient, b: Backend, messages, temperature, max_tokens, model,
+                           started: list) -> AsyncIterator[str]:
+        rejected: LLMError | None = None
+        for flavor in self._flavors(b):
+            url, payload = self._payload(flavor, b, messages, temperature, max_tokens, model, True)
+            t0 = time.perf_counter()
+            out: List[str] = []
+            usage: tuple = (None, None)
+            outcome = "error"
+            try:
+                async with http.stream("POST", url, json=payload) as r:
+                    if r.status_code in _UNSUPPORTED and b.flavor is None:
+                        outcome = "unsupported"
+                        continue
+                    if r.status_code >= 400:
+                        await r.aread()
+                        if b.flavor is None and r.status_code < 500:
+                            outcome = "unsupported"
+                            rejected = self._error(r)
+                            continue
+                        self._check(r)
+                    b.flavor = flavor
+                    async for delta, usage in self._stream_lines(r, flavor):
+                        if delta:
+                            started.append(True)
+                            out.append(delta)
+                            yield delta
+                    outcome = "ok"
+                    record_tokens(messages, "".join(out), *usage)
+                    return
+            finally:
+                self._attempt(b, flavor, t0, outcome)
+        if rejected is not None:
+            raise rejected
+        raise LLMError("no supported chat API (openai-compat / ollama)")
+
+    async def _stream_lines(self, r: httpx.Response, flavor: str) -> AsyncIterator[tuple]:
+        # (델타, 사용량) — 사용량은 마지막 청크에서만 채워짐 (ollama: done 청크, openai: usage 청크)
+        usage: tuple = (None, None)
+        async for line in r.aiter_lines():
+            line = line.strip()
+            if not line:
+                continue
+            if flavor == OPENAI:
+                if not line.startswith("data:"):
+                    continue
+                line = line[5:].strip()
+                if line == "[DONE]":
+                    break
+                chunk = json.loads(line)
+                choices = chunk.get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if chunk.get("usage"):
+                    usage = self._usage(flavor, chunk)
+            else:
+                chunk = json.loads(line)
+                delta = (chunk.get("message") or {}).get("content")
+                if chunk.get("done"):
+                    usage = self._usage(flavor, chunk)
+                    if not delta:
+                        yield None, usage
+                        break
+            yield delta, usage
+
+    # --- 공개 API ---
+    async def complete(self, http: httpx.AsyncClient, messages: List[Dict], *, temperature: float,
+                       max_tokens: int, model: Optional[str] = None, json_mode: bool = False) -> str:
+        import httpx
+        tried: set = set()
+        last: Exception | None = None
+        while True:
+            b = self.pick(tried)
+            if b is None:
+                raise LLMError(f"all LLM backends failed: {last!r}")
+            tried.add(b.name)
+            b.outstanding += 1
+            b.requests += 1
+            try:
+                async with b.sem:
+                    t0 = time.perf_counter()
+                    text = await self._complete_once(http, b, messages, temperature, max_tokens, model, json_mode)
+                self._success(b, (time.perf_counter() - t0) * 1000)
+                served_model.set(model or b.model)
+                return text
+            except BadRequest:
+                raise
+            except (httpx.HTTPError, LLMError, ValueError, KeyError) as e:
+                self._failure(b, e)
+                last = e
+                LLM_FAILOVERS.inc(b.name)
+                print(f"[backends] {b.name} failed, failing over:", repr(e))
+            finally:
+                b.outstanding -= 1
+
+    async def stream(self, http: httpx.AsyncClient, messages: List[Dict], *, temperature: float,
+                     max_tokens: int, model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        첫 토큰이 나오기 전 실패만 다른 백엔드로 넘김 (이미 보낸 토큰은 되돌릴 수 없음).
+        """
+        import httpx
+        tried: set = set()
+        last: Exception | None = None
+        while True:
+            b = self.pick(tried)
+            if b is None:
+                raise LLMError(f"all LLM backends failed: {last!r}")
+            tried.add(b.name)
+            b.outstanding += 1
+            b.requests += 1
+            started: list = []
+            try:
+                async with b.sem:
+                    t0 = time.perf_counter()
+                    async for delta in self._stream_once(http, b, messages, temperature, max_tokens, model, started):
+                        yield delta
+                self._success(b, (time.perf_counter() - t0) * 1000)
+                served_model.set(model or b.model)
+                return
+            except BadRequest:
+                raise
+            except (httpx.HTTPError, LLMError, ValueError, KeyError) as e:
+                self._failure(b, e)
+                last = e
+                if started:
+                    raise
+                LLM_FAILOVERS.inc(b.name)
+                print(f"[backends] {b.name} failed before first token, failing over:", repr(e))
+            finally:
+                b.outstanding -= 1
+
+    # --- 헬스체크 ---
+    async def check(self, http: httpx.AsyncClient, b: Backend) -> None:
+        # 모델 목록 엔드포인트만 가볍게 확인 (ollama: /api/tags, openai: /v1/models)
+        import httpx
+        paths = ["/api/tags", "/v1/models"] if b.flavor != OPENAI else ["/v1/models", "/api/tags"]
+        ok = False
+        for p in paths:
+            try:
+                r = await http.get(b.base_url + p, timeout=5.0)
+                if r.status_code < 400:
+                    ok = True
+                    break
+            except httpx.HTTPError as e:
+                b.last_error = repr(e)
+                break  # 연결 자체가 안 되면 다른 경로도 마찬가지
+        if ok and not b.healthy:
+            print(f"[backends] {b.name} is back")
+        if not ok and b.healthy:
+            print(f"[backends] {b.name} marked unhealthy")
+        b.healthy = ok
+
+    async def _health_loop(self, get_http: Callable[[], httpx.AsyncClient]) -> None:
+        http = get_http()
+        while True:
+            await asyncio.gather(*(self.check(http, b) for b in self.backends), return_exceptions=True)
+            await asyncio.sleep(self.health_interval_s)
+
+    def start(self, get_http: Callable[[], httpx.AsyncClient]) -> None:
+        # 백엔드가 하나면 헬스체크 없음 → HTTP 클라이언트도 첫 LLM 호출 때까지 만들지 않음
+        if len(self.backends) > 1 and self.health_interval_s > 0:
+            self._health_task = asyncio.create_task(self._health_loop(get_http))
+
+    async def stop(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [b.snapshot() for b in self.backends]
+
+    def models(self) -> List[str]:
+        # 설정된 백엔드 모델 (중복 제거, 설정 순서)
+        return list(dict.fromkeys(b.model for b in self.backends))
+
+
+backend_registry = BackendRegistry(
+    parse_backends(settings.LLM_BACKENDS, settings.LOCAL_LLM_BASE_URL, settings.LOCAL_LLM_MODEL),
+    failure_threshold=settings.LLM_CIRCUIT_FAILURES,
+    cooldown_s=settings.LLM_CIRCUIT_COOLDOWN,
+    alpha=settings.LLM_EWMA_ALPHA,
+    health_interval_s=settings.LLM_HEALTH_INTERVAL,
+)
@@ -0,0 +1,278 @@
+import asyncio
+import codecs
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set
+
+from .tokens import estimate_conversation_tokens, estimate_tokens
+from .weakness_hints import build_weakness_hints_batch
+
+# ChatGPT 데이터 내보내기(conversations.json) 대량 가져오기
+# - JsonArrayStream: 최상위 배열을 원소 단위로 잘라내는 증분 파서 (파일 전체를 메모리에 올리지 않음)
+# - export_to_conversation: mapping 트리 → [{"role","content"}, ...]
+# - run_import: 동시성 상한이 있는 분석 파이프라인 + 체크포인트(재개) + 처리량 통계
+
+_special = re.compile(r'[\[\]{}"]')
+_string_end = re.compile(r'["\\]')
+
+
+class JsonArrayStream:
+    """
+    feed(text) -> 이번 조각으로 완성된 최상위 배열 원소들.
+    중괄호/대괄호 깊이와 문자열 상태만 추적하며 특수문자 사이를 정규식으로 건너뛴다(선형 시간).
+    완성된 원소 하나만 json.loads 하므로 메모리는 "가장 큰 대화 하나" 수준.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0          # 다음에 스캔할 위치
+        self._start = -1       # 현재 원소 시작 위치
+        self._depth = 0        # 최상위 배열 = 1
+        self._in_string = False
+        self._started = False
+
+    def feed(self, text: str) -> List[Any]:
+        self._buf += text
+        out: List[Any] = []
+        buf, i, n = self._buf, self._pos, len(self._buf)
+        while i < n:
+            if self._in_string:
+                m = _string_end.search(buf, i)
+                if m is None:
+                    i = n
+                    break
+                if m.group() == "\\":
+                    if m.end() >= n:       # 이스케이프가 조각 경계에 걸림 → 다음 feed 에서
+                        i = m.start()
+                        break
+                    i = m.end() + 1
+                    continue
+                self._in_string = False
+                i = m.end()
+                continue
+            m = _special.search(buf, i)
+            if m is None:
+                i = n
+                break
+            ch, i = m.group(), m.end()
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._start < 0:
+                    self._start = m.start()
+            elif ch in "[{":
+                if not self._started:
+                    if ch != "[":
+                        raise ValueError("export must be a JSON array of conversations")
+                    self._started = True
+                    self._depth = 1
+                    continue
+                if self._depth == 1 and self._start < 0:
+                    self._start = m.start()
+                self._depth += 1
+            else:  # ] }
+                self._depth -= 1
+                if self._depth == 1 and self._start >= 0:
+                    out.append(json.loads(buf[self._start:i]))
+                    self._start = -1
+        # 소비한 앞부분은 버퍼에서 잘라냄
+        cut = self._start if self._start >= 0 else i
+        self._buf = buf[cut:]
+        self._pos = i - cut
+        if self._start >= 0:
+            self._start = 0
+        return out
+
+
+def iter_json_array(path: str | Path, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    stream = JsonArrayStream()
+    with open(path, "rb") as f:
+        while True:
+            raw = f.read(chunk_size)
+            yield from stream.feed(decoder.decode(raw, final=not raw))
+            if not raw:
+                break
+
+
+def _message_text(msg: Dict[str, Any]) -> str:
+    content = msg.get("content") or {}
+    parts = content.get("parts")
+    if parts is None and "text" in content:
+        parts = [content["text"]]
+    # 이미지/파일 등 dict 파트는 건너뜀
+    return "\n".join(p for p in (parts or []) if isinstance(p, str)).strip()
+
+
+def export_to_conversation(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    내보내기 원소 하나 → {"id", "title", "create_time", "conversation": [...]}
+    current_node 에서 parent 를 따라 올라가 실제로 보이는 분기만 복원한다.
+    이미 {"conversation": [...]} 형태면 그대로 사용.
+    """
+    conv_id = item.get("id") or item.get("conversation_id")
+    if isinstance(item.get("conversation"), list):
+        return {"id": conv_id, "title": item.get("title"), "create_time": item.get("create_time"),
+                "conversation": item["conversation"]}
+    mapping = item.get("mapping") or {}
+    node_id = item.get("current_node")
+    if node_id not in mapping:
+        # current_node 가 없으면 가장 늦게 만들어진 잎 노드
+        leaves = [k for k, v in mapping.items() if not v.get("children")]
+        node_id = max(leaves, key=lambda k: ((mapping[k].get("message") or {}).get("create_time") or 0), default=None)
+    chain = []
+    seen: Set[str] = set()
+    while node_id and node_id in mapping and node_id not in seen:
+        seen.add(node_id)
+        node = mapping[node_id]
+        chain.append(node.get("message"))
+        node_id = node.get("parent")
+    conversation = []
+    for msg in reversed(chain):
+        if not msg:
+            continue
+        role = (msg.get("author") or {}).get("role")
+        if role not in ("user", "assistant"):
+            continue
+        if (msg.get("metadata") or {}).get("is_visually_hidden_from_conversation"):
+            continue
+        text = _message_text(msg)
+        if text:
+            conversation.append({"role": role, "content": text})
+    return {"id": conv_id, "title": item.get("title"), "create_time": item.get("create_time"),
+            "conversation": conversation}
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.seen = 0
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.errors: List[str] = []
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = max(1e-6, (self.finished or time.time()) - self.started)
+        return {
+            "seen": self.seen, "done": self.done, "skipped": self.skipped, "failed": self.failed,
+            "elapsed_s": round(elapsed, 1),
+            "conversations_per_min": round(self.done / elapsed * 60, 2),
+            "tokens_in_per_s": round(self.tokens_in / elapsed, 1),
+            "tokens_out_per_s": round(self.tokens_out / elapsed, 1),
+            "finished": self.finished is not None,
+            "errors": self.errors[-5:],
+        }
+
+
+class Checkpoint:
+    """
+    처리 완료된 대화 id 를 한 줄씩 append (중간에 죽어도 완료분은 남음).
+    """
+
+    def __init__(self, path: str | Path | None):
+        self.path = Path(path) if path else None
+        self.done: Set[str] = set()
+        if self.path and self.path.exists():
+            self.done = {line.strip() for line in self.path.read_text(encoding="utf-8").splitlines() if line.strip()}
+        self._f = None
+
+    def mark(self, conv_id: str) -> None:
+        self.done.add(conv_id)
+        if self.path is None:
+            return
+        if self._f is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._f = open(self.path, "a", encoding="utf-8")
+        self._f.write(conv_id + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+SaveFn = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+HINT_BATCH = 32
+
+
+def _take(it: Iterator[Any], n: int) -> List[Dict[str, Any]]:
+    out = []
+    for item in it:
+        out.append(export_to_conversation(item))
+        if len(out) >= n:
+            break
+    return out
+
+
+def _attach_hints(convs: List[Dict[str, Any]]) -> None:
+    for conv, hints in zip(convs, build_weakness_hints_batch(c["conversation"] for c in convs)):
+        conv["weakness_hints"] = hints
+
+
+async def run_import(items: Iterator[Any], save: SaveFn, *, concurrency: int = 2,
+                     checkpoint: Checkpoint | None = None, stats: ImportStats | None = None,
+                     report: Callable[[Dict[str, Any]], None] | None = None, report_every_s: float = 10.0) -> ImportStats:
+    """
+    items: 내보내기 원소 이터레이터 (동기; 파싱은 워커 스레드에서 HINT_BATCH 개씩 당겨옴)
+    save(conv) -> 결과 meta (conv = export_to_conversation 결과 + "weakness_hints"). 실패는 예외.
+    동시에 떠 있는 작업은 concurrency 개로 제한 → 파싱은 분석보다 최대 한 배치만 앞서 나감.
+    """
+    stats = stats or ImportStats()
+    checkpoint = checkpoint or Checkpoint(None)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    tasks: Set[asyncio.Task] = set()
+    last_report = time.time()
+
+    async def _one(conv: Dict[str, Any]) -> None:
+        try:
+            meta = await save(conv)
+            stats.done += 1
+            stats.tokens_in += estimate_conversation_tokens(conv["conversation"])
+            stats.tokens_out += estimate_tokens(json.dumps(meta or {}, ensure_ascii=False)) + int(meta.get("body_len") or 0) // 4
+            checkpoint.mark(conv["id"])
+        except Exception as e:
+            stats.failed += 1
+            stats.errors.append(f"{conv.get('id')}: {e!r}")
+        finally:
+            sem.release()
+
+    it = iter(items)
+    try:
+        while True:
+            # 파싱 + 약점 힌트는 HINT_BATCH 개씩 워커 스레드에서 (힌트 정규식을 배치 단위로 한 번에)
+            batch = await asyncio.to_thread(_take, it, HINT_BATCH)
+            if not batch:
+                break
+            todo = []
+            for conv in batch:
+                stats.seen += 1
+                conv["id"] = conv["id"] or f"anon-{stats.seen}"
+                if conv["id"] in checkpoint.done or not conv["conversation"]:
+                    stats.skipped += 1
+                    continue
+                todo.append(conv)
+            if todo:
+                await asyncio.to_thread(_attach_hints, todo)
+            for conv in todo:
+                await sem.acquire()
+                task = asyncio.create_task(_one(conv))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if report and time.time() - last_report >= report_every_s:
+                    last_report = time.time()
+                    report(stats.snapshot())
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        stats.finished = time.time()
+        checkpoint.close()
+    if report:
+        report(stats.snapshot())
+    return stats
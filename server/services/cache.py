@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..config import settings
+
+# 분석 결과 디스크 캐시
+# 키 = sha256(정규화된 대화 + 모델 + temperature + 프롬프트 버전 [+ extra])
+# 값 = {"meta": {...}, "markdown": "...", "created": <epoch>}
+# 같은 스레드를 반복 저장할 때 LLM 호출(30~180초)을 건너뛰기 위함
+
+
+def iter_normalized(conversation: Iterable[Dict[str, Any]]) -> Iterator[List[str]]:
+    # 공백 차이(스크레이퍼 innerText 흔들림)는 같은 대화로 취급. 해시는 메시지 하나씩 (정규화 사본을 한꺼번에 만들지 않음)
+    for m in conversation:
+        role = (m.get("role") or "user").strip().lower()
+        content = " ".join((m.get("content") or "").split())
+        yield [role, content]
+
+
+def _dumps(v: Any) -> str:
+    return json.dumps(v, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def make_cache_key(conversation: List[Dict[str, Any]], *, model: str, temperature: float,
+                   prompt_version: str, extra: Any = None) -> str:
+    # {"conversation": [...], "extra", "model", "prompt_version", "temperature"} 를 sort_keys JSON 으로 덤프한 것과
+    # 같은 바이트를 메시지 단위로 해시 (예전 키와 호환, 대화 전체 JSON 문자열은 만들지 않음)
+    h = hashlib.sha256(b'{"conversation":[')
+    for i, pair in enumerate(iter_normalized(conversation)):
+        h.update((("," if i else "") + _dumps(pair)).encode("utf-8"))
+    h.update((f'],"extra":{_dumps(extra)},"model":{_dumps(model)},"prompt_version":{_dumps(prompt_version)},'
+              f'"temperature":{_dumps(round(float(temperature), 4))}}}').encode("utf-8"))
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """
+    (meta, markdown) 영속 캐시.
+    - 항목 수 / 전체 바이트 / 나이 기준으로 오래된 것부터 축출(LRU)
+    - hit/miss/evict 카운터는 /health 에서 노출
+    """
+
+    def __init__(self, root: str | Path, max_entries: int = 2000, max_bytes: int = 256 * 1024 * 1024,
+                 max_age_s: float = 30 * 86400, enabled: bool = True):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[str, Tuple[float, int]]"] = None  # key -> (mtime, size)
+        self._bytes = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> "OrderedDict[str, Tuple[float, int]]":
+        # 첫 사용 시 한 번만 디렉터리 스캔 → 이후엔 메모리 인덱스로 관리
+        if self._index is not None:
+            return self._index
+        entries = []
+        if self.root.exists():
+            for sub in os.scandir(self.root):
+                if not sub.is_dir():
+                    continue
+                for f in os.scandir(sub.path):
+                    if f.name.endswith(".json"):
+                        st = f.stat()
+                        entries.append((st.st_mtime, f.name[:-5], st.st_size))
+        entries.sort()
+        self._index = OrderedDict((k, (mt, sz)) for mt, k, sz in entries)
+        self._bytes = sum(sz for _, _, sz in entries)
+        return self._index
+
+    def _drop_locked(self, key: str) -> None:
+        index = self._load_index()
+        _, size = index.pop(key, (0.0, 0))
+        self._bytes -= size
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict_locked(self) -> None:
+        index = self._load_index()
+        now = time.time()
+        while index:
+            key, (mtime, _) = next(iter(index.items()))
+            too_old = now - mtime > self.max_age_s
+            too_many = len(index) > self.max_entries
+            too_big = self._bytes > self.max_bytes
+            if not (too_old or too_many or too_big):
+                break
+            self._drop_locked(key)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        return self.get_any([key])
+
+    def get_any(self, keys: Iterable[str]) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        후보 키 중 처음 찾은 항목. 조회 한 번에 hit/miss 하나 (키가 여럿이어도 hit_rate 가 부풀지 않게)
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            for key in keys:
+                found = self._read_locked(key)
+                if found is not None:
+                    self.hits += 1
+                    return found
+            self.misses += 1
+            return None
+
+    def _read_locked(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        index = self._load_index()
+        entry = index.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.max_age_s:
+            self._drop_locked(key)
+            self.evictions += 1
+            return None
+        try:
+            data = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except Exception:
+            # 깨진 항목은 버리고 miss 처리
+            self._drop_locked(key)
+            return None
+        # LRU 갱신: 나이는 생성 시각 기준 유지, 순서만 뒤로
+        index.move_to_end(key)
+        return data.get("meta") or {}, data.get("markdown") or ""
+
+    def put(self, key: str, meta: Dict[str, Any], markdown: str) -> None:
+        if not self.enabled:
+            return
+        body = json.dumps({"meta": meta, "markdown": markdown, "created": time.time()}, ensure_ascii=False)
+        with self._lock:
+            index = self._load_index()
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(body, encoding="utf-8")
+            os.replace(tmp, path)  # 원자적 교체: 동시 요청에도 반쯤 쓴 파일이 보이지 않음
+            if key in index:
+                self._bytes -= index.pop(key)[1]
+            size = path.stat().st_size
+            index[key] = (time.time(), size)
+            self._bytes += size
+            self._evict_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._index) if self._index is not None else None
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": entries,
+                "bytes": self._bytes if self._index is not None else None,
+            }
+
+
+analysis_cache = AnalysisCache(
+    root=settings.ANALYSIS_CACHE_DIR,
+    max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+    max_bytes=settings.ANALYSIS_CACHE_MAX_MB * 1024 * 1024,
+    max_age_s=settings.ANALYSIS_CACHE_MAX_AGE_DAYS * 86400,
+    enabled=settings.ANALYSIS_CACHE_ENABLED,
+)
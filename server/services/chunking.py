@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from .prompt import CHUNK_MAP_SYSTEM, CHUNK_MAP_USER, REDUCE_SYSTEM, REDUCE_SYSTEM_JSON, REDUCE_USER
+from .prompt_builder import build_messages
+from .tokens import estimate_tokens
+
+# 긴 대화 map-reduce 요약
+# 1) 턴 경계 기준으로 토큰 예산 창(window)으로 분할 (한 턴이 예산보다 크면 그 턴만 잘게 나눔)
+# 2) 창마다 요약을 병렬로 요청 (map)
+# 3) 요약들을 모아 ====JSON==== / ====MARKDOWN==== (structured 면 JSON 객체 하나) 출력 생성 (reduce)
+
+Window = List[Tuple[int, Dict[str, Any]]]  # [(턴 번호(1-based), {"role","content"}), ...]
+
+
+def _split_text(text: str, budget: int) -> List[str]:
+    # 예산보다 긴 한 턴: 줄 단위로 모으고, 한 줄도 넘치면 글자 단위로 자름
+    pieces, buf, used = [], [], 0
+    for line in text.splitlines(keepends=True):
+        cost = estimate_tokens(line)
+        if cost > budget:
+            if buf:
+                pieces.append("".join(buf))
+                buf, used = [], 0
+            step = max(1, len(line) * budget // cost)  # 이 줄의 평균 글자당 토큰으로 환산
+            pieces.extend(line[i:i + step] for i in range(0, len(line), step))
+            continue
+        if used + cost > budget and buf:
+            pieces.append("".join(buf))
+            buf, used = [], 0
+        buf.append(line)
+        used += cost
+    if buf:
+        pieces.append("".join(buf))
+    return pieces or [""]
+
+
+def split_windows(conversation: List[Dict[str, Any]], budget_tokens: int) -> List[Window]:
+    windows: List[Window] = []
+    cur: Window = []
+    used = 0
+    for i, m in enumerate(conversation, start=1):
+        content = m.get("content") or ""
+        cost = estimate_tokens(content) + 4
+        if cost > budget_tokens:
+            if cur:
+                windows.append(cur)
+                cur, used = [], 0
+            for piece in _split_text(content, budget_tokens - 4):
+                windows.append([(i, {"role": m.get("role", "user"), "content": piece})])
+            continue
+        if used + cost > budget_tokens and cur:
+            windows.append(cur)
+            cur, used = [], 0
+        cur.append((i, m))
+        used += cost
+    if cur:
+        windows.append(cur)
+    return windows
+
+
+def _window_block(window: Window) -> str:
+    return "\n".join(f"[{i}][{m.get('role', 'user')}] {m.get('content') or ''}" for i, m in window)
+
+
+def _window_hints(hints: Dict[str, Any], lo: int, hi: int) -> Dict[str, Any]:
+    return {k: [t for t in v if lo <= t <= hi] for k, v in hints.items() if isinstance(v, list)}
+
+
+Complete = Callable[[List[Dict[str, str]], int | None], Awaitable[str]]
+
+
+async def map_reduce_messages(conversation: List[Dict[str, Any]], hints: Dict[str, Any], complete: Complete, *,
+                              chunk_tokens: int, parallelism: int, map_max_tokens: int,
+                              reserve: int = 0, structured: bool = False) -> List[Dict[str, str]]:
+    """
+    map 단계까지 수행하고 reduce 요청 messages 를 반환 (스트리밍 경로는 reduce 만 스트리밍).
+    await complete(messages, max_tokens) -> 응답 텍스트.
+    map 단계 실패한 창은 원문 앞부분으로 대체해서 reduce 가 구멍 없이 진행되게 한다.
+    reserve = reduce 응답(출력)에 남겨 둘 토큰 (통계/예산 계산용)
+    structured = reduce 를 구조화 출력 지시문으로
+    """
+    windows = split_windows(conversation, chunk_tokens)
+    turn_count = len(conversation)
+
+    sem = asyncio.Semaphore(max(1, parallelism))
+
+    async def _map(window: Window) -> str:
+        lo, hi = window[0][0], window[-1][0]
+        block = _window_block(window)
+        messages = build_messages("map", CHUNK_MAP_SYSTEM, CHUNK_MAP_USER, {
+            "from_turn": lo, "to_turn": hi, "turn_count": turn_count,
+            "weakness_hints_json": _window_hints(hints, lo, hi), "conversation_block": block,
+        }, reserve=map_max_tokens)
+        try:
+            async with sem:
+                summary = (await complete(messages, map_max_tokens) or "").strip()
+        except Exception as e:
+            print(f"[map-reduce] window {lo}-{hi} failed:", repr(e))
+            summary = ""
+        if not summary:
+            summary = "(요약 실패 — 원문 일부)\n" + block[: map_max_tokens * 2]
+        return f"### Turns {lo}-{hi}\n{summary}"
+
+    summaries = await asyncio.gather(*(_map(w) for w in windows))  # 순서 유지
+
+    return build_messages("reduce", REDUCE_SYSTEM_JSON if structured else REDUCE_SYSTEM, REDUCE_USER, {
+        "now_iso": datetime.now(timezone.utc).isoformat(), "turn_count": turn_count,
+        "window_count": len(windows), "weakness_hints_json": hints, "summaries_block": "\n\n".join(summaries),
+    }, reserve=reserve)
+
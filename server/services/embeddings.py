@@ -0,0 +1,469 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import settings
+from .backends import _root
+from .formatters import strip_related
+from .metrics import record_stage
+from .search import note_fields
+from ..utils.fs import dir_prefix
+
+if TYPE_CHECKING:
+    import httpx
+    import numpy as np  # 실제 import 는 첫 사용 때 (기동 시간)
+
+# 노트 임베딩 + 관련 노트 (로컬 벡터 인덱스)
+# - 벡터: EMBEDDING_DIR/<모델>/vectors.<세대>.f32 — L2 정규화한 float32 행을 뒤에 붙이기만 하고 np.memmap 으로 읽음
+# - 메타: 같은 폴더 index.sqlite3
+#     vectors(row, hash)  임베딩한 텍스트 해시 → 행. 같은 내용은 다시 임베딩하지 않음 (노트가 지워져도 캐시로 남음)
+#     notes(path, row)    노트 → 행. 노트 내용이 바뀌면 새 행을 가리키고 옛 행은 죽은 행
+# - 검색: 전체 행렬 @ q (코사인) → 죽은 행 제외 → argpartition top-k. 10만 x 768 에서 ~25ms (브루트포스로 충분)
+# - 죽은 행이 산 행보다 많아지면 산 행만 새 세대 파일로 옮기고 같은 트랜잭션에서 행 번호/세대를 바꿈
+# - /embeddings 호출: 동시 저장은 짧게 모아서 한 번에, 볼트 백필은 EMBEDDING_BATCH 개씩
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    row  INTEGER PRIMARY KEY,
+    hash TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notes (
+    path    TEXT PRIMARY KEY,
+    row     INTEGER NOT NULL,
+    project TEXT,
+    title   TEXT,
+    mtime   REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    k TEXT PRIMARY KEY,
+    v TEXT NOT NULL
+);
+"""
+
+COMPACT_MIN_DEAD = 1024
+_UNSUPPORTED = (404, 405, 501)
+_unsafe = re.compile(r"[^0-9A-Za-z._-]+")
+
+
+def note_text(title: str, tags: Iterable[str], markdown: str, max_chars: int) -> str:
+    """
+    임베딩할 텍스트: 제목 + 태그 + 본문 앞부분 (관련 노트 섹션은 빼서 링크가 바뀌어도 같은 텍스트)
+    """
+    body = strip_related(markdown or "").strip()
+    return f"{title or ''}\n{' '.join(tags or [])}\n{body}"[:max_chars]
+
+
+class EmbeddingIndex:
+    def __init__(self, root: str | Path, model: str, base_url: str, api_key: Optional[str] = None,
+                 batch: int = 32, batch_delay_ms: float = 5.0, max_chars: int = 8000):
+        self.model = model
+        self.dir = Path(root) / (_unsafe.sub("_", model) or "default")
+        self.base_url = _root(base_url)
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.batch = max(1, batch)
+        self.batch_delay_s = batch_delay_ms / 1000.0
+        self.max_chars = max_chars
+        self.flavor: Optional[str] = None
+        self.dim = 0
+        self.rows = 0
+        self._gen = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._mat: Optional[np.memmap] = None
+        self._live: Optional[np.ndarray] = None          # 노트가 가리키는 행
+        self._owners: Dict[int, List[str]] = {}          # 행 → 노트 경로들 (같은 내용의 노트가 여럿일 수 있음)
+        self._notes: Dict[str, Tuple[int, Optional[str], Optional[str], Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.counts = {"embedded": 0, "cache_hits": 0, "requests": 0, "errors": 0, "compactions": 0}
+        self.last_backfill: Dict[str, Any] = {}
+
+    # --- 저장소 ---
+    def _file(self, gen: int) -> Path:
+        return self.dir / f"vectors.{gen}.f32"
+
+    def _load_locked(self) -> None:
+        if self._db is not None:
+            return
+        import numpy as np
+        self.dir.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.dir / "index.sqlite3"), check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        meta = dict(db.execute("SELECT k, v FROM meta"))
+        self.dim, self._gen = int(meta.get("dim", 0)), int(meta.get("gen", 0))
+        last = db.execute("SELECT MAX(row) FROM vectors").fetchone()[0]
+        self.rows = 0 if last is None else last + 1
+        # 압축 중에 죽은 다른 세대 파일 정리
+        for p in self.dir.glob("vectors.*.f32"):
+            if p != self._file(self._gen):
+                p.unlink(missing_ok=True)
+        f = self._file(self._gen)
+        have = f.stat().st_size // (self.dim * 4) if self.dim and f.exists() else 0
+        if have > self.rows:
+            # 행 추가 후 DB 기록 전에 죽음 → 남는 꼬리 버림
+            os.truncate(f, self.rows * self.dim * 4)
+        elif have < self.rows:
+            # 파일이 DB 보다 짧음 (캐시 폴더 일부 손상) → 없는 행은 다시 임베딩하게
+            with db:
+                db.execute("DELETE FROM vectors WHERE row >= ?", (have,))
+                db.execute("DELETE FROM notes WHERE row >= ?", (have,))
+            self.rows = have
+        self._db = db
+        self._live = np.zeros(self.rows, dtype=bool)
+        for path, row, project, title, mtime in db.execute("SELECT path, row, project, title, mtime FROM notes"):
+            self._notes[path] = (row, project, title, mtime)
+            self._owners.setdefault(row, []).append(path)
+            self._live[row] = True
+        self._remap()
+
+    def _remap(self) -> None:
+        import numpy as np
+        self._mat = (np.memmap(self._file(self._gen), dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+                     if self.rows else None)
+
+    def _append_locked(self, vecs: np.ndarray) -> int:
+        import numpy as np
+        if not self.dim:
+            self.dim = vecs.shape[1]
+            self._db.execute("INSERT OR REPLACE INTO meta (k, v) VALUES ('dim', ?)", (str(self.dim),))
+        if vecs.shape[1] != self.dim:
+            raise ValueError(f"embedding dim changed: {vecs.shape[1]} != {self.dim} (model {self.model})")
+        first = self.rows
+        vecs = np.asarray(vecs, dtype=np.float32)
+        vecs = vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)   # 행은 항상 단위 벡터
+        with open(self._file(self._gen), "ab") as f:
+            f.write(np.ascontiguousarray(vecs).tobytes())
+        self.rows += len(vecs)
+        self._live = np.concatenate([self._live, np.zeros(len(vecs), dtype=bool)])
+        self._remap()
+        return first
+
+    def _set_note_locked(self, path: str, row: int, project, title, mtime) -> None:
+        old = self._notes.get(path)
+        if old is not None:
+            owners = self._owners.get(old[0], [])
+            if path in owners:
+                owners.remove(path)
+            if not owners:
+                self._owners.pop(old[0], None)
+                self._live[old[0]] = False
+        self._notes[path] = (row, project, title, mtime)
+        self._owners.setdefault(row, []).append(path)
+        self._live[row] = True
+        self._db.execute("INSERT OR REPLACE INTO notes (path, row, project, title, mtime) VALUES (?,?,?,?,?)",
+                         (path, row, project, title, mtime))
+
+    def put_many(self, items: List[Tuple[str, str, np.ndarray, Optional[str], Optional[str], Optional[float]]]) -> None:
+        """
+        [(path, key, vec, project, title, mtime)] — 새 벡터는 한 번에 파일 뒤에 붙이고 한 트랜잭션으로 기록.
+        """
+        import numpy as np
+        with self._lock:
+            self._load_locked()
+            rows: Dict[str, int] = {}
+            new_keys, new_vecs = [], []
+            for _, key, vec, *_ in items:
+                if key in rows:
+                    continue
+                r = self._db.execute("SELECT row FROM vectors WHERE hash=?", (key,)).fetchone()
+                if r is not None:
+                    rows[key] = r[0]
+                else:
+                    rows[key] = -1
+                    new_keys.append(key)
+                    new_vecs.append(vec)
+            with self._db:
+                if new_vecs:
+                    first = self._append_locked(np.stack(new_vecs))
+                    for i, key in enumerate(new_keys):
+                        rows[key] = first + i
+                    self._db.executemany("INSERT INTO vectors (row, hash) VALUES (?, ?)",
+                                         [(rows[k], k) for k in new_keys])
+                for path, key, _, project, title, mtime in items:
+                    self._set_note_locked(str(path), rows[key], project, title, mtime)
+            if self.rows - int(self._live.sum()) > max(COMPACT_MIN_DEAD, int(self._live.sum())):
+                self._compact_locked()
+
+    def put(self, path: str, key: str, vec: np.ndarray, project: Optional[str], title: Optional[str]) -> None:
+        """
+        서버가 노트를 쓴 직후 호출 (mtime 을 기록해 두면 백필이 다시 읽지 않음).
+        """
+        self.put_many([(str(path), key, vec, project, title, os.stat(path).st_mtime)])
+
+    def remove(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            self._load_locked()
+            with self._db:
+                for p in paths:
+                    old = self._notes.pop(p, None)
+                    if old is None:
+                        continue
+                    owners = self._owners.get(old[0], [])
+                    if p in owners:
+                        owners.remove(p)
+                    if not owners:
+                        self._owners.pop(old[0], None)
+                        self._live[old[0]] = False
+                    self._db.execute("DELETE FROM notes WHERE path=?", (p,))
+
+    def _compact_locked(self) -> None:
+        # 산 행만 새 세대 파일로 (청크 복사), 행 번호/세대는 한 트랜잭션에서 교체 → 어느 시점에 죽어도 일관
+        import numpy as np
+        t0 = time.perf_counter()
+        keep = np.flatnonzero(self._live)
+        new_gen = self._gen + 1
+        with open(self._file(new_gen), "wb") as f:
+            for i in range(0, len(keep), 4096):
+                f.write(np.ascontiguousarray(self._mat[keep[i:i + 4096]]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        remap = {int(old): new for new, old in enumerate(keep)}
+        hashes = dict(self._db.execute("SELECT row, hash FROM vectors"))
+        with self._db:
+            self._db.execute("DELETE FROM vectors")
+            self._db.executemany("INSERT INTO vectors (row, hash) VALUES (?, ?)",
+                                 [(new, hashes[old]) for old, new in remap.items()])
+            self._db.executemany("UPDATE notes SET row=? WHERE path=?",
+                                 [(remap[v[0]], p) for p, v in self._notes.items()])
+            self._db.execute("INSERT OR REPLACE INTO meta (k, v) VALUES ('gen', ?)", (str(new_gen),))
+        old_file, dropped = self._file(self._gen), self.rows - len(keep)
+        self._gen, self.rows = new_gen, len(keep)
+        self._notes = {p: (remap[v[0]],) + v[1:] for p, v in self._notes.items()}
+        self._owners = {remap[r]: ps for r, ps in self._owners.items()}
+        self._live = np.ones(self.rows, dtype=bool)
+        self._remap()
+        old_file.unlink(missing_ok=True)
+        self.counts["compactions"] += 1
+        print(f"[embeddings] compacted: dropped {dropped} dead rows, {self.rows} left "
+              f"({time.perf_counter() - t0:.2f}s)")
+
+    def cached_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        import numpy as np
+        with self._lock:
+            self._load_locked()
+            out = {}
+            for key in keys:
+                r = self._db.execute("SELECT row FROM vectors WHERE hash=?", (key,)).fetchone()
+                if r is not None:
+                    out[key] = np.array(self._mat[r[0]])
+            return out
+
+    def vector_of(self, path: str) -> Optional[np.ndarray]:
+        import numpy as np
+        with self._lock:
+            self._load_locked()
+            v = self._notes.get(str(path))
+            return np.array(self._mat[v[0]]) if v is not None else None
+
+    # --- 검색 ---
+    def related(self, vec: np.ndarray, k: int = 5, exclude: Iterable[str] = (), min_score: float = 0.0,
+                within: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        vec 과 가장 비슷한 노트 top-k (코사인). exclude 경로는 제외, within 이면 그 경로(볼트 루트) 아래 노트만.
+        """
+        import numpy as np
+        t0 = time.perf_counter()
+        exclude = {str(p) for p in exclude}
+        with self._lock:
+            self._load_locked()
+            if self._mat is None or k <= 0:
+                return []
+            mat, live = self._mat, self._live.copy()
+        q = np.asarray(vec, dtype=np.float32)
+        scores = mat @ (q / max(float(np.linalg.norm(q)), 1e-12))
+        scores[~live] = -np.inf
+        kk = k + len(exclude) + 8   # 제외/공유 행을 걸러도 k 개가 남게 여유
+        kk = min(len(scores), kk * 8 if within else kk)   # 다른 볼트 노트를 걸러낼 여유
+        if within:
+            within = dir_prefix(within)   # /vault/work 가 /vault/work2 를 포함하지 않게
+        top = np.argpartition(-scores, kk - 1)[:kk]
+        top = top[np.argsort(-scores[top])]
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            for row in top:
+                s = float(scores[row])
+                if s == -np.inf or s < min_score:
+                    break
+                for p in self._owners.get(int(row), []):
+                    if p in exclude or (within and not p.startswith(within)):
+                        continue
+                    _, project, title, _ = self._notes[p]
+                    out.append({"path": p, "project": project, "title": title, "score": round(s, 4)})
+                if len(out) >= k:
+                    break
+        record_stage("related_lookup", time.perf_counter() - t0)
+        return out[:k]
+
+    # --- /embeddings ---
+    def text_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+    async def _request(self, http: httpx.AsyncClient, texts: List[str]) -> np.ndarray:
+        import numpy as np
+        t0 = time.perf_counter()
+        self.counts["requests"] += 1
+        try:
+            for flavor in [self.flavor] if self.flavor else ["openai", "ollama"]:
+                path = "/v1/embeddings" if flavor == "openai" else "/api/embed"
+                r = await http.post(self.base_url + path, json={"model": self.model, "input": texts},
+                                    headers=self.headers)
+                if r.status_code in _UNSUPPORTED and self.flavor is None:
+                    continue
+                r.raise_for_status()
+                data = r.json()
+                if flavor == "openai":
+                    vecs = [d["embedding"] for d in sorted(data["data"], key=lambda d: d.get("index", 0))]
+                else:
+                    vecs = data["embeddings"]
+                self.flavor = flavor
+                break
+            else:
+                raise RuntimeError("no embeddings API (openai-compat /v1/embeddings, ollama /api/embed)")
+        except Exception:
+            self.counts["errors"] += 1
+            raise
+        arr = np.asarray(vecs, dtype=np.float32)
+        arr /= np.maximum(np.linalg.norm(arr, axis=1, keepdims=True), 1e-12)
+        self.counts["embedded"] += len(texts)
+        record_stage("embed_request", time.perf_counter() - t0)
+        return arr
+
+    async def embed(self, http: httpx.AsyncClient, text: str) -> np.ndarray:
+        """
+        텍스트 하나 → 정규화 벡터. 동시에 들어온 요청은 batch_delay 동안 모아서 EMBEDDING_BATCH 개씩 한 번에.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((text, fut))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush(http))
+        return await fut
+
+    async def _flush(self, http: httpx.AsyncClient) -> None:
+        await asyncio.sleep(self.batch_delay_s)
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch], self._pending[self.batch:]
+            try:
+                vecs = await self._request(http, [t for t, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), v in zip(batch, vecs):
+                if not fut.done():
+                    fut.set_result(v)
+
+    async def vector(self, http: httpx.AsyncClient, text: str) -> Tuple[str, np.ndarray]:
+        key = self.text_key(text)
+        cached = await asyncio.to_thread(self.cached_many, [key])
+        if key in cached:
+            self.counts["cache_hits"] += 1
+            return key, cached[key]
+        return key, await self.embed(http, text)
+
+    async def related_for(self, http: httpx.AsyncClient, title: str, tags: List[str], markdown: str,
+                          k: int, min_score: float, exclude: Iterable[str] = (),
+                          within: Optional[str] = None) -> Tuple[Optional[str], Any, List[Dict[str, Any]]]:
+        """
+        저장 직전 노트 → (키, 벡터, 관련 노트). 임베딩 서버가 없거나 실패하면 (None, None, []) — 저장은 계속.
+        """
+        try:
+            key, vec = await self.vector(http, note_text(title, tags, markdown, self.max_chars))
+            related = await asyncio.to_thread(self.related, vec, k, exclude, min_score, within)
+            return key, vec, related
+        except Exception as e:
+            print("[embeddings] related lookup failed:", repr(e))
+            return None, None, []
+
+    # --- 볼트 백필 ---
+    def _scan(self, root: str) -> Tuple[List[Tuple[str, str, Optional[str], str, float]], List[str]]:
+        prefix = dir_prefix(root)   # 형제 볼트(/vault2)의 벡터는 건드리지 않게
+        with self._lock:
+            self._load_locked()
+            known = {p: v[3] for p, v in self._notes.items() if p.startswith(prefix)}
+        todo, seen = [], set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if not name.endswith(".md") or name.startswith("."):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                    seen.add(path)
+                    if known.get(path) == st.st_mtime:
+                        continue
+                    with open(path, "r", encoding="utf-8", errors="replace") as f:
+                        fields = note_fields(f.read(self.max_chars + 4096))
+                except OSError:
+                    continue
+                text = note_text(fields["title"], fields["tags"], fields["body"], self.max_chars)
+                todo.append((path, text, fields.get("project") or os.path.basename(dirpath), fields["title"],
+                             st.st_mtime))
+        return todo, [p for p in known if p not in seen]
+
+    async def backfill(self, http: httpx.AsyncClient, root: str) -> Dict[str, Any]:
+        """
+        볼트에서 임베딩이 없거나 바뀐 노트를 EMBEDDING_BATCH 개씩 임베딩 (내용 해시가 같으면 요청 없이 재사용).
+        """
+        t0 = time.perf_counter()
+        embedded = reused = 0
+        try:
+            todo, gone = await asyncio.to_thread(self._scan, str(root))
+            for i in range(0, len(todo), self.batch):
+                chunk = todo[i:i + self.batch]
+                keys = [self.text_key(t[1]) for t in chunk]
+                vecs = await asyncio.to_thread(self.cached_many, keys)
+                need = [j for j, key in enumerate(keys) if key not in vecs]
+                if need:
+                    for j, v in zip(need, await self._request(http, [chunk[j][1] for j in need])):
+                        vecs[keys[j]] = v
+                embedded += len(need)
+                reused += len(chunk) - len(need)
+                await asyncio.to_thread(self.put_many, [(path, keys[j], vecs[keys[j]], project, title, mtime)
+                                                        for j, (path, _, project, title, mtime) in enumerate(chunk)])
+            if gone:
+                await asyncio.to_thread(self.remove, gone)
+            self.last_backfill = {"root": str(root), "embedded": embedded, "reused": reused, "removed": len(gone),
+                                  "elapsed_s": round(time.perf_counter() - t0, 3), "at": time.time()}
+        except Exception as e:
+            print("[embeddings] backfill failed:", repr(e))
+            self.last_backfill = {"root": str(root), "embedded": embedded, "error": repr(e), "at": time.time()}
+        return self.last_backfill
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            loaded = self._db is not None
+            live = int(self._live.sum()) if self._live is not None else 0
+        return {"model": self.model, "loaded": loaded, "dim": self.dim, "rows": self.rows, "live_rows": live,
+                "notes": len(self._notes),
+                "flavor": self.flavor, **self.counts, "last_backfill": self.last_backfill}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._mat = None
+
+
+embedding_index = EmbeddingIndex(
+    settings.EMBEDDING_DIR,
+    model=settings.EMBEDDING_MODEL,
+    base_url=settings.EMBEDDING_BASE_URL or (settings.LOCAL_LLM_BASE_URL if settings.USE_LOCAL_LLM
+                                             else "https://api.openai.com/v1"),
+    api_key=None if settings.USE_LOCAL_LLM else settings.OPENAI_API_KEY,
+    batch=settings.EMBEDDING_BATCH,
+    batch_delay_ms=settings.EMBEDDING_BATCH_DELAY_MS,
+    max_chars=settings.EMBEDDING_MAX_CHARS,
+)
@@ -1,38 +1,420 @@
 import json, re
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
 
-def build_conversation_block(conversation):
+# 원문 대화 렌더링은 조각(제목 줄 / 메시지 본문 그대로 / 구분자)으로 내보냄
+# → 큰 대화도 본문 문자열을 이어 붙인 사본을 만들지 않고 vault_writer 가 조각째로 파일에 씀
+
+def _role_md(role: str | None) -> str:
+    return "👤 User" if role == "user" else ("🤖 Assistant" if role == "assistant" else "🛠 System")
+
+def iter_raw_conversation(conversation: list[dict]) -> Iterator[str]:
+    """
+    "### 👤 User\n{본문}\n" 블록을 "\n---\n" 으로 이은 원문 대화 (분석 실패 폴백 노트 본문).
+    """
+    for i, m in enumerate(conversation):
+        yield ("\n---\n" if i else "") + f"### {_role_md(m.get('role'))}\n"
+        yield m.get("content") or ""
+        yield "\n"
+
+def iter_basic_markdown(project: str, conversation: list[dict]) -> Iterator[str]:
+    """
+    build_basic_markdown 과 같은 내용을 조각으로.
+    """
+    yield f"""# 📝 Chat Conversation Report
+**프로젝트**: {project}  
+**날짜**: {datetime.now().strftime('%Y-%m-%d')}  
+**대화 길이**: {len(conversation)} turns  
+
+---
+
+## 💬 원본 대화 기록""".strip()
+    last = len(conversation) - 1
+    for i, msg in enumerate(conversation):
+        content = (msg.get("content") or "").strip()
+        head = ("\n\n---" if i else "") + f"\n### {_role_md(msg.get('role', ''))}"
+        # 끝 공백은 예전 .strip() 처럼 떼어냄 (마지막 메시지가 비면 제목 줄에서 끝)
+        yield head if i == last and not content else head + "\n"
+        if content:
+            yield content
+
+def build_basic_markdown(project: str, conversation: list[dict]) -> str:
+    """
+    LLM 없이 만드는 기본 노트 (저장만 / 분석 실패 시 폴백).
+    """
+    return "".join(iter_basic_markdown(project, conversation))
+
+DRAFT_HINT_LABELS = (("hot_turns", "다시 볼 턴"), ("confuse_turns", "헷갈린 턴"), ("repeat_turns", "반복 질문"),
+                     ("correction_turns", "정정한 턴"))
+DRAFT_EXCERPTS = 5
+DRAFT_EXCERPT_CHARS = 160
+
+def draft_summary(conversation: list[dict], hints: dict, start: int = 0) -> str:
+    """
+    LLM 없는 초안의 머리말: 턴 수 + 약점 힌트 턴 번호 + 다시 볼 질문 발췌. start 이후(증분이면 새 턴)만.
+    큰 모델 분석이 끝나면 노트 전체가 교체됨.
+    """
+    turns = len(conversation) - start
+    users = sum(1 for m in conversation[start:] if m.get("role") == "user")
+    lines = ["> [!note] 초안 — 분석이 끝나면 이 노트가 자동으로 바뀝니다 (status: draft → final)", "",
+             "## 🧭 초안 요약", f"- 턴: {turns} (사용자 {users})"]
+    for key, label in DRAFT_HINT_LABELS:
+        found = [t for t in hints.get(key) or [] if t > start]
+        if found:
+            lines.append(f"- {label}: " + ", ".join(map(str, found)))
+    picks = [t for t in (hints.get("hot_turns") or []) + (hints.get("confuse_turns") or []) if t > start]
+    picks = sorted(set(picks), key=picks.index)[:DRAFT_EXCERPTS]
+    if picks:
+        lines += ["", "### 다시 볼 질문"]
+        for t in picks:
+            text = " ".join((conversation[t - 1].get("content") or "")[:DRAFT_EXCERPT_CHARS * 2].split())
+            lines.append(f"- (턴 {t}) {text[:DRAFT_EXCERPT_CHARS]}{'…' if len(text) > DRAFT_EXCERPT_CHARS else ''}")
+    return "\n".join(lines) + "\n"
+
+def parts_head(parts: Iterable[str], limit: int) -> str:
+    # 조각들을 이은 텍스트의 앞 limit 글자 (전체를 잇지 않음)
+    out, n = [], 0
+    for p in parts:
+        if n >= limit:
+            break
+        out.append(p[:limit - n])
+        n += len(out[-1])
+    return "".join(out)
+
+def build_conversation_block(conversation, start: int = 1):
     lines = []
-    for i, m in enumerate(conversation, start=1):
+    for i, m in enumerate(conversation, start=start):
         lines.append(f"[{i}][{m['role']}] {m['content']}")
     return "\n".join(lines)
 
-def parse_dual_output(text: str) -> tuple[dict, str]:
-    j, md = {}, ""
-    m = re.search(r"====JSON====\s*(\{.*?\})\s*====MARKDOWN====\s*(.*)\Z", text, flags=re.S)
-    if m:
+JSON_MARK = "====JSON===="
+MD_MARK = "====MARKDOWN===="
+
+# 응답 파서 (이중 출력 ====JSON==== / ====MARKDOWN==== 과 구조화 출력 {"meta": ..., "markdown": "..."} 둘 다)
+# - JSON 끝은 정규식이 아니라 괄호 짝으로 찾음: 문자열/이스케이프 안의 괄호는 무시, 텍스트는 한 번만 훑음
+# - 잘린 JSON(max_tokens 에 걸림 등)은 열린 문자열/괄호를 닫거나 마지막으로 완결된 항목까지 잘라 복구
+# - 마커가 없어도 JSON 뒤 나머지(또는 응답 전체)를 마크다운으로 살림 → LLM 결과를 원문 폴백으로 버리지 않음
+# status: ok(그대로 파싱) / recovered(고쳐서 파싱) / markdown_only(meta 없음) / failed(빈 응답)
+
+_OUT_STR = re.compile(r'["{}\[\],]')
+_IN_STR = re.compile(r'["\\]')
+_trailing_comma = re.compile(r",\s*([}\]])")
+_fence_open = re.compile(r"\A\s*```[\w-]*[ \t]*\n?")
+_fence_close = re.compile(r"\A\s*```[ \t]*(?:\n|\Z)")
+RECOVER_TRIES = 16
+_decoder = json.JSONDecoder()
+
+class _BraceScanner:
+    """
+    '{' 로 시작하는 텍스트에서 짝이 맞는 '}' 다음 위치를 찾는다. 텍스트가 늘어나면 이어서 훑음 (스트리밍).
+    복구용으로 열린 괄호 스택과 최근 ',' 위치(그 시점에 닫아야 할 괄호들)를 기억.
+    """
+    __slots__ = ("stack", "in_str", "pos", "commas")
+
+    def __init__(self):
+        self.stack: list[str] = []
+        self.in_str = False
+        self.pos = 0
+        self.commas: list[tuple[int, str]] = []
+
+    def scan(self, text: str) -> int:
+        pos, n, stack = self.pos, len(text), self.stack
+        while pos < n:
+            if self.in_str:
+                m = _IN_STR.search(text, pos)
+                if m is None:
+                    pos = n
+                    break
+                i = m.start()
+                if m.group() == "\\":
+                    if i + 1 >= n:
+                        pos = i  # 이스케이프가 조각 경계에 걸림 → 다음 조각에서 다시
+                        break
+                    pos = i + 2
+                    continue
+                self.in_str = False
+                pos = i + 1
+                continue
+            m = _OUT_STR.search(text, pos)
+            if m is None:
+                pos = n
+                break
+            c, i = m.group(), m.start()
+            pos = i + 1
+            if c == '"':
+                self.in_str = True
+            elif c == "{":
+                stack.append("}")
+            elif c == "[":
+                stack.append("]")
+            elif c == ",":
+                self.commas.append((i, "".join(reversed(stack))))
+                if len(self.commas) > RECOVER_TRIES:
+                    del self.commas[0]
+            else:
+                if stack:
+                    stack.pop()
+                if not stack:
+                    self.pos = pos
+                    return pos
+        self.pos = pos
+        return -1
+
+def _loads_obj(text: str) -> tuple[dict | None, bool]:
+    # (dict, 고쳤는지). 흔한 LLM 실수인 끝 쉼표 ",}" 만 고쳐 봄
+    fixed = False
+    try:
+        obj = json.loads(text)
+    except ValueError:
+        repaired = _trailing_comma.sub(r"\1", text)
+        if repaired == text:
+            return None, False
         try:
-            j = json.loads(m.group(1))
-        except Exception:
-            j = {}
-        md = m.group(2).strip()
+            obj, fixed = json.loads(repaired), True
+        except ValueError:
+            return None, False
+    return (obj, fixed) if isinstance(obj, dict) else (None, False)
+
+def _recover_json(text: str, sc: _BraceScanner) -> dict:
+    """
+    닫히지 않은 JSON: 열린 문자열/괄호를 닫아 보고, 안 되면 최근 ',' 부터 거꾸로 잘라 완결된 항목까지만.
+    """
+    head = text[:-1] if sc.in_str and text.endswith("\\") else text
+    closers = "".join(reversed(sc.stack))
+    cands = [(head + '"' if sc.in_str else head.rstrip().rstrip(",")) + closers]
+    cands += [text[:i] + cl for i, cl in reversed(sc.commas)]
+    for c in cands:
+        obj, _ = _loads_obj(c)
+        if obj is not None:
+            return obj
+    return {}
+
+def _json_start(head: str, has_marker: bool) -> int:
+    # 마커가 있으면 마커 뒤 첫 '{', 없으면 응답이 (```json 펜스 뒤) '{' 로 시작할 때만 — 본문 속 {..} 오인 방지
+    if has_marker:
+        return head.find("{", head.find(JSON_MARK) + len(JSON_MARK))
+    m = _fence_open.match(head)
+    i = m.end() if m else 0
+    while i < len(head) and head[i].isspace():
+        i += 1
+    return i if head.startswith("{", i) else -1
+
+def _unwrap_structured(meta: dict, md: str) -> tuple[dict, str]:
+    # 구조화 출력 {"meta": {...}, "markdown": "..."} (meta 키 없이 평평하게 온 경우도)
+    if isinstance(meta.get("markdown"), str) and not md:
+        md = meta["markdown"]
+        inner = meta.get("meta")
+        meta = inner if isinstance(inner, dict) else {k: v for k, v in meta.items() if k != "markdown"}
+    return meta, md.strip()
+
+def _after_json(rest: str) -> str:
+    m = _fence_close.match(rest)
+    return rest[m.end():] if m else rest
+
+def _scan_meta(head: str, bi: int) -> tuple[dict, str, int]:
+    # 괄호 짝으로 끝을 찾아 고쳐 보거나(끝 쉼표), 닫히지 않았으면 복구
+    sc = _BraceScanner()
+    e = sc.scan(head[bi:] if bi else head)
+    if e < 0:
+        return _recover_json(head[bi:], sc), "recovered", len(head)
+    obj, _ = _loads_obj(head[bi:bi + e])
+    return obj or {}, "recovered", bi + e
+
+def parse_output(text: str) -> tuple[dict, str, str]:
+    """
+    LLM 응답 → (meta, markdown, status). 온전한 JSON 은 raw_decode 한 번, 깨진 경우만 괄호 스캐너로.
+    """
+    text = text or ""
+    mi = text.find(MD_MARK)
+    head = text if mi < 0 else text[:mi]
+    has_marker = JSON_MARK in head
+    bi = _json_start(head, has_marker)
+    meta, status, end = {}, "ok", -1
+    if bi >= 0:
+        try:
+            # 대부분은 온전한 JSON → C 디코더가 끝 위치까지 한 번에 (뒤따르는 텍스트는 무시)
+            obj, end = _decoder.raw_decode(head, bi)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict):
+            meta = obj
+        else:
+            meta, status, end = _scan_meta(head, bi)
+    if mi >= 0:
+        md = text[mi + len(MD_MARK):]
+    elif meta:
+        md = _after_json(text[end:])
     else:
-        md = f"# 자동 노트(임시)\n\n```\n{text.strip()}\n```"
-    return j, md
+        # JSON 도 마커도 없음 → 모델이 노트만 쓴 것으로 보고 그대로 (마커 잔해만 제거)
+        md = text.replace(JSON_MARK, "")
+    meta, md = _unwrap_structured(meta, md)
+    if not meta:
+        status = "markdown_only" if md else "failed"
+    return meta, md, status
+
+def _rescan(text: str) -> _BraceScanner:
+    sc = _BraceScanner()
+    sc.scan(text)
+    return sc
+
+class DualStreamParser:
+    """
+    ====JSON==== / ====MARKDOWN==== 응답을 스트림 델타 단위로 파싱.
+    feed(delta) -> [("meta", dict) | ("markdown", str), ...]
+    - JSON 은 괄호 짝이 맞는 순간(마커를 기다리지 않고) meta 이벤트 1회
+    - MARKDOWN 마커 뒤는 도착하는 즉시 그대로 흘려보냄
+    finish() -> (meta, markdown): 마커가 끝내 안 오면 parse_output 으로 전체를 다시 해석 (status 도 갱신)
+    """
+
+    def __init__(self):
+        self.meta: dict | None = None
+        self.status = "ok"
+        self._fixed = False
+        self._raw: list[str] = []
+        self._pre = ""        # JSON 시작 전
+        self._json = ""       # '{' 부터 (닫히기 전까지)
+        self._tail = ""       # JSON 뒤 ~ MARKDOWN 마커 전
+        self._scanner: _BraceScanner | None = None
+        self._md: list[str] = []
+        self._in_markdown = False
+
+    def feed(self, delta: str) -> list[tuple[str, object]]:
+        self._raw.append(delta)
+        if self._in_markdown:
+            return self._emit_markdown(delta)
+        out: list[tuple[str, object]] = []
+        if self.meta is None and self._scanner is None:
+            self._pre += delta
+            i = self._pre.find(MD_MARK)
+            head = self._pre if i < 0 else self._pre[:i]
+            bi = _json_start(head, JSON_MARK in head)
+            if bi < 0:
+                if i >= 0:
+                    # JSON 없이 바로 마크다운
+                    self.meta = {}
+                    return self._start_markdown(self._pre[i + len(MD_MARK):])
+                return out
+            self._scanner = _BraceScanner()
+            delta, self._pre = self._pre[bi:], self._pre[:bi]
+        if self.meta is None:
+            self._json += delta
+            e = self._scanner.scan(self._json)
+            if e < 0:
+                i = self._json.find(MD_MARK, max(0, len(self._json) - len(delta) - len(MD_MARK)))
+                if i < 0:
+                    return out
+                # JSON 이 닫히기 전에 마커 → 잘린 JSON 복구
+                self.meta, self._fixed = _recover_json(self._json[:i].rstrip(), _rescan(self._json[:i].rstrip())), True
+                out.append(("meta", self.meta))
+                return out + self._start_markdown(self._json[i + len(MD_MARK):])
+            meta, self._fixed = _loads_obj(self._json[:e])
+            meta, md = _unwrap_structured(meta or {}, "")
+            self.meta = meta
+            out.append(("meta", meta))
+            if md:
+                # 구조화 출력: 마크다운이 JSON 문자열 안에 통째로 들어 있음
+                return out + self._start_markdown(md)
+            delta = self._json[e:]
+        self._tail += delta
+        i = self._tail.find(MD_MARK)
+        if i >= 0:
+            out += self._start_markdown(self._tail[i + len(MD_MARK):])
+        return out
+
+    def _start_markdown(self, rest: str) -> list[tuple[str, object]]:
+        self._in_markdown = True
+        return self._emit_markdown(rest)
+
+    def _emit_markdown(self, delta: str) -> list[tuple[str, object]]:
+        if not self._md:
+            delta = delta.lstrip()  # 마커 직후 공백/개행은 버림
+        if not delta:
+            return []
+        self._md.append(delta)
+        return [("markdown", delta)]
+
+    def finish(self) -> tuple[dict, str]:
+        if self._in_markdown:
+            meta, md = self.meta or {}, "".join(self._md).strip()
+            self.status = ("recovered" if self._fixed else "ok") if meta else ("markdown_only" if md else "failed")
+            return meta, md
+        meta, md, self.status = parse_output("".join(self._raw))
+        return meta, md
 
-def inject_frontmatter(markdown: str, title: str, project: str, source: str | None, turns: int, tags: list[str] | None = None) -> str:
-    iso = datetime.now(timezone.utc).isoformat()
+RELATED_HEADING = "## 🔗 관련 노트"
+_related_section = re.compile(r"\n*^" + re.escape(RELATED_HEADING) + r"\n(?:- .*(?:\n|$))*\s*\Z", re.M)
+_wikilink_unsafe = re.compile(r"[\[\]|#^]")
+
+def _wikilink(note: dict) -> str:
+    stem = Path(note["path"]).stem
+    title = " ".join(_wikilink_unsafe.sub(" ", note.get("title") or "").split())
+    return f"[[{stem}|{title}]]" if title and title != stem else f"[[{stem}]]"
+
+def strip_related(markdown: str) -> str:
+    # 본문 끝의 관련 노트 섹션 (다시 저장할 때 새 목록으로 교체)
+    return _related_section.sub("", markdown)
+
+def related_section(related: list[dict]) -> str:
+    """
+    관련 노트 [[wikilink]] 목록을 본문 끝에 붙일 섹션. 없으면 빈 문자열.
+    """
+    if not related:
+        return ""
+    return f"\n\n{RELATED_HEADING}\n" + "".join(f"- {_wikilink(n)}\n" for n in related)
+
+def related_frontmatter(related: list[dict]) -> str | None:
+    # frontmatter related: ["[[a|제목]]", ...] (Obsidian 속성에서 링크로 보임)
+    return json.dumps([_wikilink(n) for n in related], ensure_ascii=False) if related else None
+
+def frontmatter(title: str, project: str, source: str | None, turns: int, tags: list[str] | None = None,
+                created: str | None = None, extra: dict | None = None) -> str:
+    iso = created or datetime.now(timezone.utc).isoformat()
     tags_str = "[" + ", ".join(tags or []) + "]"
-    fm = f"""---
+    extra_str = "".join(f"{k}: {v}\n" for k, v in (extra or {}).items() if v is not None)
+    return f"""---
 title: {title}
 project: {project}
 created: {iso}
 tags: {tags_str}
 source: {source or "chat"}
 turns: {turns}
----
+{extra_str}---
 """
-    if markdown.lstrip().startswith("---"):
-        # 이미 frontmatter 있으면 그대로 둠
-        return markdown
-    return fm + "\n" + markdown
+
+def _fm_key(line: str) -> str | None:
+    key, sep, _ = line.partition(":")
+    return key.strip() if sep and key.strip() and not line.startswith((" ", "\t", "-")) else None
+
+def merge_frontmatter(markdown: str, block: str) -> str:
+    """
+    block(frontmatter()) + 본문. 본문(모델 출력)이 이미 frontmatter 로 시작하면 한 블록으로 합침:
+    우리 키(status/fingerprint/content_hash 등)가 이기고, 모델만 쓴 키(aliases 등, 들여쓴 목록 줄 포함)는 유지.
+    """
+    text = markdown.lstrip()
+    end = text.find("\n---", 3) if text.startswith("---") else -1
+    if end < 0:
+        return block + "\n" + markdown
+    ours = block.strip().split("\n")[1:-1]
+    keys = {_fm_key(line) for line in ours}
+    kept, drop = [], False
+    for line in text[3:end].split("\n"):
+        key = _fm_key(line)
+        if key is not None:
+            drop = key in keys
+        if not drop and line.strip():
+            kept.append(line)
+    rest = text[end + 4:].partition("\n")[2]
+    return "---\n" + "".join(line + "\n" for line in kept + ours) + "---\n\n" + rest.lstrip("\n")
+
+def note_parts(parts: list[str], **fm) -> list[str]:
+    """
+    inject_frontmatter 의 조각 버전: [frontmatter, "\n", *parts]. 본문이 이미 frontmatter 로 시작하면 그 블록에 합침.
+    """
+    i = next((i for i, p in enumerate(parts) if p.strip()), None)
+    if i is not None and parts[i].lstrip().startswith("---"):
+        return [merge_frontmatter(parts[i], frontmatter(**fm)), *parts[i + 1:]]
+    return [frontmatter(**fm), "\n", *parts]
+
+def inject_frontmatter(markdown: str, title: str, project: str, source: str | None, turns: int, tags: list[str] | None = None, created: str | None = None, extra: dict | None = None) -> str:
+    return merge_frontmatter(markdown, frontmatter(title, project, source, turns, tags, created, extra))
@@ -0,0 +1,145 @@
+import hashlib
+from itertools import islice
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from .cache import iter_normalized
+
+# 증분 분석 상태 저장소
+# (project, 대화 지문)마다 "마지막으로 분석한 앞부분"을 기억해 두고,
+# 다음 저장 때는 새로 붙은 턴만 LLM에 보낸 뒤 기존 노트 파일에 병합한다.
+# 지문(앞 2턴)은 버킷일 뿐: 같은 질문으로 시작한 다른 스레드들이 한 파일에 각자 상태로 들어가고,
+# 조회는 분석한 앞부분 전체의 해시(prefix_hash)가 맞는 상태 중 가장 긴 것.
+
+FINGERPRINT_HEAD_TURNS = 2
+MAX_STATES_PER_FINGERPRINT = 16
+
+
+def prefix_hash(conversation: List[Dict[str, Any]], n: int) -> str:
+    h = hashlib.sha256()
+    for role, content in iter_normalized(islice(conversation, n)):
+        h.update(role.encode("utf-8"))
+        h.update(b"\x00")
+        h.update(content.encode("utf-8"))
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
+def conversation_fingerprint(conversation: List[Dict[str, Any]]) -> str:
+    # 스레드 식별: 첫 질문/첫 답변이 같으면 같은 대화로 본다
+    return prefix_hash(conversation, FINGERPRINT_HEAD_TURNS)
+
+
+def _union(prev: list, new: list) -> list:
+    out, seen = [], set()
+    for item in list(prev) + list(new):
+        k = json.dumps(item, ensure_ascii=False, sort_keys=True)
+        if k in seen:
+            continue
+        seen.add(k)
+        out.append(item)
+    return out
+
+
+def merge_meta(prev: Dict[str, Any], new: Dict[str, Any], complete: bool = False) -> Dict[str, Any]:
+    """
+    이전 meta + 증분 분석 meta 병합.
+    - complete (모델 JSON 이 그대로 파싱됨): 모델이 낸 전체 meta 를 그대로 씀. 해결돼서 지운 약점/질문,
+      고친 항목이 되살아나거나 중복되지 않게. 모델이 빠뜨린 키(빈 title 포함)만 이전 값
+    - 아니면 (고쳐서 파싱/실패): 리스트는 순서 유지 합집합, title 은 이전 값 유지, 나머지 스칼라는 새 값 우선
+    """
+    merged = dict(prev or {})
+    if complete:
+        merged.update({k: v for k, v in (new or {}).items() if k != "title" or v})
+        return merged
+    for k, v in (new or {}).items():
+        if k == "title" and merged.get("title"):
+            continue
+        if isinstance(v, list) and isinstance(merged.get(k), list):
+            merged[k] = _union(merged[k], v)
+        else:
+            merged[k] = v
+    return merged
+
+
+class IncrementalStore:
+    """
+    상태 = {"turns", "prefix_hash", "meta", "markdown", "file", "created", "updated"} (+ "draft": 초안 파일만 기록)
+    지문 하나당 파일 하나: <root>/<project>/<fingerprint>.json = {"states": [상태, ...]} (스레드마다 하나)
+    """
+
+    def __init__(self, root: str | Path, max_states: int = MAX_STATES_PER_FINGERPRINT):
+        self.root = Path(root)
+        self.max_states = max_states
+        self._lock = threading.Lock()
+
+    def _path(self, project: str, fingerprint: str) -> Path:
+        safe_project = hashlib.sha1(project.encode("utf-8")).hexdigest()[:16]
+        return self.root / safe_project / f"{fingerprint}.json"
+
+    def get(self, project: str, fingerprint: str) -> List[Dict[str, Any]]:
+        path = self._path(project, fingerprint)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            print("[incremental] broken state, ignoring:", path, repr(e))
+            return []
+        if not isinstance(data, dict):
+            return []
+        if "states" not in data:
+            return [data]   # 예전 형식: 지문 하나에 상태 하나
+        return data["states"] or []
+
+    @staticmethod
+    def _extends(state: Dict[str, Any], conversation: List[Dict[str, Any]]) -> bool:
+        # conversation 이 이 상태가 분석한 앞부분으로 시작하는지
+        n = int(state.get("turns") or 0)
+        return 0 < n <= len(conversation) and prefix_hash(conversation, n) == state.get("prefix_hash")
+
+    def put(self, project: str, fingerprint: str, *, conversation: List[Dict[str, Any]],
+            meta: Dict[str, Any], markdown: str, file: str, created: str | None = None,
+            content_hash: str | None = None, draft: bool = False) -> None:
+        # content_hash: 호출 쪽에서 이미 계산한 prefix_hash(conversation, len(conversation))
+        state = {
+            "turns": len(conversation),
+            "prefix_hash": content_hash or prefix_hash(conversation, len(conversation)),
+            "meta": meta,
+            "markdown": markdown,
+            "file": file,
+            "created": created,
+            "updated": time.time(),
+        }
+        if draft:
+            state["draft"] = True
+        path = self._path(project, fingerprint)
+        with self._lock:
+            # 같은 노트 파일이거나 이 대화의 앞부분인 상태(같은 스레드의 이전 저장)는 교체, 다른 스레드는 유지
+            states = [s for s in self.get(project, fingerprint)
+                      if s.get("file") != file and not self._extends(s, conversation)]
+            states.sort(key=lambda s: s.get("updated") or 0)
+            del states[:max(0, len(states) - self.max_states + 1)]   # 오래된 스레드부터
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps({"states": states + [state]}, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def lookup(self, project: str, conversation: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        이 대화가 저장된 상태의 "연장"이면 상태를 반환 (여럿이면 가장 긴 앞부분), 아니면 None.
+        (앞부분이 수정/재생성된 경우 해시가 달라져 전체 재분석으로 넘어감)
+        """
+        best = None
+        for state in self.get(project, conversation_fingerprint(conversation)):
+            if self._extends(state, conversation) and (best is None or state["turns"] > best["turns"]):
+                best = state
+        return best
+
+
+incremental_store = IncrementalStore(settings.INCREMENTAL_STATE_DIR)
@@ -0,0 +1,102 @@
+from typing import Callable, Type, TypeVar
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from starlette.exceptions import HTTPException
+
+from ..config import settings
+
+# 요청 본문 수신
+# - 크기 상한(MAX_BODY_MB): Content-Length 가 넘으면 읽기 전에, chunked 면 받는 중에 세어서 넘는 순간 413
+# - 대화 라우트 본문: request.json() → dict → 모델 (문자열 두 벌 + 바이트) 대신 바이트를 모아 model_validate_json 한 번
+#   → 파싱이 끝나면 바이트는 버리고 모델 문자열 한 벌만 남음
+
+M = TypeVar("M", bound=BaseModel)
+EXEMPT_PREFIXES = ("/api/import/",)   # 본문을 조각째로 임시 파일에 받는 라우트
+
+
+def max_body_bytes() -> int:
+    return int(settings.MAX_BODY_MB * 1024 * 1024)
+
+
+def too_large(limit: int) -> HTTPException:
+    # HTTPException 이라 FastAPI 본문 파싱 중에 나도 400 으로 바뀌지 않고 그대로 413
+    return HTTPException(status_code=413, detail=f"request body exceeds {limit / 2 ** 20:.0f} MB (MAX_BODY_MB)")
+
+
+class BodyLimitMiddleware:
+    """
+    모든 라우트 공통 본문 상한 (순수 ASGI — 본문을 버퍼링하지 않고 receive 만 감쌈).
+    """
+
+    def __init__(self, app, max_bytes: int, exempt: tuple = EXEMPT_PREFIXES):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0 or scope["path"].startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_bytes:
+            await self._reject(send)
+            return
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise too_large(self.max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            # 라우트 밖(미들웨어)에서 receive 가 터진 경우
+            if e.status_code != 413 or started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send) -> None:
+        body = b'{"detail":"request body too large (MAX_BODY_MB)"}'
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+async def read_body(request: Request, limit: int) -> bytearray:
+    buf = bytearray()
+    async for chunk in request.stream():
+        buf += chunk
+        if limit and len(buf) > limit:
+            raise too_large(limit)
+    return buf
+
+
+def json_body(model: Type[M]) -> Callable:
+    """
+    Depends(json_body(Model)): 본문을 모아 Model.model_validate_json 으로 바로 검증 (중간 dict 없음).
+    검증 실패는 FastAPI 기본 본문과 같은 422.
+    """
+    async def dependency(request: Request) -> M:
+        buf = await read_body(request, max_body_bytes())
+        try:
+            return model.model_validate_json(buf)
+        except ValidationError as e:
+            # JSON 자체가 깨졌으면 input 이 본문 바이트 전체 → 응답에 되돌려 보내지 않음
+            raise RequestValidationError([{**err, "loc": ("body", *err["loc"]),
+                                           "input": None if isinstance(err.get("input"), (bytes, bytearray)) else err.get("input")}
+                                          for err in e.errors(include_url=False)])
+    return dependency
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..config import settings
+
+# 백그라운드 작업 큐 (SQLite 저널 → 서버 재시작해도 작업 유지)
+# - enqueue 즉시 job id 반환, 워커 N개가 priority 높은 순 → 오래된 순으로 처리
+# - 같은 dedup_key 의 대기/실행 중 작업이 있으면 새로 만들지 않고 그 id 반환
+# - 재시작 시 running 으로 남은 작업은 queued 로 되돌려 다시 처리
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id        TEXT PRIMARY KEY,
+    kind      TEXT NOT NULL,
+    dedup_key TEXT,
+    priority  INTEGER NOT NULL DEFAULT 0,
+    status    TEXT NOT NULL,            -- queued | running | done | failed
+    payload   TEXT NOT NULL,
+    result    TEXT,
+    error     TEXT,
+    attempts  INTEGER NOT NULL DEFAULT 0,
+    created   REAL NOT NULL,
+    started   REAL,
+    finished  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, created);
+CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status);
+"""
+
+
+class QueueFull(Exception):
+    pass
+
+
+def payload_key(kind: str, payload: Dict[str, Any]) -> str:
+    raw = json.dumps([kind, payload], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class JobQueue:
+    def __init__(self, db_path: str | Path, workers: int = 2, max_pending: int = 1000,
+                 max_attempts: int = 2, retention_s: float = 7 * 86400):
+        self.db_path = Path(db_path)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retention_s = retention_s
+        self.handlers: Dict[str, Handler] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    # --- DB ---
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def _row(self, row: sqlite3.Row | None) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job.pop("payload", None)
+        job["result"] = json.loads(job["result"]) if job.get("result") else None
+        return job
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], priority: int = 0,
+                dedup_key: str | None = None) -> Tuple[str, bool]:
+        """
+        (job_id, deduplicated) 반환. 대기열이 가득 차면 QueueFull.
+        """
+        dedup_key = dedup_key or payload_key(kind, payload)
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT id, priority FROM jobs WHERE dedup_key=? AND status IN ('queued','running') LIMIT 1",
+                (dedup_key,)).fetchone()
+            if row is not None:
+                if priority > row["priority"]:
+                    # 더 급한 요청이 같은 작업을 다시 넣으면 우선순위만 올려 준다
+                    db.execute("UPDATE jobs SET priority=? WHERE id=? AND status='queued'", (priority, row["id"]))
+                return row["id"], True
+            pending = db.execute("SELECT COUNT(*) FROM jobs WHERE status='queued'").fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFull(f"job queue is full ({pending} pending)")
+            job_id = uuid.uuid4().hex
+            db.execute(
+                "INSERT INTO jobs (id, kind, dedup_key, priority, status, payload, created) VALUES (?,?,?,?,?,?,?)",
+                (job_id, kind, dedup_key, priority, "queued", json.dumps(payload, ensure_ascii=False), time.time()))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id, False
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn().execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+            job = self._row(row)
+            if job and job["status"] == "queued":
+                job["position"] = self._conn().execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status='queued' AND (priority > ? OR (priority = ? AND created < ?))",
+                    (row["priority"], row["priority"], row["created"])).fetchone()[0]
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        out = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        out.update({r["status"]: r["n"] for r in rows})
+        return out
+
+    def _claim(self) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status='queued' ORDER BY priority DESC, created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE jobs SET status='running', started=?, attempts=attempts+1 WHERE id=?",
+                       (time.time(), row["id"]))
+            return row["id"], row["kind"], json.loads(row["payload"])
+
+    def _finish(self, job_id: str, result: Dict[str, Any] | None, error: str | None) -> None:
+        with self._lock:
+            db = self._conn()
+            if error is not None:
+                attempts = db.execute("SELECT attempts FROM jobs WHERE id=?", (job_id,)).fetchone()[0]
+                status = "queued" if attempts < self.max_attempts else "failed"
+            else:
+                status = "done"
+            db.execute("UPDATE jobs SET status=?, result=?, error=?, finished=? WHERE id=?",
+                       (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                        error, time.time(), job_id))
+
+    def _recover(self) -> None:
+        with self._lock:
+            db = self._conn()
+            # 이전 프로세스가 처리하다 죽은 작업은 다시 대기열로
+            n = db.execute("UPDATE jobs SET status='queued' WHERE status='running'").rowcount
+            db.execute("DELETE FROM jobs WHERE status IN ('done','failed') AND finished < ?",
+                       (time.time() - self.retention_s,))
+        if n:
+            print(f"[jobs] requeued {n} interrupted job(s)")
+
+    # --- 워커 ---
+    async def _worker(self, n: int) -> None:
+        assert self._wakeup is not None
+        while True:
+            claimed = await asyncio.to_thread(self._claim)
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    # enqueue 가 깨워 주지만, 다른 프로세스가 넣은 작업도 주기적으로 확인
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job_id, kind, payload = claimed
+            handler = self.handlers.get(kind)
+            try:
+                if handler is None:
+                    raise RuntimeError(f"no handler for job kind {kind!r}")
+                result = await handler(payload)
+                await asyncio.to_thread(self._finish, job_id, result, None)
+            except asyncio.CancelledError:
+                raise  # 종료 중: running 으로 남은 작업은 다음 시작 때 _recover 가 되살림
+            except Exception as e:
+                print(f"[jobs] worker {n} job {job_id} failed:", repr(e))
+                await asyncio.to_thread(self._finish, job_id, None, repr(e))
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self._recover)
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(max(1, self.workers))]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+job_queue = JobQueue(
+    db_path=settings.JOBS_DB_PATH,
+    workers=settings.JOBS_WORKERS,
+    max_pending=settings.JOBS_MAX_PENDING,
+    max_attempts=settings.JOBS_MAX_ATTEMPTS,
+    retention_s=settings.JOBS_RETENTION_DAYS * 86400,
+)
@@ -0,0 +1,260 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tokens import estimate_tokens
+
+# 프로세스 내 메트릭 (prometheus_client 없이 텍스트 포맷만 직접 출력)
+# - Counter / Histogram: 라벨 값 튜플별 누적. 기록은 잠금 1번 + bisect 1번 (수백 ns)
+# - Gauge: 스크레이프 시점에 콜백으로 읽음 (큐 깊이 등)
+# - stage("이름"): 구간 시간을 stage 히스토그램에 기록하고, 요청이 Server-Timing 을 원하면 요청별 목록에도 남김
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+PREFIX = "gpt2note_"
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name, self.help, self.labelnames = PREFIX + name, help, tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, value: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}_total{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = PREFIX + name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, list] = {}   # labels -> [버킷별 개수(비누적)..., +Inf 개수, 합계]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            s[i] += 1
+            s[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        out = []
+        for k, s in items:
+            acc = 0
+            for le, n in zip(self.buckets + (float("inf"),), s[:-1]):
+                acc += n
+                le_label = 'le="%s"' % _fmt(le)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, le_label)} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_fmt(s[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {acc}")
+        return out
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 fn: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        self.name, self.help, self.labelnames = PREFIX + name, help, tuple(labelnames)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        if self.fn is None:
+            return []
+        try:
+            values = self.fn()
+        except Exception as e:
+            print(f"[metrics] gauge {self.name} failed:", repr(e))
+            return []
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in values.items()]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self.metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "stage_seconds", "Time spent per request stage (prompt_build, llm, parse, frontmatter, write, ...)", ["stage"]))
+LLM_ATTEMPT_SECONDS = registry.register(Histogram(
+    "llm_attempt_seconds", "One HTTP call to an LLM backend per API flavor", ["backend", "flavor", "outcome"]))
+LLM_TOKENS = registry.register(Histogram(
+    "llm_tokens", "Tokens per LLM call (backend counts when reported, otherwise estimated)", ["direction"],
+    buckets=TOKEN_BUCKETS))
+LLM_FAILOVERS = registry.register(Counter(
+    "llm_failovers", "LLM calls that failed on one backend and moved to the next", ["backend"]))
+PARSE_RESULTS = registry.register(Counter(
+    "parse_results", "LLM response parse results (ok, recovered, markdown_only, failed)", ["result"]))
+SAVE_RESULTS = registry.register(Counter(
+    "save_results", "save+analyze outcomes (analyzed, fallback, incremental_fallback, degraded, duplicate, unchanged, draft, refined, "
+    "refine_skipped, error)",
+    ["result"]))
+VAULT_WRITE_BATCH = registry.register(Histogram(
+    "vault_write_batch_size", "Vault write operations handled per writer batch (one fsync group)",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)))
+ADMISSION_RESULTS = registry.register(Counter(
+    "admission_results", "LLM admission decisions (admitted, rate_limited, shed_queue_full, shed_deadline, "
+    "timeout_in_queue, degraded)", ["result"]))
+HTTP_SECONDS = registry.register(Histogram(
+    "http_request_seconds", "HTTP request latency by route", ["method", "route", "status"]))
+
+
+# --- 기동 시간 (server.app 이 채움: import / create_app / lifespan) ---
+startup_timings: Dict[str, float] = {}
+registry.register(Gauge("startup_seconds", "Process startup phases (import, create_app, lifespan)", ["phase"],
+                        fn=lambda: {(k,): v for k, v in startup_timings.items()}))
+
+
+# --- 요청별 구간 기록 (Server-Timing) ---
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("gpt2note_timings", default=None)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, name)
+    t = _timings.get()
+    if t is not None:
+        t.append((name, seconds))
+
+
+class stage:
+    """
+    with stage("write"): ...   (async 코드에서도 그대로. contextvar 라 요청/작업별로 분리됨)
+    """
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.name, perf_counter() - self.t0)
+        return False
+
+
+def collect_timings() -> Tuple[List[Tuple[str, float]], object]:
+    """
+    이후 이 컨텍스트에서 기록되는 구간을 모을 목록을 설정. (목록, 복원 토큰)
+    """
+    timings: List[Tuple[str, float]] = []
+    return timings, _timings.set(timings)
+
+
+def reset_timings(token) -> None:
+    _timings.reset(token)
+
+
+def server_timing_value(timings: List[Tuple[str, float]], total: float | None = None) -> str:
+    # 같은 이름이 여러 번이면 합쳐서 (LLM 재시도 등) 순서는 처음 나온 순
+    merged: Dict[str, float] = {}
+    for name, s in timings:
+        merged[name] = merged.get(name, 0.0) + s
+    parts = [f"{n};dur={s * 1000:.1f}" for n, s in merged.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def timings_dict(timings: List[Tuple[str, float]]) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for name, s in timings:
+        out[name] = round(out.get(name, 0.0) + s * 1000, 1)
+    return out
+
+
+class MetricsMiddleware:
+    """
+    ASGI 미들웨어: 라우트별 요청 지연 히스토그램 + (opt-in) Server-Timing 헤더.
+    Server-Timing 은 settings.SERVER_TIMING 이거나 요청 헤더 "x-server-timing: 1" 일 때만 붙인다.
+    스트리밍 응답은 헤더가 먼저 나가므로 그 시점까지의 구간만 담긴다.
+    """
+
+    def __init__(self, app, always: bool = False):
+        self.app = app
+        self.always = always
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = perf_counter()
+        wants = self.always or (b"x-server-timing", b"1") in scope.get("headers", ())
+        timings, token = collect_timings() if wants else (None, None)
+        status = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if timings is not None:
+                    value = server_timing_value(timings, perf_counter() - t0)
+                    message["headers"] = list(message.get("headers") or []) + [(b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            if token is not None:
+                reset_timings(token)
+            route = scope.get("route")
+            HTTP_SECONDS.observe(perf_counter() - t0, scope["method"], getattr(route, "path", "unmatched"), status[0])
+
+
+def record_tokens(messages, text: str, prompt_tokens: int | None = None, completion_tokens: int | None = None) -> None:
+    """
+    LLM 호출 1회의 입력/출력 토큰. 백엔드가 알려 준 값이 없으면 추정치.
+    """
+    if not prompt_tokens:  # 0 을 돌려주는 호환 서버도 있어 추정치로
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+    if not completion_tokens:
+        completion_tokens = estimate_tokens(text)
+    LLM_TOKENS.observe(prompt_tokens, "in")
+    LLM_TOKENS.observe(completion_tokens, "out")
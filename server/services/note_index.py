@@ -0,0 +1,231 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..config import settings
+from .incremental import prefix_hash
+from ..utils.fs import prefix_range
+
+# 볼트 전체 노트 인덱스 (SQLite)
+# - 서버가 쓰는 노트는 저장 직후 upsert
+# - 시작 시 볼트를 훑어 mtime 이 바뀐/새 파일만 frontmatter 를 다시 읽음 (증분 재구성)
+# - project/tag 목록 조회, 같은 대화 중복 저장 감지(content_hash)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    path         TEXT PRIMARY KEY,
+    project      TEXT,
+    title        TEXT,
+    tags         TEXT,          -- JSON 배열
+    source       TEXT,
+    turns        INTEGER,
+    fingerprint  TEXT,          -- 대화 지문 (첫 턴들)
+    content_hash TEXT,          -- 대화 전체 해시 (중복 저장 감지)
+    created      TEXT,
+    mtime        REAL,
+    size         INTEGER
+);
+CREATE INDEX IF NOT EXISTS notes_project ON notes (project, created DESC);
+CREATE INDEX IF NOT EXISTS notes_created ON notes (created DESC);
+CREATE INDEX IF NOT EXISTS notes_fingerprint ON notes (fingerprint);
+CREATE INDEX IF NOT EXISTS notes_content ON notes (project, content_hash);
+CREATE TABLE IF NOT EXISTS note_tags (
+    path TEXT NOT NULL,
+    tag  TEXT NOT NULL,
+    PRIMARY KEY (tag, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS note_tags_path ON note_tags (path);
+"""
+
+FRONTMATTER_MAX_BYTES = 8192
+
+
+def _parse_value(raw: str) -> Any:
+    raw = raw.strip()
+    if not raw:
+        return ""
+    try:
+        return json.loads(raw)  # app.py 식 JSON 직렬화 값, 숫자
+    except Exception:
+        pass
+    if raw.startswith("[") and raw.endswith("]"):
+        # inject_frontmatter 식: [a, b]
+        return [t.strip().strip("'\"") for t in raw[1:-1].split(",") if t.strip()]
+    return raw
+
+
+def parse_frontmatter(text: str) -> Dict[str, Any]:
+    if not text.startswith("---"):
+        return {}
+    end = text.find("\n---", 3)
+    if end < 0:
+        return {}
+    out = {}
+    for line in text[3:end].splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip() and not key.startswith((" ", "\t", "-")):
+            out[key.strip()] = _parse_value(value)
+    return out
+
+
+def _norm_tags(tags: Any) -> List[str]:
+    if isinstance(tags, str):
+        tags = [tags]
+    out = []
+    for t in tags or []:
+        t = str(t).strip().lstrip("#").strip()
+        if t and t not in out:
+            out.append(t)
+    return out
+
+
+class NoteIndex:
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.last_scan: Dict[str, Any] = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def _upsert_locked(self, db: sqlite3.Connection, path: str, meta: Dict[str, Any], mtime: float, size: int) -> None:
+        tags = _norm_tags(meta.get("tags"))
+        turns = meta.get("turns")
+        db.execute(
+            "INSERT OR REPLACE INTO notes (path, project, title, tags, source, turns, fingerprint, content_hash, created, mtime, size)"
+            " VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+            (path, meta.get("project"), meta.get("title"), json.dumps(tags, ensure_ascii=False), meta.get("source"),
+             int(turns) if str(turns).isdigit() else None, meta.get("fingerprint"), meta.get("content_hash"),
+             str(meta.get("created") or ""), mtime, size))
+        db.execute("DELETE FROM note_tags WHERE path=?", (path,))
+        db.executemany("INSERT OR IGNORE INTO note_tags (path, tag) VALUES (?,?)", [(path, t) for t in tags])
+
+    def upsert(self, path: str, meta: Dict[str, Any]) -> None:
+        """
+        서버가 노트를 쓴 직후 호출. meta 는 frontmatter 에 들어간 값들.
+        """
+        st = os.stat(path)
+        with self._lock:
+            db = self._conn()
+            with db:
+                self._upsert_locked(db, str(path), meta, st.st_mtime, st.st_size)
+
+    def remove(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            db = self._conn()
+            with db:
+                for p in paths:
+                    db.execute("DELETE FROM notes WHERE path=?", (p,))
+                    db.execute("DELETE FROM note_tags WHERE path=?", (p,))
+
+    def scan(self, root: str | Path, batch: int = 500) -> Dict[str, Any]:
+        """
+        볼트 증분 재구성: (mtime, size) 가 같은 파일은 건너뛰고, 사라진 파일은 인덱스에서 제거.
+        """
+        t0 = time.perf_counter()
+        root = str(root)
+        with self._lock:
+            known = {r["path"]: (r["mtime"], r["size"]) for r in
+                     self._conn().execute("SELECT path, mtime, size FROM notes WHERE path >= ? AND path < ?",
+                                          prefix_range(root))}
+        seen, changed = set(), []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]  # .obsidian, .trash 등
+            for name in filenames:
+                if not name.endswith(".md") or name.startswith("."):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                if known.get(path) == (st.st_mtime, st.st_size):
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8", errors="replace") as f:
+                        head = f.read(FRONTMATTER_MAX_BYTES)
+                except OSError:
+                    continue
+                meta = parse_frontmatter(head)
+                if not meta:
+                    meta = {"title": name[:-3]}
+                meta.setdefault("project", os.path.basename(dirpath))
+                changed.append((path, meta, st.st_mtime, st.st_size))
+                if len(changed) >= batch:
+                    self._write_batch(changed)
+                    changed = []
+        if changed:
+            self._write_batch(changed)
+        gone = [p for p in known if p not in seen]
+        if gone:
+            self.remove(gone)
+        self.last_scan = {"root": root, "files": len(seen), "removed": len(gone),
+                          "elapsed_s": round(time.perf_counter() - t0, 3), "at": time.time()}
+        return self.last_scan
+
+    def _write_batch(self, rows) -> None:
+        with self._lock:
+            db = self._conn()
+            with db:
+                for path, meta, mtime, size in rows:
+                    self._upsert_locked(db, path, meta, mtime, size)
+
+    def find_duplicate(self, project: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT * FROM notes WHERE project=? AND content_hash=? ORDER BY created DESC LIMIT 1",
+                (project, content_hash)).fetchone()
+        if row is None:
+            return None
+        d = dict(row)
+        d["tags"] = json.loads(d["tags"] or "[]")
+        return d
+
+    def list(self, project: str | None = None, tag: str | None = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        where, args = [], []
+        if project:
+            where.append("n.project = ?")
+            args.append(project)
+        if tag:
+            where.append("n.path IN (SELECT path FROM note_tags WHERE tag = ?)")
+            args.append(tag.lstrip("#"))
+        sql_where = (" WHERE " + " AND ".join(where)) if where else ""
+        with self._lock:
+            db = self._conn()
+            total = db.execute(f"SELECT COUNT(*) FROM notes n{sql_where}", args).fetchone()[0]
+            rows = db.execute(
+                f"SELECT n.* FROM notes n{sql_where} ORDER BY n.created DESC LIMIT ? OFFSET ?",
+                args + [limit, offset]).fetchall()
+        notes = []
+        for r in rows:
+            d = dict(r)
+            d["tags"] = json.loads(d["tags"] or "[]")
+            notes.append(d)
+        return {"total": total, "notes": notes}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def content_hash_of(conversation: List[Dict[str, Any]]) -> str:
+    return prefix_hash(conversation, len(conversation))
+
+
+note_index = NoteIndex(settings.NOTE_INDEX_DB)
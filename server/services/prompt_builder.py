@@ -0,0 +1,151 @@
+import json
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from ..config import settings
+from .formatters import build_conversation_block
+from .metrics import stage
+from .tokens import estimate_tokens
+
+# 프롬프트 조립
+# - 고정 system(지시문) + 가변 user(컨텍스트/대화) 두 메시지 → 로컬 모델이 지시문 접두부 KV 캐시 재사용
+# - 자리표시자는 정규식 1회 치환 (연쇄 str.replace 는 대화 본문 안의 "{{...}}" 까지 바꿔버림)
+# - 컨텍스트 창(LLM_CONTEXT_TOKENS) - 출력 예약분을 넘으면 턴 단위로 잘라냄:
+#   첫 질문 + 약점 힌트의 근거 턴(과 바로 뒤 답변)을 먼저, 남은 예산은 최신 턴부터
+# - 요청별 프롬프트 토큰 통계 (prompt_stats)
+
+_placeholder = re.compile(r"\{\{(\w+)\}\}")
+
+EVIDENCE_KEYS = ("hot_turns", "repeat_turns", "correction_turns", "confuse_turns")
+EVIDENCE_SHARE = 0.4     # 근거 턴이 차지할 수 있는 대화 예산 비율 (나머지는 최신 턴)
+GAP_TOKENS = 12          # "[… turns a-b omitted …]" 한 줄 몫
+SAFETY_TOKENS = 64       # 추정치 오차 여유
+
+
+def render(template: str, values: Dict[str, Any]) -> str:
+    return _placeholder.sub(lambda m: str(values.get(m.group(1), "")), template)
+
+
+@lru_cache(maxsize=64)
+def _template_tokens(template: str) -> int:
+    return estimate_tokens(_placeholder.sub("", template))
+
+
+def fit_turns(conversation: List[Dict[str, Any]], hints: Dict[str, Any] | None, budget: int,
+              start: int = 1) -> Tuple[str, int]:
+    """
+    예산 안에 들어가는 대화 블록과 빠진 턴 수. 턴 번호는 원래 번호(start 부터)를 유지.
+    """
+    costs = [estimate_tokens(m.get("content") or "") + 4 for m in conversation]
+    n = len(conversation)
+    if sum(costs) <= budget:
+        return build_conversation_block(conversation, start), 0
+
+    keep: set = set()
+    used = 0
+
+    def take(k: int, limit: int) -> bool:
+        nonlocal used
+        if k in keep or not 0 <= k < n or used + costs[k] + GAP_TOKENS > limit:
+            return False
+        keep.add(k)
+        used += costs[k] + GAP_TOKENS
+        return True
+
+    evidence_limit = int(budget * EVIDENCE_SHARE)
+    take(0, evidence_limit)  # 첫 질문 = 대화 주제
+    for key in EVIDENCE_KEYS:
+        for t in (hints or {}).get(key) or []:
+            if isinstance(t, int) and take(t - start, evidence_limit):
+                take(t - start + 1, evidence_limit)  # 질문에 대한 바로 다음 답
+
+    turns: Dict[int, Dict[str, Any]] = {}
+    for k in range(n - 1, -1, -1):
+        if k in keep:
+            continue
+        if take(k, budget):
+            continue
+        if k == n - 1:
+            # 가장 최근 턴 하나가 예산보다 크면 앞부분만
+            room = max(0, budget - used - GAP_TOKENS - 4)
+            content = conversation[k].get("content") or ""
+            cut = max(1, len(content) * room // max(1, costs[k]))
+            turns[k] = {**conversation[k], "content": content[:cut] + "\n…(잘림)"}
+            keep.add(k)
+            used = budget
+            continue
+        break
+
+    lines: List[str] = []
+    prev = -1
+    for k in sorted(keep):
+        if k > prev + 1:
+            lines.append(f"[… turns {prev + 1 + start}-{k + start - 1} omitted …]")
+        m = turns.get(k, conversation[k])
+        lines.append(f"[{k + start}][{m['role']}] {m['content']}")
+        prev = k
+    if prev < n - 1:
+        lines.append(f"[… turns {prev + 1 + start}-{n + start - 1} omitted …]")
+    return "\n".join(lines), n - len(keep)
+
+
+class PromptStats:
+    """
+    요청별 프롬프트 토큰(추정) 통계. kind = analyze / incremental / map / reduce
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_kind: Dict[str, Dict[str, Any]] = {}
+
+    def observe(self, kind: str, system_tokens: int, user_tokens: int, dropped_turns: int) -> None:
+        total = system_tokens + user_tokens
+        with self._lock:
+            s = self.by_kind.setdefault(kind, {"requests": 0, "prompt_tokens": 0, "max_prompt_tokens": 0,
+                                                "system_tokens": 0, "trimmed": 0, "dropped_turns": 0})
+            s["requests"] += 1
+            s["prompt_tokens"] += total
+            s["max_prompt_tokens"] = max(s["max_prompt_tokens"], total)
+            s["system_tokens"] = system_tokens
+            if dropped_turns:
+                s["trimmed"] += 1
+                s["dropped_turns"] += dropped_turns
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {k: {**v, "avg_prompt_tokens": round(v["prompt_tokens"] / v["requests"], 1)}
+                    for k, v in self.by_kind.items()}
+
+
+prompt_stats = PromptStats()
+
+
+def conversation_budget(system: str, user_template: str, values: Dict[str, Any], reserve: int) -> int:
+    """
+    대화 블록에 쓸 수 있는 토큰 = 컨텍스트 창 - 출력 예약 - system - user 의 나머지 부분.
+    """
+    fixed = _template_tokens(system) + _template_tokens(user_template)
+    fixed += sum(estimate_tokens(str(v)) for k, v in values.items() if k != "conversation_block")
+    return settings.LLM_CONTEXT_TOKENS - reserve - fixed - SAFETY_TOKENS
+
+
+def build_messages(kind: str, system: str, user_template: str, values: Dict[str, Any], *,
+                   reserve: int, conversation: List[Dict[str, Any]] | None = None,
+                   hints: Dict[str, Any] | None = None, start: int = 1) -> List[Dict[str, str]]:
+    """
+    [system(고정), user(가변)] messages. conversation 을 주면 예산에 맞춰 잘라 {{conversation_block}} 을 채운다.
+    values 의 dict/list 값은 JSON 으로 직렬화.
+    """
+    with stage("prompt_build"):
+        values = {k: json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v for k, v in values.items()}
+        dropped = 0
+        if conversation is not None:
+            budget = conversation_budget(system, user_template, values, reserve)
+            values["conversation_block"], dropped = fit_turns(conversation, hints, max(256, budget), start)
+            if dropped:
+                print(f"[prompt] {kind}: trimmed {dropped}/{len(conversation)} turns to fit {settings.LLM_CONTEXT_TOKENS} ctx")
+        user = render(user_template, values)
+        prompt_stats.observe(kind, _template_tokens(system), estimate_tokens(user), dropped)
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
@@ -0,0 +1,303 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..config import settings
+from .note_index import parse_frontmatter, _norm_tags
+from ..utils.fs import prefix_range
+
+# 노트 전문/태그 검색 (SQLite 위의 역색인 + BM25)
+# - 토큰화: 영문/숫자는 단어 단위, 한글은 2-gram (조사/어미가 붙어도 부분 일치)
+# - 필드 가중치: 제목 > 태그 > 약한 개념/용어 > 본문. 필드별 tf 에 가중치를 곱해 한 posting 으로 저장
+# - 노트 단위 증분 갱신 (문서 빈도/전체 길이 통계도 함께 갱신)
+
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.5, "weak_points": 2.0, "glossary": 2.0, "body": 1.0}
+BODY_MAX_CHARS = 200_000
+K1, B = 1.2, 0.75
+
+_word = re.compile(r"[0-9a-z][0-9a-z_+#.\-]*[0-9a-z+#]|[0-9a-z]|[가-힣]+")
+_hangul = re.compile(r"[가-힣]")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id  INTEGER PRIMARY KEY,
+    path    TEXT UNIQUE NOT NULL,
+    project TEXT,
+    title   TEXT,
+    tags    TEXT,
+    len     REAL NOT NULL,
+    mtime   REAL,
+    size    INTEGER
+);
+CREATE INDEX IF NOT EXISTS docs_project ON docs (project);
+CREATE TABLE IF NOT EXISTS postings (
+    term   TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf     REAL NOT NULL,
+    dl     REAL NOT NULL,       -- 문서 길이 (집계 중 docs 조인을 피하려고 중복 저장)
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df   INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+    k TEXT PRIMARY KEY,
+    v REAL NOT NULL
+);
+INSERT OR IGNORE INTO stats (k, v) VALUES ('n', 0), ('total_len', 0);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    out: List[str] = []
+    for w in _word.findall((text or "").lower()):
+        if _hangul.match(w):
+            if len(w) == 1:
+                out.append(w)
+            else:
+                out.extend(w[i:i + 2] for i in range(len(w) - 1))
+        elif len(w) > 1 or w.isdigit():
+            out.append(w)
+    return out
+
+
+def _as_list(v: Any) -> List[str]:
+    if v is None:
+        return []
+    if isinstance(v, str):
+        return [v]
+    out = []
+    for item in v:
+        if isinstance(item, dict):
+            out.append(str(item.get("concept") or item.get("term") or ""))
+        else:
+            out.append(str(item))
+    return out
+
+
+def note_fields(text: str) -> Dict[str, Any]:
+    """
+    노트 파일 내용 → 검색 필드. (frontmatter 의 title/tags/weak_points/glossary + 본문)
+    """
+    fm = parse_frontmatter(text)
+    body = text
+    if fm:
+        end = text.find("\n---", 3)
+        body = text[end + 4:] if end >= 0 else text
+    title = fm.get("title")
+    if not title:
+        m = re.search(r"^#\s+(.+)$", body, flags=re.M)
+        title = m.group(1).strip() if m else ""
+    return {
+        "title": str(title),
+        "project": fm.get("project"),
+        "tags": _norm_tags(fm.get("tags")),
+        "weak_points": _as_list(fm.get("weak_points")),
+        "glossary": _as_list(fm.get("glossary")),
+        "body": body[:BODY_MAX_CHARS],
+    }
+
+
+class SearchIndex:
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.last_scan: Dict[str, Any] = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    # --- 색인 ---
+    def _remove_locked(self, db: sqlite3.Connection, doc_id: int, length: float) -> None:
+        terms = [r[0] for r in db.execute("SELECT term FROM postings WHERE doc_id=?", (doc_id,))]
+        db.executemany("UPDATE terms SET df = df - 1 WHERE term=?", [(t,) for t in terms])
+        db.execute("DELETE FROM postings WHERE doc_id=?", (doc_id,))
+        db.execute("DELETE FROM docs WHERE doc_id=?", (doc_id,))
+        db.execute("UPDATE stats SET v = v - 1 WHERE k='n'")
+        db.execute("UPDATE stats SET v = v - ? WHERE k='total_len'", (length,))
+
+    def _index_locked(self, db: sqlite3.Connection, path: str, fields: Dict[str, Any], mtime: float, size: int) -> None:
+        row = db.execute("SELECT doc_id, len FROM docs WHERE path=?", (path,)).fetchone()
+        if row is not None:
+            self._remove_locked(db, row["doc_id"], row["len"])
+        tf: Counter = Counter()
+        for name, weight in FIELD_WEIGHTS.items():
+            value = fields.get(name)
+            text = " ".join(value) if isinstance(value, list) else (value or "")
+            for t in tokenize(text):
+                tf[t] += weight
+        length = float(sum(tf.values()))
+        cur = db.execute(
+            "INSERT INTO docs (path, project, title, tags, len, mtime, size) VALUES (?,?,?,?,?,?,?)",
+            (path, fields.get("project"), fields.get("title"), ",".join(fields.get("tags") or []), length, mtime, size))
+        doc_id = cur.lastrowid
+        db.executemany("INSERT INTO postings (term, doc_id, tf, dl) VALUES (?,?,?,?)",
+                       [(t, doc_id, w, length) for t, w in tf.items()])
+        db.executemany("INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                       [(t,) for t in tf])
+        db.execute("UPDATE stats SET v = v + 1 WHERE k='n'")
+        db.execute("UPDATE stats SET v = v + ? WHERE k='total_len'", (length,))
+
+    def index_document(self, path: str, fields: Dict[str, Any], mtime: float = 0.0, size: int = 0) -> None:
+        with self._lock:
+            db = self._conn()
+            with db:
+                self._index_locked(db, str(path), fields, mtime, size)
+
+    def index_many(self, docs: Iterable[tuple]) -> None:
+        # [(path, fields, mtime, size), ...] 를 한 트랜잭션으로
+        with self._lock:
+            db = self._conn()
+            with db:
+                for path, fields, mtime, size in docs:
+                    self._index_locked(db, str(path), fields, mtime, size)
+
+    def index_file(self, path: str) -> None:
+        """
+        노트 파일을 (재)색인. 저장 직후에도 파일만 읽음 → 다시 스캔/재구성해도 같은 필드
+        """
+        st = os.stat(path)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            fields = note_fields(f.read(BODY_MAX_CHARS))
+        self.index_document(path, fields, st.st_mtime, st.st_size)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            db = self._conn()
+            n = db.execute("SELECT v FROM stats WHERE k='n'").fetchone()[0]
+            terms = db.execute("SELECT COUNT(*) FROM terms WHERE df > 0").fetchone()[0]
+        return {"docs": int(n), "terms": terms, "last_scan": self.last_scan}
+
+    def remove(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            db = self._conn()
+            with db:
+                for p in paths:
+                    row = db.execute("SELECT doc_id, len FROM docs WHERE path=?", (p,)).fetchone()
+                    if row is not None:
+                        self._remove_locked(db, row["doc_id"], row["len"])
+
+    def scan(self, root: str | Path, batch: int = 200) -> Dict[str, Any]:
+        """
+        볼트 증분 색인: (mtime, size) 가 바뀐 .md 만 다시 읽고, 사라진 파일은 제거.
+        """
+        t0 = time.perf_counter()
+        root = str(root)
+        with self._lock:
+            known = {r["path"]: (r["mtime"], r["size"]) for r in
+                     self._conn().execute("SELECT path, mtime, size FROM docs WHERE path >= ? AND path < ?",
+                                          prefix_range(root))}
+        seen, pending, indexed = set(), [], 0
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if not name.endswith(".md") or name.startswith("."):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                if known.get(path) == (st.st_mtime, st.st_size):
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8", errors="replace") as f:
+                        fields = note_fields(f.read(BODY_MAX_CHARS))
+                except OSError:
+                    continue
+                fields["project"] = fields.get("project") or os.path.basename(dirpath)
+                pending.append((path, fields, st.st_mtime, st.st_size))
+                if len(pending) >= batch:
+                    self.index_many(pending)
+                    indexed += len(pending)
+                    pending = []
+        if pending:
+            self.index_many(pending)
+            indexed += len(pending)
+        gone = [p for p in known if p not in seen]
+        if gone:
+            self.remove(gone)
+        self.last_scan = {"root": root, "files": len(seen), "indexed": indexed, "removed": len(gone),
+                          "elapsed_s": round(time.perf_counter() - t0, 3), "at": time.time()}
+        return self.last_scan
+
+    # --- 검색 ---
+    def search(self, query: str, project: str | None = None, limit: int = 20) -> Dict[str, Any]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return {"query": query, "terms": 0, "results": []}
+        with self._lock:
+            db = self._conn()
+            n, total_len = (r[0] for r in db.execute("SELECT v FROM stats WHERE k IN ('n','total_len') ORDER BY k"))
+            avgdl = (total_len / n) if n else 1.0
+            marks = ",".join("?" * len(terms))
+            dfs = {r["term"]: r["df"] for r in db.execute(f"SELECT term, df FROM terms WHERE term IN ({marks})", terms)}
+            # 색인에 없는 토큰은 제외. 매칭된 토큰 수가 많은 노트를 먼저, 같으면 BM25 점수순
+            idf = {t: math.log(1 + (n - df + 0.5) / (df + 0.5)) for t, df in dfs.items() if df > 0}
+            if not idf:
+                return {"query": query, "terms": len(terms), "results": []}
+            values = ",".join("(?,?)" for _ in idf)
+            args: List[Any] = [x for t, w in idf.items() for x in (t, w)]
+            # 집계는 postings 만으로, docs 는 상위 limit 개에만 조인 (프로젝트 필터가 있을 때만 집계 중 조인)
+            where = ""
+            if project:
+                where = "WHERE p.doc_id IN (SELECT doc_id FROM docs WHERE project = ?) "
+            sql = (
+                f"WITH q(term, idf) AS (VALUES {values}), "
+                "top AS (SELECT p.doc_id, "
+                "SUM(q.idf * (p.tf * (? + 1)) / (p.tf + ? * (1 - ? + ? * p.dl / ?))) AS score, COUNT(*) AS matched "
+                f"FROM q JOIN postings p ON p.term = q.term {where}"
+                "GROUP BY p.doc_id ORDER BY matched DESC, score DESC LIMIT ?) "
+                "SELECT d.path, d.project, d.title, d.tags, top.score, top.matched "
+                "FROM top JOIN docs d ON d.doc_id = top.doc_id ORDER BY top.matched DESC, top.score DESC"
+            )
+            args += [K1, K1, B, B, avgdl]
+            if project:
+                args.append(project)
+            args.append(limit)
+            rows = db.execute(sql, args).fetchall()
+        results = [{"path": r["path"], "project": r["project"], "title": r["title"],
+                    "tags": [t for t in (r["tags"] or "").split(",") if t],
+                    "score": round(r["score"], 4), "matched_terms": r["matched"]} for r in rows]
+        return {"query": query, "terms": len(terms), "results": results}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def search_frontmatter(meta: Dict[str, Any] | None) -> Dict[str, str | None]:
+    """
+    분석 meta → frontmatter 검색 필드: weak_points(약한 개념 이름), glossary(용어) 를 JSON 목록으로.
+    파일에 남겨야 재스캔/재구성 때도 note_fields 가 읽음
+    """
+    meta = meta or {}
+    out = {}
+    for k in ("weak_points", "glossary"):
+        names = [n for n in _as_list(meta.get(k)) if n]
+        out[k] = json.dumps(names, ensure_ascii=False) if names else None
+    return out
+
+
+search_index = SearchIndex(settings.SEARCH_INDEX_DB)
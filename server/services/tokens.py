@@ -0,0 +1,18 @@
+from typing import Any, Dict, List
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 쓰는 대략치: ASCII 4글자 ≈ 1토큰, 한글 등 비ASCII 1글자 ≈ 1토큰.
+    (llama3 계열에서 한국어는 글자당 1토큰 안팎이라 보수적으로 잡음)
+    """
+    if not text:
+        return 0
+    # 비ASCII 글자 수를 글자별 루프 대신 인코딩 길이 차이로 (C 레벨)
+    non_ascii = len(text) - len(text.encode("ascii", "ignore"))
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+
+def estimate_conversation_tokens(conversation: List[Dict[str, Any]]) -> int:
+    # "[i][role] " 접두어 몫으로 턴당 4토큰
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in conversation)
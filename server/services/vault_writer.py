@@ -0,0 +1,265 @@
+import asyncio
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..utils.fs import ensure_dir, link_unique, write_tmp
+from .metrics import VAULT_WRITE_BATCH
+
+# 볼트 쓰기 전담 작업 (볼트당 하나 — services/vaults 가 볼트마다 만들어 둠)
+# - 모든 노트 생성/교체/덧붙이기를 큐로 받아 한 번에 모인 만큼(max_batch) 워커 스레드 1회 호출로 처리
+# - 생성: 임시 파일 → os.link (이름이 있으면 _2, _3 ...) / 교체: 임시 파일 → os.replace
+#   → 쓰다 죽어도 잘린 노트가 볼트에 보이지 않음 (Obsidian Sync 가 반쪽 노트를 퍼뜨리지 않게)
+# - 같은 배치 안에서 나중 교체에 덮이는 같은 파일의 교체/덧붙이기는 건너뛰고, 교체 뒤 덧붙이기는 교체 내용에 합침
+# - fsync 정책: always(쓰기마다 파일+디렉터리) / group(배치 끝에 한 번에, 디렉터리는 배치당 1회) / none
+# - 내용은 문자열 또는 문자열 조각 목록 (큰 원문 노트는 조각째로 임시 파일에 씀)
+# - 디렉터리 캐시: 한 번 만든 폴더는 mkdir 생략, fsync 용 디렉터리 fd 는 열어 둔 채 재사용 (LRU)
+
+FSYNC_POLICIES = ("always", "group", "none")
+Content = Union[str, List[str]]
+
+
+class _DirCache:
+    """
+    writer 작업 스레드에서만 씀 (writer 당 배치가 한 번에 하나라 잠금 없음).
+    """
+
+    def __init__(self, max_fds: int = 64):
+        self.known: set = set()
+        self.fds: "OrderedDict[str, int]" = OrderedDict()
+        self.max_fds = max_fds
+
+    def ensure(self, folder: str | Path) -> Path:
+        key = str(folder)
+        if key not in self.known:
+            ensure_dir(key)
+            self.known.add(key)
+        return Path(key)
+
+    def forget(self, folder: str | Path) -> None:
+        key = str(folder)
+        self.known.discard(key)
+        fd = self.fds.pop(key, None)
+        if fd is not None:
+            os.close(fd)
+
+    def fsync(self, folder: str | Path) -> None:
+        # rename/link 결과(디렉터리 엔트리)까지 디스크에 (Windows 는 디렉터리 fsync 불가 → 생략)
+        if os.name == "nt":
+            return
+        key = str(folder)
+        fd = self.fds.pop(key, None)
+        if fd is not None and os.fstat(fd).st_ino != os.stat(key).st_ino:
+            # 밖에서 폴더를 지웠다 다시 만들었으면 예전 fd 는 버림
+            os.close(fd)
+            fd = None
+        if fd is None:
+            fd = os.open(key, os.O_RDONLY)
+        self.fds[key] = fd
+        while len(self.fds) > self.max_fds:
+            os.close(self.fds.popitem(last=False)[1])
+        os.fsync(fd)
+
+    def close(self) -> None:
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds.clear()
+        self.known.clear()
+
+
+class _Op:
+    __slots__ = ("kind", "path", "stem", "data", "fut")
+
+    def __init__(self, kind: str, path: str, stem: Optional[str], data: Content, fut: asyncio.Future):
+        self.kind, self.path, self.stem, self.data, self.fut = kind, path, stem, data, fut
+
+
+class VaultWriter:
+    def __init__(self, fsync: str = "group", max_batch: int = 64, group_delay_ms: float = 2.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"VAULT_FSYNC must be one of {FSYNC_POLICIES}: {fsync!r}")
+        self.fsync = fsync
+        self.max_batch = max(1, max_batch)
+        self.group_delay_s = group_delay_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dirs = _DirCache()
+        self.writes = 0
+        self.batches = 0
+
+    # --- 수명 ---
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # 앱 밖(스크립트, asyncio.run 여러 번)에서도 현재 루프에 지연 생성
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    async def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        if self._task is None or self._task.done() or self._loop is not asyncio.get_running_loop():
+            return
+        self._queue.put_nowait(None)  # 이미 들어온 쓰기를 다 처리한 뒤 종료
+        await self._task
+        self._task = None
+        self._dirs.close()
+
+    # --- API ---
+    async def _submit(self, kind: str, path: str | Path, stem: Optional[str], data: Content) -> Any:
+        q = self._ensure_started()
+        fut = asyncio.get_running_loop().create_future()
+        q.put_nowait(_Op(kind, str(path), stem, data or "", fut))
+        return await fut
+
+    async def create(self, folder: str | Path, stem: str, content: Content) -> str:
+        """
+        folder/stem.md 를 새로 만든다 (있으면 stem_2.md ...). 실제 경로 반환.
+        """
+        return await self._submit("create", folder, stem, content)
+
+    async def replace(self, file_path: str | Path, content: Content) -> str:
+        return await self._submit("replace", file_path, None, content)
+
+    async def append(self, file_path: str | Path, text: str) -> None:
+        await self._submit("append", file_path, None, text)
+
+    def stats(self) -> dict:
+        return {"fsync": self.fsync, "writes": self.writes, "batches": self.batches,
+                "pending": self._queue.qsize() if self._queue is not None else 0,
+                "dirs_cached": len(self._dirs.known), "dir_fds": len(self._dirs.fds)}
+
+    # --- writer 작업 ---
+    async def _run(self) -> None:
+        q = self._queue
+        stopping = False
+        while not stopping:
+            op = await q.get()
+            if op is None:
+                break
+            if self.fsync == "group" and self.group_delay_s > 0 and q.empty():
+                # 동시 요청이 몰리는 중이면 잠깐 기다렸다가 한 번에 fsync
+                await asyncio.sleep(self.group_delay_s)
+            batch = [op]
+            while len(batch) < self.max_batch and not q.empty():
+                nxt = q.get_nowait()
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+            try:
+                results = await asyncio.to_thread(self._apply, batch)
+            except Exception as e:
+                results = [(False, e)] * len(batch)
+            for o, (ok, value) in zip(batch, results):
+                if o.fut.done():
+                    continue
+                if ok:
+                    o.fut.set_result(value)
+                else:
+                    o.fut.set_exception(value)
+            self.writes += len(batch)
+            self.batches += 1
+            VAULT_WRITE_BATCH.observe(len(batch))
+
+    def _apply(self, batch: List[_Op]) -> List[Tuple[bool, Any]]:
+        results: List[Tuple[bool, Any]] = [(True, None)] * len(batch)
+        # 1) 뒤에 같은 파일 교체가 있으면 앞선 교체/덧붙이기는 생략
+        covered, skip = set(), set()
+        for i in range(len(batch) - 1, -1, -1):
+            o = batch[i]
+            if o.kind == "create":
+                continue
+            if o.path in covered:
+                skip.add(i)
+            if o.kind == "replace":
+                covered.add(o.path)
+
+        # 교체 뒤에 오는 같은 파일 덧붙이기는 교체 내용에 합침 (rename 보다 먼저 쓰이면 순서가 뒤바뀜)
+        data = [o.data for o in batch]
+        last_replace: Dict[str, int] = {}
+        for i, o in enumerate(batch):
+            if i in skip:
+                continue
+            if o.kind == "replace":
+                last_replace[o.path] = i
+            elif o.kind == "append" and o.path in last_replace:
+                j = last_replace[o.path]
+                data[j] = data[j] + o.data if isinstance(data[j], str) else [*data[j], o.data]
+                skip.add(i)
+
+        always = self.fsync == "always"
+        staged: List[Tuple[int, Path]] = []   # (op 인덱스, 임시 파일)
+        dirs: set = set()
+        # 2) 임시 파일 쓰기 / 덧붙이기는 순서대로 바로
+        for i, o in enumerate(batch):
+            if i in skip:
+                results[i] = (True, o.path if o.kind == "replace" else None)
+                continue
+            try:
+                if o.kind == "append":
+                    with open(o.path, "a", encoding="utf-8") as f:
+                        f.write(data[i])
+                        if always:
+                            f.flush()
+                            os.fsync(f.fileno())
+                    continue
+                folder = self._dirs.ensure(o.path if o.kind == "create" else Path(o.path).parent)
+                name = o.stem if o.kind == "create" else Path(o.path).name
+                try:
+                    tmp = write_tmp(folder, name, data[i], always)
+                except FileNotFoundError:
+                    # 캐시에 있던 폴더가 밖에서 지워짐 → 다시 만들고 한 번 더
+                    self._dirs.forget(folder)
+                    tmp = write_tmp(self._dirs.ensure(folder), name, data[i], always)
+                staged.append((i, tmp))
+            except Exception as e:
+                results[i] = (False, e)
+
+        # 3) group: 배치의 임시 파일을 한꺼번에 fsync (rename 보다 데이터가 먼저 디스크에)
+        if self.fsync == "group":
+            for i, tmp in staged:
+                try:
+                    fd = os.open(tmp, os.O_RDWR)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError as e:
+                    results[i] = (False, e)
+
+        # 4) 제자리로 (link: 새 이름 / replace: 기존 파일 교체)
+        for i, tmp in staged:
+            o = batch[i]
+            try:
+                if not results[i][0]:
+                    raise results[i][1]
+                if o.kind == "create":
+                    target = link_unique(tmp, Path(o.path), o.stem)
+                else:
+                    os.replace(tmp, o.path)
+                    target = Path(o.path)
+                results[i] = (True, str(target))
+                dirs.add(str(target.parent))
+                if always:
+                    self._dirs.fsync(target.parent)
+            except Exception as e:
+                results[i] = (False, e)
+            finally:
+                if tmp.exists():
+                    tmp.unlink(missing_ok=True)
+
+        # 5) 디렉터리 엔트리는 배치당 디렉터리별 1회
+        if self.fsync == "group":
+            for d in dirs:
+                try:
+                    self._dirs.fsync(d)
+                except OSError as e:
+                    print(f"[vault-writer] fsync dir failed: {d}", repr(e))
+        return results
+
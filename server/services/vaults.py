@@ -0,0 +1,174 @@
+import asyncio
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import settings
+from .vault_writer import VaultWriter
+from ..utils.fs import dir_prefix
+
+# 볼트 레지스트리
+# - 서버 설정에 이름 붙인 볼트들: OBSIDIAN_VAULT_DIR = "default" + VAULTS ("work=D:\Vaults\Work, personal=~/Obsidian")
+# - 프로젝트 → 볼트 (PROJECT_VAULTS), 요청은 볼트 "이름"만 고를 수 있음 (임의 경로 X)
+# - 노트 폴더 = 볼트 루트 / 프로젝트 (pathlib → OS 구분자). 루트 밖으로 나가는 프로젝트 이름(.., 절대 경로, 링크)은 거절
+# - 볼트(루트)마다 writer 작업 하나 → 다른 볼트 저장은 병렬, 같은 볼트/프로젝트 폴더 저장은 한 줄로 (이름 경합 없음)
+
+_NAME = re.compile(r"^[0-9A-Za-z_\-]+$")
+
+
+class VaultError(ValueError):
+    """알 수 없는 볼트 / 볼트 밖 경로 (라우트에서 400)."""
+
+
+def _abs(path: str | Path) -> Path:
+    return Path(path).expanduser().resolve()
+
+
+@dataclass
+class Vault:
+    name: str
+    root: Path                       # resolve 된 절대 경로
+    writer: VaultWriter = field(repr=False)
+
+    @property
+    def prefix(self) -> str:
+        # 인덱스/임베딩에 저장된 경로 문자열 비교용 (work 와 work2 가 섞이지 않게 구분자까지)
+        return dir_prefix(self.root)
+
+    def owns(self, path: str | Path) -> bool:
+        return _abs(path).is_relative_to(self.root)
+
+    def folder(self, project: str, base: str | Path | None = None) -> Path:
+        """
+        노트 폴더 (base 기본값은 볼트 루트). 하위 폴더("팀/프로젝트")는 허용, 볼트 밖은 VaultError.
+        """
+        rel = Path((project or "").strip())
+        if not rel.parts or rel.is_absolute() or rel.drive or ".." in rel.parts:
+            raise VaultError(f"invalid project name: {project!r}")
+        folder = (_abs(base) if base is not None else self.root) / rel
+        if not self.owns(folder):
+            raise VaultError(f"project folder escapes vault {self.name!r}: {project!r}")
+        return folder
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"name": self.name, "root": str(self.root), "writer": self.writer.stats()}
+
+
+def parse_vaults(spec: str, default_dir: str) -> Dict[str, Path]:
+    """
+    "work=D:\\Vaults\\Work, personal=~/Obsidian" → {이름: 루트}. OBSIDIAN_VAULT_DIR 은 "default" (VAULTS 에서 다시 정의 가능)
+    """
+    out = {"default": _abs(default_dir)}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, path = item.partition("=")
+        name, path = name.strip(), path.strip()
+        if not sep or not path or not _NAME.match(name):
+            raise ValueError(f"VAULTS entry must be name=path: {item!r}")
+        out[name] = _abs(path)
+    return out
+
+
+def parse_project_vaults(spec: str) -> Dict[str, str]:
+    """
+    "AI Conversation Archiver=work, 일기=personal" → {프로젝트: 볼트 이름}
+    """
+    out = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        project, sep, name = item.rpartition("=")
+        if not sep or not project.strip():
+            raise ValueError(f"PROJECT_VAULTS entry must be project=vault: {item!r}")
+        out[project.strip()] = name.strip()
+    return out
+
+
+class VaultRegistry:
+    def __init__(self, roots: Dict[str, Path], projects: Dict[str, str], default: str,
+                 writer_factory: Callable[[], VaultWriter]):
+        if default not in roots:
+            raise ValueError(f"VAULT_DEFAULT {default!r} is not a configured vault ({', '.join(roots)})")
+        unknown = sorted({v for v in projects.values() if v not in roots})
+        if unknown:
+            raise ValueError(f"PROJECT_VAULTS refers to unknown vaults: {unknown}")
+        # 같은 루트를 가리키는 이름들은 writer 를 같이 씀 (한 폴더에 writer 가 둘이면 다시 경합)
+        writers: Dict[Path, VaultWriter] = {}
+        for root in roots.values():
+            if root not in writers:
+                writers[root] = writer_factory()
+        self.vaults = {name: Vault(name, root, writers[root]) for name, root in roots.items()}
+        self.projects = projects
+        self.default = default
+        self._writers = list(writers.values())
+
+    # --- 조회 ---
+    def get(self, name: str) -> Vault:
+        try:
+            return self.vaults[name]
+        except KeyError:
+            raise VaultError(f"unknown vault: {name!r} (configured: {', '.join(self.vaults)})") from None
+
+    def for_project(self, project: str, vault: Optional[str] = None) -> Vault:
+        # 요청의 vault > PROJECT_VAULTS > VAULT_DEFAULT
+        return self.get(vault or self.projects.get((project or "").strip()) or self.default)
+
+    def project_folder(self, project: str, vault: Optional[str] = None) -> Path:
+        return self.for_project(project, vault).folder(project)
+
+    def for_path(self, path: str | Path) -> Vault:
+        """
+        path 를 담고 있는 볼트 (볼트가 겹치면 가장 안쪽). 어느 볼트에도 없으면 VaultError.
+        """
+        p = _abs(path)
+        best = None
+        for v in self.vaults.values():
+            if p.is_relative_to(v.root) and (best is None or len(v.root.parts) > len(best.root.parts)):
+                best = v
+        if best is None:
+            raise VaultError(f"path is not inside a configured vault: {str(path)!r}")
+        return best
+
+    def from_dir(self, vault_dir: str, project: str) -> tuple[Vault, Path]:
+        """
+        하위호환 vault_dir: 볼트 이름, 또는 등록된 볼트 안의 폴더일 때만 (그 아래 프로젝트 폴더).
+        """
+        if vault_dir in self.vaults:
+            vault = self.vaults[vault_dir]
+            return vault, vault.folder(project)
+        vault = self.for_path(vault_dir)
+        return vault, vault.folder(project, base=vault_dir)
+
+    def roots(self) -> List[str]:
+        # 시작 시 인덱스 스캔 대상 (같은 루트는 한 번, 겹치는 볼트는 바깥 루트만)
+        roots = sorted({v.root for v in self.vaults.values()}, key=lambda r: len(r.parts))
+        out: List[Path] = []
+        for r in roots:
+            if not any(r.is_relative_to(o) for o in out):
+                out.append(r)
+        return [str(r) for r in out]
+
+    # --- 수명 ---
+    async def start(self) -> None:
+        for w in self._writers:
+            await w.start()
+
+    async def stop(self) -> None:
+        # 볼트별 큐에 남은 쓰기를 병렬로 마저 끝냄
+        await asyncio.gather(*(w.stop() for w in self._writers))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"default": self.default, "projects": self.projects,
+                "vaults": [v.snapshot() for v in self.vaults.values()]}
+
+
+vault_registry = VaultRegistry(
+    parse_vaults(settings.VAULTS, settings.OBSIDIAN_VAULT_DIR),
+    parse_project_vaults(settings.PROJECT_VAULTS),
+    settings.VAULT_DEFAULT,
+    lambda: VaultWriter(settings.VAULT_FSYNC, settings.VAULT_WRITE_BATCH, settings.VAULT_GROUP_DELAY_MS),
+)
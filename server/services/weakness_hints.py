@@ -1,12 +1,160 @@
 import re
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List
+
+# 약점 힌트 사전 패스 (LLM 호출 전, 사용자 턴만 본다)
+# - 신호별 패턴은 모듈 로드 시 한 번만 컴파일
+# - 대화(들)의 사용자 턴을 구분자로 이어 붙여 신호마다 정규식 1회 스캔 → 위치를 턴 번호로 환산
+# - 거의 같은 질문의 반복은 문자 3-gram shingle 의 MinHash + 밴드(LSH) 버킷으로 후보만 뽑아 확인 (쌍 비교 없음)
+# 반환 키는 모두 턴 번호(1부터, 전체 메시지 기준) 리스트 → 청크 분석의 창별 필터와 호환
+
+SIGNALS: Dict[str, re.Pattern] = {
+    "confuse": re.compile(
+        r"무슨 ?뜻|헷갈|모르겠|이해가? ?안|이해 ?못|잘 ?모르|왜 그런|어떻게 그렇|다시|"
+        r"\b(?:why|explain|proof|example|confus|what do you mean|don'?t (?:get|understand))", re.I),
+    "ok": re.compile(
+        r"알겠|이해(?!가? ?안|가? ?잘 ?안|하지 ?못| ?못)|오케이|맞네|고마워|감사합니다|"
+        r"\b(?:clear|got it|makes sense|thanks)", re.I),
+    "repeat": re.compile(
+        r"다시 ?한 ?번|한 ?번 ?더|아직도|여전히|또 (?:모르|헷갈)|\b(?:again|still (?:don'?t|not|confus))", re.I),
+    "correction": re.compile(
+        r"그게 아니|아니[야요라]|틀렸|틀린|잘못|오류가|\b(?:wrong|incorrect|mistake|that'?s not|actually,)", re.I),
+}
+WEIGHTS = {"confuse": 1.0, "repeat": 1.5, "correction": 1.0, "ok": -0.5}
+HOT_SCORE = 1.5
+HOT_MAX = 10
+
+# 근접 중복 질문
+SHINGLE_MAX_CHARS = 500      # 긴 붙여넣기(코드 등)는 앞부분만
+MIN_NORM_CHARS = 8           # "다시", "네?" 같은 짧은 턴은 제외
+REPEAT_JACCARD = 0.6
+BANDS, ROWS = 4, 2           # 서명 8칸, 밴드 4개 × 2행 → 후보 문턱 ≈ 0.5
+BUCKET_KEEP = 4              # 버킷마다 앞선 대표 몇 개만 (같은 질문이 수천 번 나와도 후보 수 일정)
+_P = (1 << 61) - 1
+_A, _B = 0x9E3779B97F4A7C15 % _P, 0x632BE59BD9B4E019 % _P
+_SLOTS = BANDS * ROWS
+_SEP = "\n\x00\n"
+_non_word = re.compile(r"[\W_]+")
+
+
+def _normalize(text: str) -> str:
+    return _non_word.sub("", text[:SHINGLE_MAX_CHARS].lower())
+
+
+def _shingles(s: str) -> set:
+    if len(s) < MIN_NORM_CHARS:
+        return set()
+    # 3글자를 정수 하나로 (프로세스마다 바뀌는 hash() 대신 결정적인 값)
+    cp = list(map(ord, s))
+    return {(a << 42) | (b << 21) | c for a, b, c in zip(cp, cp[1:], cp[2:])}
+
+
+def _minhash(sh: set) -> tuple:
+    # one-permutation MinHash: 해시 1번 → 하위 비트로 칸을 나눠 칸별 최솟값 (해시 8번 대신)
+    sig = [_P] * _SLOTS
+    left = _SLOTS
+    for g in sorted([(_A * h + _B) % _P for h in sh]):
+        slot = g & (_SLOTS - 1)
+        if sig[slot] == _P:
+            sig[slot] = g
+            left -= 1
+            if not left:
+                break
+    return tuple(sig)
+
+
+def _near_duplicates(texts: List[str]) -> List[int]:
+    """
+    앞선 질문과 거의 같은(자카드 ≥ REPEAT_JACCARD) 텍스트의 인덱스들.
+    """
+    buckets: Dict[tuple, List[int]] = {}
+    exact: set = set()
+    shingles: List[set] = []
+    out: List[int] = []
+    for idx, text in enumerate(texts):
+        norm = _normalize(text)
+        if len(norm) >= MIN_NORM_CHARS and norm in exact:
+            # 완전히 같은 질문은 shingle/서명 계산 없이
+            shingles.append(set())
+            out.append(idx)
+            continue
+        sh = _shingles(norm)
+        shingles.append(sh)
+        if not sh:
+            continue
+        exact.add(norm)
+        sig = _minhash(sh)
+        cands = set()
+        for b in range(BANDS):
+            key = (b,) + sig[b * ROWS:(b + 1) * ROWS]
+            bucket = buckets.setdefault(key, [])
+            cands.update(bucket)
+            if len(bucket) < BUCKET_KEEP:
+                bucket.append(idx)
+        for j in cands:
+            other = shingles[j]
+            if len(sh & other) / len(sh | other) >= REPEAT_JACCARD:
+                out.append(idx)
+                break
+    return out
+
+
+def build_weakness_hints_batch(conversations: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, List[int]]]:
+    """
+    여러 대화를 한 번에 스코어링 (일괄 가져오기용). 신호 정규식은 전체 배치에 대해 1회씩만 돈다.
+    """
+    convs = list(conversations)
+    owners: List[tuple] = []     # (대화 인덱스, 턴 번호)
+    texts: List[str] = []
+    for ci, conv in enumerate(convs):
+        for i, m in enumerate(conv, start=1):
+            if m.get("role") == "user":
+                owners.append((ci, i))
+                texts.append(m.get("content") or "")
+    results: List[Dict[str, Any]] = [
+        {"confuse_turns": [], "ok_turns": [], "repeat_turns": [], "correction_turns": [], "hot_turns": []}
+        for _ in convs]
+    if not texts:
+        return results
+
+    # 이어 붙인 텍스트에서 각 사용자 턴의 시작 오프셋
+    starts, pos = [], 0
+    for t in texts:
+        starts.append(pos)
+        pos += len(t) + len(_SEP)
+    joined = _SEP.join(texts)
+    hits: List[set] = [set() for _ in texts]
+    for name, patt in SIGNALS.items():
+        last = -1
+        for m in patt.finditer(joined):
+            k = bisect_right(starts, m.start()) - 1
+            if k != last:
+                hits[k].add(name)
+                last = k
+
+    # 근접 중복은 대화 단위로
+    by_conv: Dict[int, List[int]] = {}
+    for k, (ci, _) in enumerate(owners):
+        by_conv.setdefault(ci, []).append(k)
+    for ks in by_conv.values():
+        for j in _near_duplicates([texts[k] for k in ks]):
+            hits[ks[j]].add("repeat")
+
+    scores: Dict[int, List[tuple]] = {}
+    for k, names in enumerate(hits):
+        if not names:
+            continue
+        ci, turn = owners[k]
+        res = results[ci]
+        for name in names:
+            res[f"{name}_turns"].append(turn)
+        score = sum(WEIGHTS[n] for n in names)
+        if score >= HOT_SCORE:
+            scores.setdefault(ci, []).append((score, turn))
+    for ci, items in scores.items():
+        results[ci]["hot_turns"] = sorted(t for _, t in sorted(items, key=lambda x: (-x[0], x[1]))[:HOT_MAX])
+    return results
+
 
 def build_weakness_hints(conversation: list[dict]) -> dict:
-    patt_confuse = re.compile(r"(다시|무슨 뜻|헷갈|모르겠|why|explain|proof|example)", re.I)
-    patt_ok = re.compile(r"(알겠|이해|오케이|clear|맞네)", re.I)
-    confuse_turns, ok_turns = [], []
-    for i, m in enumerate(conversation, start=1):
-        if m["role"] == "user":
-            t = m.get("content","")
-            if patt_confuse.search(t): confuse_turns.append(i)
-            if patt_ok.search(t): ok_turns.append(i)
-    return {"confuse_turns": confuse_turns, "ok_turns": ok_turns}
+    return build_weakness_hints_batch([conversation])[0]
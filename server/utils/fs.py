@@ -1,12 +1,26 @@
 from pathlib import Path
+import os
 import re
+import uuid
 from datetime import datetime
+from typing import Iterable
 
 def ensure_dir(folder: str | Path) -> Path:
     p = Path(folder)
     p.mkdir(parents=True, exist_ok=True)
     return p
 
+def dir_prefix(root: str | Path) -> str:
+    # 경로 문자열 비교용 폴더 접두사: 구분자까지 붙여서 /vault/work 가 /vault/work2 를 포함하지 않게
+    return os.path.join(str(root), "")
+
+def prefix_range(root: str | Path) -> tuple[str, str]:
+    """
+    root 아래 경로의 SQL 범위 조건 (path >= lo AND path < hi). hi 는 끝 구분자 다음 문자라 형제 폴더는 빠짐.
+    """
+    lo = dir_prefix(root)
+    return lo, lo[:-1] + chr(ord(lo[-1]) + 1)
+
 _slug_re = re.compile(r'[^0-9A-Za-z가-힣 _\-.]+')
 
 def slugify(text: str, max_len: int = 80) -> str:
@@ -14,13 +28,49 @@ def slugify(text: str, max_len: int = 80) -> str:
     s = s.replace('/', '-').replace('\\', '-').strip()
     return s[:max_len] or f"note-{datetime.now().strftime('%H%M%S')}"
 
-def write_markdown(folder: str | Path, title: str, content: str) -> str:
-    folder_p = ensure_dir(folder)
-    safe_title = slugify(title)
-    fname = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{safe_title}.md"
-    file_path = folder_p / fname
-    file_path.write_text(content or "", encoding="utf-8")
-    # 쓰기 검증
-    if not file_path.exists() or file_path.stat().st_size == 0 and (content or "") != "":
-        raise RuntimeError(f"Write verification failed: {file_path}")
-    return str(file_path)
+def write_tmp(folder: Path, name: str, data: bytes | str | Iterable[str], fsync: bool) -> Path:
+    """
+    임시 파일에 쓰기. 문자열 조각 목록이면 조각마다 인코딩해서 (노트 전체를 한 덩어리로 만들지 않음)
+    """
+    tmp = folder / f".{name}.{uuid.uuid4().hex[:8]}.tmp"
+    if isinstance(data, bytes):
+        f = open(tmp, "wb")
+    else:
+        f = open(tmp, "w", encoding="utf-8", newline="")   # newline="": Windows 에서도 \n 그대로
+        data = [data] if isinstance(data, str) else data
+    with f:
+        if isinstance(data, bytes):
+            f.write(data)
+        else:
+            f.writelines(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    return tmp
+
+def link_unique(tmp: Path, folder: Path, stem: str, suffix: str = ".md") -> Path:
+    """
+    tmp 를 folder/stem.md (있으면 stem_2.md, stem_3.md ...) 로 원자적으로 "새로" 만든다.
+    os.link 는 대상이 있으면 FileExistsError → 같은 초에 같은 제목으로 저장해도 덮어쓰지 않음.
+    """
+    n = 1
+    while True:
+        target = folder / (f"{stem}{suffix}" if n == 1 else f"{stem}_{n}{suffix}")
+        n += 1
+        try:
+            os.link(tmp, target)
+        except FileExistsError:
+            continue
+        except OSError:
+            # 하드링크 미지원 FS: O_EXCL 로 이름을 선점한 뒤 교체
+            try:
+                os.close(os.open(target, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                continue
+            os.replace(tmp, target)
+            return target
+        os.unlink(tmp)
+        return target
+
+def note_stem(title: str, now: datetime | None = None) -> str:
+    return f"{(now or datetime.now()).strftime('%Y%m%d_%H%M%S')}_{slugify(title)}"
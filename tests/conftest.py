@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# server.config 는 import 시점에 환경 변수를 읽음 → 서버 모듈보다 먼저 임시 경로로 (~/.gpt2note 를 건드리지 않게)
+_tmp = Path(tempfile.mkdtemp(prefix="gpt2note-tests-"))
+os.environ.update({
+    "OBSIDIAN_VAULT_DIR": str(_tmp / "vault"),
+    "ANALYSIS_CACHE_DIR": str(_tmp / "cache"),
+    "INCREMENTAL_STATE_DIR": str(_tmp / "incremental"),
+    "JOBS_DB_PATH": str(_tmp / "jobs.sqlite3"),
+    "NOTE_INDEX_DB": str(_tmp / "notes.sqlite3"),
+    "SEARCH_INDEX_DB": str(_tmp / "search.sqlite3"),
+    "EMBEDDING_DIR": str(_tmp / "embeddings"),
+    "IMPORT_CHECKPOINT_DIR": str(_tmp / "imports"),
+})
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from server.routers import analyze, save_analyze
+from server.services.admission import Rejected
+from server.services.backends import served_model
+from server.services.cache import AnalysisCache
+
+
+def test_analysis_cache_is_keyed_by_serving_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(analyze, "analysis_cache", AnalysisCache(tmp_path))
+    monkeypatch.setattr(analyze, "serving_models", lambda: ["m1", "m2"])
+    req = analyze.AnalyzeReq(conversation=[{"role": "user", "content": "질문"}, {"role": "assistant", "content": "답"}])
+    conv = req.messages()
+
+    token = served_model.set("m2")   # m2 백엔드가 응답
+    try:
+        analyze.cache_analysis(req, conv, {"title": "T"}, "# md")
+    finally:
+        served_model.reset(token)
+    meta, md = analyze.cached_analysis(req, conv)
+    assert (meta, md) == ({"title": "T"}, "# md")
+    assert analyze.analysis_cache.get(analyze.analysis_cache_key(req, conv, "m1")) is None
+    # m2 가 설정에서 빠지면 그 모델의 결과는 쓰지 않음
+    monkeypatch.setattr(analyze, "serving_models", lambda: ["m1"])
+    assert analyze.cached_analysis(req, conv) is None
+
+
+def test_cached_analysis_counts_one_lookup(tmp_path, monkeypatch):
+    monkeypatch.setattr(analyze, "analysis_cache", AnalysisCache(tmp_path))
+    monkeypatch.setattr(analyze, "serving_models", lambda: ["m1", "m2", "m3"])
+    req = analyze.AnalyzeReq(conversation=[{"role": "user", "content": "질문"}])
+    conv = req.messages()
+    assert analyze.cached_analysis(req, conv) is None
+    token = served_model.set("m3")
+    try:
+        analyze.cache_analysis(req, conv, {"title": "T"}, "# md")
+    finally:
+        served_model.reset(token)
+    assert analyze.cached_analysis(req, conv) is not None
+    stats = analyze.analysis_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_weakness_hints_keep_only_turn_numbers():
+    req = analyze.AnalyzeReq(conversation=[{"role": "user", "content": "질문"}],
+                             weakness_hints={"hot_turns": [1, "2", None, True, 3], "note": "x", "confuse_turns": None})
+    assert req.weakness_hints == {"hot_turns": [1, 3]}
+    assert analyze.AnalyzeReq(conversation=[], weakness_hints=None).weakness_hints is None
+
+
+def _saturated():
+    raise Rejected(503, "analysis queue is full", 5)
+
+
+def test_cache_hit_does_not_go_through_admission(tmp_path, monkeypatch):
+    monkeypatch.setattr(analyze, "analysis_cache", AnalysisCache(tmp_path))
+    monkeypatch.setattr(analyze, "serving_models", lambda: ["m1"])
+    req = analyze.AnalyzeReq(conversation=[{"role": "user", "content": "질문"}])
+    token = served_model.set("m1")
+    try:
+        analyze.cache_analysis(req, req.messages(), {"title": "T"}, "# md")
+    finally:
+        served_model.reset(token)
+    res = asyncio.run(analyze.analyze(req, _saturated))
+    assert (res.meta, res.markdown) == ({"title": "T"}, "# md")
+    with pytest.raises(Rejected):
+        asyncio.run(analyze.analyze(analyze.AnalyzeReq(conversation=[{"role": "user", "content": "새 질문"}]),
+                                    _saturated))
+
+
+def test_unchanged_save_does_not_go_through_admission(monkeypatch):
+    async def fake_analyze(req, gate=None):
+        return analyze.AnalyzeRes(meta={"title": "T", "tags": []}, markdown="# 노트\n" + "본문 " * 60)
+
+    monkeypatch.setattr(save_analyze, "analyze", fake_analyze)
+    req = analyze.AnalyzeReq(project="Admission", incremental=True, draft=False,
+                             conversation=[{"role": "user", "content": "q"}, {"role": "assistant", "content": "a"}])
+    first = asyncio.run(save_analyze.save_and_analyze(req))
+    again = asyncio.run(save_analyze.save_and_analyze(req.model_copy(), gate=_saturated))
+    assert again.meta["file"] == first.meta["file"] and not again.meta.get("degraded")
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from server.services.backends import OLLAMA, OPENAI, Backend, BackendRegistry, BadRequest, served_model
+
+MESSAGES = [{"role": "user", "content": "안녕"}]
+
+
+def _registry(handler, **backend) -> tuple:
+    seen = []
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return handler(request)
+
+    b = Backend(base_url="http://llm:11434", model="m1", **backend)
+    return BackendRegistry([b]), b, seen, httpx.MockTransport(_handle)
+
+
+def _complete(reg: BackendRegistry, transport, stream: bool = False):
+    async def main():
+        async with httpx.AsyncClient(transport=transport) as http:
+            if stream:
+                text = "".join([d async for d in reg.stream(http, MESSAGES, temperature=0.2, max_tokens=10)])
+            else:
+                text = await reg.complete(http, MESSAGES, temperature=0.2, max_tokens=10)
+            return text, served_model.get()
+    return asyncio.run(main())
+
+
+def _ollama_only(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/api/chat":
+        body = json.loads(request.content)
+        if body["stream"]:
+            lines = [{"message": {"content": "안"}}, {"message": {"content": "녕"}, "done": True}]
+            return httpx.Response(200, text="\n".join(json.dumps(x) for x in lines))
+        return httpx.Response(200, json={"message": {"content": "안녕"}})
+    # openai 호환 경로를 모르는 프록시가 404 대신 400 을 돌려주는 경우
+    return httpx.Response(400, json={"error": "unknown route"})
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_unknown_flavor_tries_other_api_on_4xx(stream):
+    reg, b, seen, transport = _registry(_ollama_only)
+    assert _complete(reg, transport, stream) == ("안녕", "m1")
+    assert b.flavor == OLLAMA and b.failures == 0
+    assert seen == ["/v1/chat/completions", "/api/chat"]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_4xx_from_every_api_is_bad_request(stream):
+    reg, b, seen, transport = _registry(lambda r: httpx.Response(400, json={"error": "bad"}))
+    with pytest.raises(BadRequest):
+        _complete(reg, transport, stream)
+    assert b.failures == 0 and seen == ["/v1/chat/completions", "/api/chat"]
+
+
+def test_known_flavor_4xx_is_not_retried():
+    reg, b, seen, transport = _registry(lambda r: httpx.Response(400, json={"error": "bad"}), flavor=OLLAMA)
+    with pytest.raises(BadRequest):
+        _complete(reg, transport)
+    assert seen == ["/api/chat"]
+
+
+def test_models_are_unique_in_config_order():
+    reg = BackendRegistry([Backend("http://a", "m2"), Backend("http://b", "m1"), Backend("http://c", "m2")])
+    assert reg.models() == ["m2", "m1"]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_model_not_found_fails_over_to_next_backend(stream):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "box1":
+            return httpx.Response(404, json={"error": {"message": "model 'm1' not found"}})
+        if json.loads(request.content)["stream"]:
+            return httpx.Response(200, text='data: {"choices":[{"delta":{"content":"ok"}}]}\n\ndata: [DONE]\n')
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    box1, box2 = Backend("http://box1", "m1", flavor=OPENAI), Backend("http://box2", "m1", flavor=OPENAI, ewma_ms=50)
+    reg = BackendRegistry([box1, box2])
+    assert _complete(reg, httpx.MockTransport(handler), stream) == ("ok", "m1")
+    # 모델만 없는 것 → 회로 차단 실패로는 세지 않음
+    assert box1.errors == 1 and box1.failures == 0 and box2.requests == 1
@@ -0,0 +1,79 @@
+import numpy as np
+
+from server.services import embeddings
+from server.services.embeddings import EmbeddingIndex
+
+
+def _vec(i: int, dim: int = 8) -> np.ndarray:
+    v = np.zeros(dim, dtype=np.float32)
+    v[i % dim] = 1.0
+    v[(i + 1) % dim] = 0.5
+    return v
+
+
+def _index(tmp_path) -> EmbeddingIndex:
+    return EmbeddingIndex(tmp_path, "test-model", "http://127.0.0.1:9/v1")
+
+
+def test_compaction_keeps_live_rows_and_note_mapping(tmp_path, monkeypatch):
+    monkeypatch.setattr(embeddings, "COMPACT_MIN_DEAD", 2)
+    idx = _index(tmp_path)
+    paths = [str(tmp_path / f"n{i}.md") for i in range(3)]
+    idx.put_many([(p, f"k{i}", _vec(i), "P", f"n{i}", 1.0) for i, p in enumerate(paths)])
+    # 같은 노트 내용이 계속 바뀌면 옛 행은 죽은 행 → 산 행(3)보다 많아지는 순간 압축
+    for gen in range(4):
+        idx.put_many([(paths[0], f"k0-{gen}", _vec(4 + gen), "P", "n0", 2.0 + gen)])
+    assert idx.counts["compactions"] == 1
+    assert idx.rows < 3 + 4
+    assert not idx._file(0).exists() and idx._file(idx._gen).exists()
+    for i, p in enumerate(paths):
+        expect = _vec(4 + 3) if i == 0 else _vec(i)
+        np.testing.assert_allclose(idx.vector_of(p), expect / np.linalg.norm(expect), rtol=1e-6)
+    top = idx.related(_vec(1), k=1)
+    assert top[0]["path"] == paths[1] and top[0]["score"] == 1.0
+    idx.close()
+
+    # 다시 열어도 같은 세대/행 번호
+    again = _index(tmp_path)
+    np.testing.assert_allclose(again.vector_of(paths[0]), _vec(7) / np.linalg.norm(_vec(7)), rtol=1e-6)
+    assert again.rows == idx.rows and again._gen == idx._gen
+    assert again.cached_many(["k2"])["k2"].shape == (8,)
+    again.close()
+
+
+def test_shared_rows_stay_live_until_last_owner_goes(tmp_path):
+    idx = _index(tmp_path)
+    a, b = str(tmp_path / "a.md"), str(tmp_path / "b.md")
+    idx.put_many([(a, "same", _vec(0), "P", "a", 1.0), (b, "same", _vec(0), "P", "b", 1.0)])
+    assert idx.rows == 1
+    idx.remove([a])
+    assert [n["path"] for n in idx.related(_vec(0), k=5)] == [b]
+    idx.remove([b])
+    assert idx.related(_vec(0), k=5) == []
+    idx.close()
+
+
+
+def test_related_within_respects_path_separator(tmp_path):
+    idx = _index(tmp_path)
+    work, work2 = tmp_path / "work", tmp_path / "work2"
+    idx.put_many([(str(work / "a.md"), "a", _vec(0), "P", "a", 1.0),
+                  (str(work2 / "b.md"), "b", _vec(0) + 0.01, "P", "b", 1.0)])
+    assert [n["title"] for n in idx.related(_vec(0), k=5, within=str(work))] == ["a"]
+    assert [n["title"] for n in idx.related(_vec(0), k=5, within=str(work) + "/")] == ["a"]
+    idx.close()
+
+
+def test_scan_ignores_sibling_vault_vectors(tmp_path):
+    idx = _index(tmp_path / "emb")
+    for vault in ("vault", "vault2"):
+        note = tmp_path / vault / "P" / "a.md"
+        note.parent.mkdir(parents=True)
+        note.write_text("---\ntitle: a\n---\n\n본문\n", encoding="utf-8")
+    other = str(tmp_path / "vault2" / "P" / "a.md")
+    idx.put_many([(other, "k", _vec(0), "P", "a", 1.0)])
+    todo, gone = idx._scan(str(tmp_path / "vault"))
+    assert [t[0] for t in todo] == [str(tmp_path / "vault" / "P" / "a.md")] and gone == []
+    idx.remove([str(tmp_path / "vault" / "P" / "a.md")])
+    assert [n["path"] for n in idx.related(_vec(0), k=5)] == [other]
+    idx.close()
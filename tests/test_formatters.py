@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from server.services.formatters import DualStreamParser, parse_output
+
+META = {"title": "고유값 {정리}", "tags": ["math", "linear-algebra"],
+        "weak_points": [{"concept": "중복 } 고유값", "evidence_turns": [3, 5]}]}
+MD = "# 고유값 정리\n## 요약\n- 대각화 {A = PDP^-1}\n```python\nd = {k: v for k, v in pairs}\n```"
+META_JSON = json.dumps(META, ensure_ascii=False)
+# 잘린 JSON: weak_points 배열 안에서 끊김 → 마지막으로 완결된 항목(tags)까지 복구
+TRUNCATED = META_JSON[:META_JSON.index('"weak_points"') + 20]
+TRUNCATED_META = {"title": META["title"], "tags": META["tags"]}
+
+# (응답 원문, 기대 meta, 기대 markdown, 기대 status)
+CASES = {
+    "dual_marker": (f"====JSON====\n{META_JSON}\n====MARKDOWN====\n{MD}", META, MD, "ok"),
+    "dual_marker_preamble": (f"물론입니다!\n\n====JSON====\n{META_JSON}\n====MARKDOWN====\n\n{MD}\n", META, MD, "ok"),
+    "structured_json": (json.dumps({"meta": META, "markdown": MD}, ensure_ascii=False), META, MD, "ok"),
+    "structured_flat": (json.dumps({**META, "markdown": MD}, ensure_ascii=False), META, MD, "ok"),
+    "truncated_json": (f"====JSON====\n{TRUNCATED}", TRUNCATED_META, "", "recovered"),
+    "truncated_before_marker": (f"====JSON====\n{TRUNCATED}\n====MARKDOWN====\n{MD}", TRUNCATED_META, MD, "recovered"),
+    "trailing_comma": (f"====JSON====\n{META_JSON[:-1]},}}\n====MARKDOWN====\n{MD}", META, MD, "recovered"),
+    "missing_md_marker": (f"====JSON====\n{META_JSON}\n\n{MD}", META, MD, "ok"),
+    "json_code_fence": (f"```json\n{META_JSON}\n```\n{MD}", META, MD, "ok"),
+    "json_code_fence_marker": (f"====JSON====\n```json\n{META_JSON}\n```\n====MARKDOWN====\n{MD}", META, MD, "ok"),
+    "markdown_only": (MD, {}, MD, "markdown_only"),
+    "empty": ("", {}, "", "failed"),
+}
+
+
+def stream(text: str, step: int) -> tuple[dict, str, str]:
+    p = DualStreamParser()
+    for i in range(0, len(text), step):
+        p.feed(text[i:i + step])
+    meta, md = p.finish()
+    return meta, md, p.status
+
+
+@pytest.mark.parametrize("kind", CASES)
+def test_parse_output(kind):
+    text, meta, md, status = CASES[kind]
+    assert parse_output(text) == (meta, md, status)
+
+
+@pytest.mark.parametrize("step", [1, 3, 7, 64, 100000])
+@pytest.mark.parametrize("kind", CASES)
+def test_stream_parser_matches_parse_output(kind, step):
+    # 델타 크기와 상관없이 (응답이 한 조각으로 와도) parse_output 과 같은 결과
+    text, meta, md, status = CASES[kind]
+    assert stream(text, step) == (meta, md, status)
+
+
+def test_stream_parser_emits_meta_before_markdown():
+    text = CASES["dual_marker"][0]
+    p = DualStreamParser()
+    events = []
+    for i in range(0, len(text), 5):
+        events += p.feed(text[i:i + 5])
+    kinds = [k for k, _ in events]
+    assert kinds[0] == "meta" and kinds.count("meta") == 1
+    assert events[0][1] == META
+    assert "".join(v for k, v in events if k == "markdown") == MD
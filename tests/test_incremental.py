@@ -0,0 +1,106 @@
+import json
+
+from server.services.incremental import IncrementalStore, conversation_fingerprint, merge_meta, prefix_hash
+
+
+def _conv(n: int, tweak: str = "") -> list:
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"턴 {i} 내용{tweak if i == 0 else ''}"}
+            for i in range(n)]
+
+
+def _put(store: IncrementalStore, conv: list, **kw) -> None:
+    store.put("P", conversation_fingerprint(conv), conversation=conv, meta={"title": "T"}, markdown="# T",
+              file="/vault/P/t.md", created="2024-01-01T00:00:00+00:00", **kw)
+
+
+def test_lookup_finds_extension_of_saved_prefix(tmp_path):
+    store = IncrementalStore(tmp_path)
+    _put(store, _conv(4))
+    state = store.lookup("P", _conv(6))
+    assert state["turns"] == 4 and state["file"] == "/vault/P/t.md" and state["meta"] == {"title": "T"}
+    # 같은 길이(새 턴 없음)도 찾음 → 호출 쪽이 unchanged 처리
+    assert store.lookup("P", _conv(4))["turns"] == 4
+
+
+def test_lookup_rejects_other_project_shorter_or_edited_conversation(tmp_path):
+    store = IncrementalStore(tmp_path)
+    _put(store, _conv(4))
+    assert store.lookup("Q", _conv(6)) is None
+    assert store.lookup("P", _conv(3)) is None
+    edited = _conv(6)
+    edited[2]["content"] = "앞부분을 고쳐서 다시 생성"
+    assert store.lookup("P", edited) is None
+    assert store.lookup("P", _conv(6, tweak="!")) is None
+
+
+def test_whitespace_only_changes_still_match(tmp_path):
+    store = IncrementalStore(tmp_path)
+    _put(store, _conv(4))
+    conv = _conv(6)
+    conv[1]["content"] = "  " + conv[1]["content"].replace(" ", "\n  ") + "\n"
+    assert store.lookup("P", conv)["turns"] == 4
+
+
+def test_draft_flag_and_broken_state(tmp_path):
+    store = IncrementalStore(tmp_path)
+    conv = _conv(2)
+    _put(store, conv, draft=True)
+    assert store.lookup("P", conv)["draft"] is True
+    store._path("P", conversation_fingerprint(conv)).write_text("{not json", encoding="utf-8")
+    assert store.lookup("P", conv) is None
+
+
+def test_merge_meta_keeps_title_and_unions_lists():
+    prev = {"title": "처음 제목", "tags": ["a", "b"], "summary": "old"}
+    new = {"title": "새 제목", "tags": ["b", "c"], "summary": "new"}
+    assert merge_meta(prev, new) == {"title": "처음 제목", "tags": ["a", "b", "c"], "summary": "new"}
+
+
+def test_merge_meta_takes_complete_model_output_as_is():
+    weak = {"concept": "고유값", "evidence_turns": [1], "why": "정의 혼동", "remedy": "예제"}
+    prev = {"title": "처음 제목", "tags": ["a"], "weak_points": [weak], "open_questions": ["q1", "q2"],
+            "glossary": [{"term": "고유값", "explain": "old"}], "actions": ["복습"]}
+    new = {"title": "새 제목", "tags": ["a", "b"], "weak_points": [], "open_questions": ["q2"],
+           "glossary": [{"term": "고유값", "explain": "new"}]}
+    merged = merge_meta(prev, new, complete=True)
+    # 새 턴에서 해결돼 지운 약점/질문은 되살아나지 않고, 고친 용어는 중복되지 않음
+    assert merged["weak_points"] == [] and merged["open_questions"] == ["q2"]
+    assert merged["glossary"] == [{"term": "고유값", "explain": "new"}]
+    assert merged["title"] == "새 제목" and merged["actions"] == ["복습"]
+    assert merge_meta(prev, {"title": "", "tags": []}, complete=True)["title"] == "처음 제목"
+
+
+def test_threads_with_the_same_opening_keep_separate_states(tmp_path):
+    # 앞 2턴(지문)이 같은 두 스레드가 서로의 상태를 덮어쓰지 않음
+    store = IncrementalStore(tmp_path)
+    a = _conv(4)
+    b = _conv(2) + [{"role": "user", "content": "다른 방향의 질문"}, {"role": "assistant", "content": "다른 답"}]
+    assert conversation_fingerprint(a) == conversation_fingerprint(b)
+    store.put("P", conversation_fingerprint(a), conversation=a, meta={}, markdown="A", file="/vault/P/a.md")
+    store.put("P", conversation_fingerprint(b), conversation=b, meta={}, markdown="B", file="/vault/P/b.md")
+    assert store.lookup("P", a + [{"role": "user", "content": "이어서"}])["file"] == "/vault/P/a.md"
+    assert store.lookup("P", b + [{"role": "user", "content": "이어서"}])["file"] == "/vault/P/b.md"
+    # 두 스레드가 갈라지기 전(앞 2턴)만 같은 대화는 어느 쪽의 연장도 아님
+    assert store.lookup("P", _conv(2) + [{"role": "user", "content": "세 번째 스레드"}]) is None
+
+
+def test_put_replaces_older_state_of_the_same_thread(tmp_path):
+    store = IncrementalStore(tmp_path, max_states=2)
+    _put(store, _conv(4))
+    _put(store, _conv(6))
+    fp = conversation_fingerprint(_conv(6))
+    assert [s["turns"] for s in store.get("P", fp)] == [6]
+    for i in range(3):
+        other = _conv(2) + [{"role": "user", "content": f"갈래 {i}"}]
+        store.put("P", fp, conversation=other, meta={}, markdown="", file=f"/vault/P/{i}.md")
+    assert [s["file"] for s in store.get("P", fp)] == ["/vault/P/1.md", "/vault/P/2.md"]
+
+
+def test_reads_single_state_files_from_older_versions(tmp_path):
+    store = IncrementalStore(tmp_path)
+    conv = _conv(4)
+    path = store._path("P", conversation_fingerprint(conv))
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps({"turns": 4, "prefix_hash": prefix_hash(conv, 4), "meta": {}, "markdown": "",
+                                "file": "/vault/P/old.md"}), encoding="utf-8")
+    assert store.lookup("P", _conv(5))["file"] == "/vault/P/old.md"
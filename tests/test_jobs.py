@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+
+from server.services.jobs import JobQueue, QueueFull
+
+
+def _queue(tmp_path, **kw) -> JobQueue:
+    return JobQueue(tmp_path / "jobs.sqlite3", workers=1, **kw)
+
+
+def test_recover_requeues_running_jobs(tmp_path):
+    q = _queue(tmp_path)
+    job_id, _ = q.enqueue("save+analyze", {"n": 1})
+    assert q._claim()[0] == job_id
+    assert q.get(job_id)["status"] == "running"
+    q._db.close()   # 처리 중에 프로세스가 죽음
+
+    q2 = _queue(tmp_path)
+    q2._recover()
+    job = q2.get(job_id)
+    assert job["status"] == "queued" and job["attempts"] == 1
+    assert q2._claim()[0] == job_id
+
+
+def test_recover_drops_finished_jobs_after_retention(tmp_path):
+    q = _queue(tmp_path, retention_s=60)
+    old, _ = q.enqueue("k", {"n": 1})
+    new, _ = q.enqueue("k", {"n": 2})
+    for _ in range(2):
+        job_id, _, _ = q._claim()
+        q._finish(job_id, {"ok": True}, None)
+    q._conn().execute("UPDATE jobs SET finished=? WHERE id=?", (time.time() - 120, old))
+    q._recover()
+    assert q.get(old) is None
+    assert q.get(new)["status"] == "done"
+
+
+def test_failed_job_is_retried_until_max_attempts(tmp_path):
+    q = _queue(tmp_path, max_attempts=2)
+    job_id, _ = q.enqueue("k", {})
+    for status in ("queued", "failed"):
+        q._claim()
+        q._finish(job_id, None, "boom")
+        assert q.get(job_id)["status"] == status
+
+
+def test_enqueue_dedup_and_queue_full(tmp_path):
+    q = _queue(tmp_path, max_pending=1)
+    job_id, dup = q.enqueue("k", {"a": 1})
+    assert not dup
+    assert q.enqueue("k", {"a": 1}) == (job_id, True)
+    with pytest.raises(QueueFull):
+        q.enqueue("k", {"a": 2})
+
+
+def test_worker_runs_handler(tmp_path):
+    async def main():
+        q = _queue(tmp_path)
+
+        async def handler(payload):
+            return {"double": payload["n"] * 2}
+
+        q.register("double", handler)
+        await q.start()
+        try:
+            job_id, _ = q.enqueue("double", {"n": 21})
+            for _ in range(100):
+                job = q.get(job_id)
+                if job["status"] == "done":
+                    return job
+                await asyncio.sleep(0.01)
+        finally:
+            await q.stop()
+
+    job = asyncio.run(main())
+    assert job["result"] == {"double": 42}
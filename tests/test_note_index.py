@@ -0,0 +1,24 @@
+from server.services.note_index import NoteIndex
+from server.utils.fs import prefix_range
+
+
+def _note(path, title):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"---\ntitle: {title}\nproject: P\n---\n\n본문\n", encoding="utf-8")
+
+
+def test_prefix_range_stops_at_the_folder_boundary(tmp_path):
+    lo, hi = prefix_range(tmp_path / "vault")
+    assert lo <= str(tmp_path / "vault" / "P" / "a.md") < hi
+    assert not (lo <= str(tmp_path / "vault2" / "P" / "b.md") < hi)
+    assert not (lo <= str(tmp_path / "vault") < hi)
+
+
+def test_scan_leaves_sibling_vault_rows_alone(tmp_path):
+    idx = NoteIndex(tmp_path / "notes.sqlite3")
+    _note(tmp_path / "vault" / "P" / "a.md", "a")
+    _note(tmp_path / "vault2" / "P" / "b.md", "b")
+    idx.scan(tmp_path / "vault2")
+    assert idx.scan(tmp_path / "vault")["removed"] == 0
+    assert sorted(n["title"] for n in idx.list()["notes"]) == ["a", "b"]
+    idx.close()
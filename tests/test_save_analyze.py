@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from server.routers.analyze import AnalyzeReq, AnalyzeRes
+from server.routers.save_analyze import compose_note, plan_save, save_and_analyze, save_shortcut
+
+CONV = [{"role": "user", "content": "고유값이 무슨 뜻이야? 다시 설명해줘"}, {"role": "assistant", "content": "설명 " * 40}]
+LONG_MD = "# 노트\n" + "본문 " * 60
+
+
+def _plan(project="Save", conv=CONV, **kw):
+    return asyncio.run(plan_save(AnalyzeReq(project=project, conversation=conv, incremental=True), **kw))
+
+
+def _res(meta=None, md=LONG_MD, status="ok"):
+    res = AnalyzeRes(meta=meta if meta is not None else {"title": "T", "tags": ["a"]}, markdown=md)
+    res._status = status
+    return res
+
+
+def test_compose_analyzed_note_keeps_dedup_hash():
+    plan = _plan()
+    body = compose_note(plan, _res())
+    assert body.analyzed and body.parts == [LONG_MD.strip()] and body.content_hash == plan.content_hash
+
+
+def test_compose_falls_back_to_raw_conversation():
+    body = compose_note(_plan(), _res(meta={}, md=""))
+    assert not body.analyzed and "### 👤 User" in "".join(body.parts)
+
+
+def test_compose_degraded_and_draft_notes_drop_the_dedup_hash():
+    degraded = compose_note(_plan(), _res(meta={}, md=""), degraded=True)
+    assert degraded.meta["degraded"] and degraded.content_hash is None and not degraded.analyzed
+    draft = compose_note(_plan(draft=True), _res(meta={}, md=""))
+    assert draft.content_hash is None and "초안 요약" in "".join(draft.parts)
+
+
+def test_compose_refuses_to_overwrite_a_draft_with_a_fallback():
+    with pytest.raises(RuntimeError):
+        compose_note(_plan(refine={"file": "/nowhere.md", "created": None}), _res(md=""))
+
+
+def test_compose_merges_incremental_meta():
+    plan = _plan()
+    plan.state = {"turns": 2, "meta": {"title": "처음", "tags": ["a"], "open_questions": ["q"]}, "markdown": "# 이전",
+                  "file": "/x.md"}
+    full = compose_note(plan, _res(meta={"title": "새", "tags": ["b"], "open_questions": []}))
+    assert full.meta == {"title": "새", "tags": ["b"], "open_questions": []}
+    broken = compose_note(plan, _res(meta={"tags": ["b"]}, md="", status="markdown_only"))
+    assert broken.meta["tags"] == ["a", "b"] and broken.parts[0] == "# 이전"
+
+
+def test_shortcuts_unchanged_and_duplicate(monkeypatch):
+    import server.routers.save_analyze as sa
+
+    async def fake_analyze(req, gate=None):
+        return _res()
+
+    monkeypatch.setattr(sa, "analyze", fake_analyze)
+    saved = asyncio.run(save_and_analyze(AnalyzeReq(project="Shortcut", conversation=CONV, incremental=True)))
+    assert saved.meta["saved"] and asyncio.run(save_shortcut(_plan("Shortcut"))).meta["new_turns"] == 0
+    # 증분을 끄면 같은 대화는 중복 판정으로
+    plan = asyncio.run(plan_save(AnalyzeReq(project="Shortcut", conversation=CONV, incremental=False)))
+    assert asyncio.run(save_shortcut(plan)).meta["duplicate"] is True
+    assert asyncio.run(save_shortcut(_plan("Other"))) is None
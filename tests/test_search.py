@@ -0,0 +1,32 @@
+from server.services.formatters import frontmatter
+from server.services.search import SearchIndex, note_fields, search_frontmatter
+
+
+def _note(path, title, body):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"---\ntitle: {title}\nproject: P\n---\n\n{body}\n", encoding="utf-8")
+
+
+def test_rescan_keeps_postings_of_sibling_vaults(tmp_path):
+    idx = SearchIndex(tmp_path / "search.sqlite3")
+    _note(tmp_path / "vault" / "P" / "a.md", "a", "고유값 분해")
+    _note(tmp_path / "vault2" / "P" / "b.md", "b", "고유값 문제")
+    idx.scan(tmp_path / "vault2")
+    assert idx.scan(tmp_path / "vault")["removed"] == 0
+    assert sorted(r["title"] for r in idx.search("고유값")["results"]) == ["a", "b"]
+    idx.close()
+
+
+def test_weak_points_and_glossary_survive_a_rebuild(tmp_path):
+    meta = {"weak_points": [{"concept": "고유벡터", "why": "..."}], "glossary": [{"term": "대각화", "explain": "..."}]}
+    note = tmp_path / "vault" / "P" / "a.md"
+    note.parent.mkdir(parents=True)
+    note.write_text(frontmatter("a", "P", None, 2, extra=search_frontmatter(meta)) + "\n본문\n", encoding="utf-8")
+    fields = note_fields(note.read_text(encoding="utf-8"))
+    assert (fields["weak_points"], fields["glossary"]) == (["고유벡터"], ["대각화"])
+    # 저장 때 색인과 재구성(새 DB 로 스캔) 결과가 같음
+    idx = SearchIndex(tmp_path / "search.sqlite3")
+    idx.scan(tmp_path / "vault")
+    assert [r["title"] for r in idx.search("고유벡터")["results"]] == ["a"]
+    assert search_frontmatter({}) == {"weak_points": None, "glossary": None}
+    idx.close()
@@ -0,0 +1,59 @@
+import asyncio
+from pathlib import Path
+
+from server.services.vault_writer import VaultWriter
+
+
+def test_batch_coalesces_replace_and_append(tmp_path):
+    async def main():
+        w = VaultWriter("group", group_delay_ms=0)
+        path = await w.create(tmp_path / "P", "note", "v0")
+        batches = w.batches
+        # 한 배치: 앞선 교체/덧붙이기는 뒤 교체에 덮이고, 마지막 교체 뒤 덧붙이기는 교체 내용에 합쳐짐
+        results = await asyncio.gather(
+            w.replace(path, "A"), w.append(path, "+1"), w.replace(path, ["B", "C"]),
+            w.append(path, "+2"), w.append(path, "+3"))
+        await w.stop()
+        return path, results, w.batches - batches
+
+    path, results, batches = asyncio.run(main())
+    assert batches == 1
+    assert results == [path, None, path, None, None]
+    assert open(path, encoding="utf-8").read() == "BC+2+3"
+    assert [p.name for p in (tmp_path / "P").iterdir()] == ["note.md"]   # 임시 파일이 남지 않음
+
+
+def test_append_before_replace_in_same_batch_is_dropped(tmp_path):
+    async def main():
+        w = VaultWriter("none", group_delay_ms=0)
+        path = await w.create(tmp_path, "note", "old")
+        await asyncio.gather(w.append(path, "+lost"), w.replace(path, "new"))
+        await w.stop()
+        return path
+
+    assert open(asyncio.run(main()), encoding="utf-8").read() == "new"
+
+
+def test_creates_in_one_batch_get_unique_names(tmp_path):
+    async def main():
+        w = VaultWriter("always", group_delay_ms=0)
+        paths = await asyncio.gather(*(w.create(tmp_path / "P", "same", f"n{i}") for i in range(3)))
+        await w.stop()
+        return paths
+
+    paths = asyncio.run(main())
+    assert sorted(Path(p).name for p in paths) == ["same.md", "same_2.md", "same_3.md"]
+    assert sorted(open(p, encoding="utf-8").read() for p in paths) == ["n0", "n1", "n2"]
+
+
+def test_replace_recreates_folder_removed_behind_cache(tmp_path):
+    async def main():
+        w = VaultWriter("group", group_delay_ms=0)
+        path = await w.create(tmp_path / "P", "note", "x")
+        (tmp_path / "P" / "note.md").unlink()
+        (tmp_path / "P").rmdir()
+        await w.replace(path, "again")
+        await w.stop()
+        return path
+
+    assert open(asyncio.run(main()), encoding="utf-8").read() == "again"